@@ -0,0 +1,105 @@
+import logging
+from threading import Lock
+from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import Category
+
+logger = logging.getLogger(__name__)
+
+# SQLite integers are signed 64-bit, so the mask can hold up to 63 categories
+MAX_CATEGORIES = 63
+
+_cache_lock = Lock()
+_bits_by_name = {}  # category name -> bit position
+_names_by_bit = {}  # bit position -> category name
+
+def split_categories(categories):
+    """Split a legacy comma-joined categories string into clean names"""
+    if not categories:
+        return []
+    if isinstance(categories, str):
+        categories = categories.split(',')
+    return [cat.strip() for cat in categories if cat and cat.strip()]
+
+def _load(session):
+    """Reload the category dictionary from the database into the local cache"""
+    rows = session.execute(select(Category.id, Category.name)).all()
+    with _cache_lock:
+        for category_id, name in rows:
+            bit = category_id - 1
+            _bits_by_name[name] = bit
+            _names_by_bit[bit] = name
+
+def category_mask(session, categories):
+    """Return the bitmask for a list (or comma-joined string) of category names.
+
+    Unknown categories are added to the dictionary on the fly.
+    """
+    names = split_categories(categories)
+    if not names:
+        return 0
+
+    missing = [name for name in names if name not in _bits_by_name]
+    if missing:
+        _load(session)
+        missing = [name for name in missing if name not in _bits_by_name]
+    if missing:
+        # INSERT OR IGNORE keeps concurrent writers (server and CLI) from clashing
+        session.execute(
+            sqlite_insert(Category).values([{'name': name} for name in dict.fromkeys(missing)]).on_conflict_do_nothing()
+        )
+        _load(session)
+
+    mask = 0
+    for name in names:
+        bit = _bits_by_name.get(name)
+        if bit is None or bit >= MAX_CATEGORIES:
+            logger.warning(f"Category '{name}' does not fit in the category mask, ignoring")
+            continue
+        mask |= 1 << bit
+    return mask
+
+def category_names(session, mask):
+    """Return the sorted category names contained in a bitmask"""
+    if not mask:
+        return []
+    bits = [bit for bit in range(MAX_CATEGORIES) if mask & (1 << bit)]
+    if any(bit not in _names_by_bit for bit in bits):
+        _load(session)
+    return sorted(_names_by_bit[bit] for bit in bits if bit in _names_by_bit)
+
+def matching_mask(session, pattern):
+    """Return the mask of every category whose name contains one of the given substrings.
+
+    Mirrors the old ``LIKE '%pattern%'`` behaviour, e.g. ``hate`` matches both
+    ``hate`` and ``hate/threatening``.
+    """
+    _load(session)
+    terms = [term.lower() for term in split_categories(pattern)]
+    mask = 0
+    with _cache_lock:
+        for name, bit in _bits_by_name.items():
+            if bit < MAX_CATEGORIES and any(term in name.lower() for term in terms):
+                mask |= 1 << bit
+    return mask
+
+def has_any_category(column, mask):
+    """SQL expression matching rows whose mask shares at least one bit with ``mask``"""
+    return column.op('&')(mask) != 0
+
+def category_facets(session, model, project_id):
+    """Count rows per category for a project.
+
+    Groups on the indexed ``(project_id, category_mask)`` pair, so only the handful
+    of distinct masks travel back to Python.
+    """
+    rows = session.query(model.category_mask, func.count()).filter(
+        model.project_id == project_id,
+        model.category_mask != 0
+    ).group_by(model.category_mask).all()
+
+    counts = {}
+    for mask, count in rows:
+        for name in category_names(session, mask):
+            counts[name] = counts.get(name, 0) + count
+    return counts
@@ -0,0 +1,147 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from models import Video, Subtitle, CommentFlag, ReportedItem, DataChange
+
+logger = logging.getLogger(__name__)
+
+# Rows a single delta may carry before the client is told to reload over HTTP
+DELTA_LIMIT = 500
+
+# Change log entries older than this are pruned, clients that far behind resync
+CHANGE_RETENTION = timedelta(days=7)
+
+_TRACKED_TYPES = {
+    Video: 'video'
+}
+
+# Subtitles and comments are written by the hundred per video, so they are logged
+# once per video and flush: the delta reloads every row of that video
+_PER_VIDEO_TYPES = {
+    Subtitle: 'video_subtitles',
+    CommentFlag: 'video_comments'
+}
+
+def _change_row(obj, deleted):
+    """Describe a flushed object as a data_changes row, or None if it is not tracked"""
+    if isinstance(obj, ReportedItem):
+        if obj.project_id is None or obj.item_type not in ('subtitle', 'comment'):
+            return None
+        return {
+            'project_id': obj.project_id,
+            'item_type': f'{obj.item_type}_report',
+            'item_id': obj.item_id,
+            'deleted': deleted,
+            'created_at': datetime.utcnow()
+        }
+
+    item_type = _TRACKED_TYPES.get(type(obj))
+    if item_type is None or obj.project_id is None:
+        return None
+    return {
+        'project_id': obj.project_id,
+        'item_type': item_type,
+        'item_id': obj.id,
+        'deleted': deleted,
+        'created_at': datetime.utcnow()
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    """Append change log entries for the tracked rows written in this flush"""
+    written = [(obj, False) for obj in session.new]
+    written += [(obj, False) for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    written += [(obj, True) for obj in session.deleted]
+
+    rows = []
+    videos = set()  # (project_id, item_type, video pk)
+    for obj, deleted in written:
+        item_type = _PER_VIDEO_TYPES.get(type(obj))
+        if item_type is None:
+            rows.append(_change_row(obj, deleted))
+        elif obj.project_id is not None and obj.video_id is not None:
+            videos.add((obj.project_id, item_type, obj.video_id))
+
+    now = datetime.utcnow()
+    rows = [row for row in rows if row]
+    rows += [
+        {'project_id': project_id, 'item_type': item_type, 'item_id': video_id, 'deleted': False, 'created_at': now}
+        for project_id, item_type, video_id in sorted(videos)
+    ]
+    if rows:
+        session.connection().execute(DataChange.__table__.insert(), rows)
+
+def log_bulk_change(session, project_id, item_type, deleted=True):
+    """Record a change to every item of a type, for bulk statements that skip the flush"""
+    session.add(DataChange(
+        project_id=project_id,
+        item_type=item_type,
+        item_id=None,
+        deleted=deleted
+    ))
+
+def current_version(session, project_id):
+    """Return the data version of a project (0 if nothing was ever logged)"""
+    return session.query(func.max(DataChange.id)).filter(
+        DataChange.project_id == project_id
+    ).scalar() or 0
+
+def changes_since(session, project_id, since, limit=DELTA_LIMIT):
+    """Collect what changed in a project after version ``since``.
+
+    Returns ``(version, changes, resync)``. ``changes`` maps each item type to
+    ``{'changed': [ids], 'deleted': [ids], 'all': bool}``; ``resync`` is True when the
+    client is too far behind (or older than the pruned log) and should reload.
+    """
+    version = current_version(session, project_id)
+    if since >= version:
+        return version, {}, False
+
+    # Ids are shared by all projects, so anything below the oldest retained entry may be pruned
+    oldest = session.query(func.min(DataChange.id)).scalar()
+    if since < oldest - 1:
+        return version, {}, True
+
+    rows = session.query(
+        DataChange.item_type, DataChange.item_id, DataChange.deleted
+    ).filter(
+        DataChange.project_id == project_id,
+        DataChange.id > since
+    ).order_by(DataChange.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        return version, {}, True
+
+    latest = {}  # item_type -> {item_id: deleted}, only the last state of each id matters
+    bulk = set()
+    for item_type, item_id, deleted in rows:
+        if item_id is None:
+            # Bulk change: earlier entries of this type are superseded
+            latest[item_type] = {}
+            bulk.add(item_type)
+            continue
+        latest.setdefault(item_type, {})[item_id] = deleted
+
+    changes = {}
+    for item_type, states in latest.items():
+        changes[item_type] = {
+            'changed': [item_id for item_id, deleted in states.items() if not deleted],
+            'deleted': [item_id for item_id, deleted in states.items() if deleted],
+            'all': item_type in bulk
+        }
+
+    return version, changes, False
+
+def prune_changes(session, retention=CHANGE_RETENTION):
+    """Delete change log entries older than ``retention``"""
+    cutoff = datetime.utcnow() - retention
+    # SQLite reuses the ids of an emptied table, the newest entry stays so versions keep growing
+    newest = session.query(func.max(DataChange.id)).scalar() or 0
+    deleted = session.query(DataChange).filter(
+        DataChange.created_at < cutoff,
+        DataChange.id < newest
+    ).delete(synchronize_session=False)
+    session.commit()
+    if deleted:
+        logger.info(f"Pruned {deleted} old data change entries")
+    return deleted
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from models import ChannelSync, Video
+
+# Channel listings are read in pages of this size until the last seen upload shows up
+SYNC_PAGE_SIZE = 50
+
+# Videos in these states are already being analyzed
+BUSY_STATUSES = ('queued', 'processing', 'paused')
+
+def channel_key(channel_url):
+    """Normalized channel URL used to remember sync state"""
+    return channel_url.strip().rstrip("/")
+
+def get_sync_state(session, project, channel_url):
+    return session.query(ChannelSync).filter_by(
+        project_id=project.id,
+        channel_url=channel_key(channel_url)
+    ).first()
+
+def known_videos(session, project):
+    """video_id -> (title, processing_status) of every video in the project"""
+    return {
+        video_id: (title, status)
+        for video_id, title, status in session.query(
+            Video.video_id, Video.title, Video.processing_status
+        ).filter(Video.project_id == project.id)
+    }
+
+def page_reaches_known(page, last_video_id, known):
+    """True when a listing page gets to videos a previous sync already saw"""
+    ids = [entry.get("id") for entry in page]
+    return last_video_id in ids or all(video_id in known for video_id in ids)
+
+def select_sync_entries(entries, known):
+    """Split listing entries into (new, changed) videos that need to be queued.
+
+    A video is new when the project does not have it yet, and changed when its
+    title differs from the stored one. Videos already waiting or running are
+    left alone.
+    """
+    new, changed = [], []
+    for entry in entries:
+        video_id = entry.get("id")
+        if not video_id:
+            continue
+        if video_id not in known:
+            new.append(entry)
+            continue
+        title, status = known[video_id]
+        if status not in BUSY_STATUSES and entry.get("title") and entry.get("title") != title:
+            changed.append(entry)
+    return new, changed
+
+def recent_channel_videos(session, project, channel_url, days):
+    """Analyzed videos of a channel uploaded in the last ``days``, for a comment re-scan"""
+    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+    return session.query(Video).filter(
+        Video.project_id == project.id,
+        Video.channel_url == channel_key(channel_url),
+        Video.processing_status == 'completed',
+        Video.upload_date >= cutoff
+    ).all()
+
+def record_sync(session, project, channel_url, newest_video_id, seen, queued):
+    """Remember where this sync stopped; the caller commits"""
+    state = get_sync_state(session, project, channel_url)
+    if state is None:
+        state = ChannelSync(project_id=project.id, channel_url=channel_key(channel_url))
+        session.add(state)
+    if newest_video_id:
+        state.last_video_id = newest_video_id
+    state.last_synced_at = datetime.utcnow()
+    state.videos_seen = seen
+    state.videos_queued = queued
+    return state
@@ -0,0 +1,94 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from database import db
+from models import AnalysisCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Results are written every CHECKPOINT_BATCH items or CHECKPOINT_SECONDS, whichever comes first
+CHECKPOINT_BATCH = 25
+CHECKPOINT_SECONDS = 5
+
+# Checkpoints of videos that were never finished are dropped after this
+CHECKPOINT_RETENTION = timedelta(days=30)
+
+class Checkpoint:
+    """Moderation results of one video and item type, persisted while it is analyzed.
+
+    A retried or resumed job loads them back and only calls the moderation API
+    for the items that are missing. ``item_key`` is the text hash of a subtitle
+    line or the comment id.
+    """
+
+    def __init__(self, project_name, video_id, item_type):
+        self.project_name = project_name
+        self.video_id = video_id
+        self.item_type = item_type
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+        session = db.get_session()
+        try:
+            self.results = dict(session.query(AnalysisCheckpoint.item_key, AnalysisCheckpoint.result).filter_by(
+                project_name=project_name, video_id=video_id, item_type=item_type
+            ).all())
+        finally:
+            session.close()
+
+        if self.results:
+            print(f"♻️ Resuming {video_id}: {len(self.results)} {item_type}s already analyzed")
+
+    def get(self, item_key):
+        return self.results.get(item_key)
+
+    def add(self, item_key, result):
+        """Remember the result of one item, writing the batch out when it is due"""
+        self.results[item_key] = result
+        self.pending[item_key] = result
+        if len(self.pending) >= CHECKPOINT_BATCH or time.monotonic() - self.last_flush >= CHECKPOINT_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        session = db.get_session()
+        try:
+            session.bulk_insert_mappings(AnalysisCheckpoint, [
+                {
+                    'project_name': self.project_name,
+                    'video_id': self.video_id,
+                    'item_type': self.item_type,
+                    'item_key': item_key,
+                    'result': result
+                }
+                for item_key, result in self.pending.items()
+            ])
+            session.commit()
+            self.pending = {}
+        except Exception as e:
+            # Losing a checkpoint only costs API calls on a retry, never the analysis
+            session.rollback()
+            logger.warning(f"Could not save checkpoint for {self.video_id}: {e}")
+        finally:
+            session.close()
+
+def clear_checkpoints(session, project_name, video_ids):
+    """Drop the checkpoints of videos whose results are saved; the caller commits"""
+    if video_ids:
+        session.query(AnalysisCheckpoint).filter(
+            AnalysisCheckpoint.project_name == project_name,
+            AnalysisCheckpoint.video_id.in_(list(video_ids))
+        ).delete(synchronize_session=False)
+
+def prune_checkpoints(session, retention=CHECKPOINT_RETENTION):
+    """Delete checkpoints older than ``retention``"""
+    cutoff = datetime.utcnow() - retention
+    deleted = session.query(AnalysisCheckpoint).filter(AnalysisCheckpoint.created_at < cutoff).delete(
+        synchronize_session=False
+    )
+    session.commit()
+    if deleted:
+        logger.info(f"Pruned {deleted} old analysis checkpoints")
+    return deleted
@@ -1,38 +1,95 @@
 import os
-from sqlalchemy import create_engine, event
+import threading
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from models import Base
+import changes  # Registers the data change log listener for every session
 import logging
 
 logger = logging.getLogger(__name__)
 
 class Database:
-    def __init__(self, db_path='hatehunter.db'):
-        self.db_path = db_path
-        self.engine = None
-        self.SessionLocal = None
-        self._init_db()
-    
+    """SQLite engine and session factory, set up on the first session.
+
+    Importing this module touches no file, so commands that never read the
+    database (``--help``, argument errors) start fast. The table checks of
+    ``_verify_tables`` only run when ``verify`` is set or HATEHUNTER_VERIFY_DB=1.
+    """
+
+    def __init__(self, db_path='hatehunter.db', verify=None):
+        # Absolute, so workers running in their own job directory share the same file
+        self.db_path = os.path.abspath(os.environ.get('HATEHUNTER_DB', db_path))
+        self.verify = os.environ.get('HATEHUNTER_VERIFY_DB') == '1' if verify is None else verify
+        self._engine = None
+        self._session_factory = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        self._ensure_initialized()
+        return self._engine
+
+    @property
+    def SessionLocal(self):
+        self._ensure_initialized()
+        return self._session_factory
+
+    def _ensure_initialized(self):
+        if self._session_factory is None:
+            with self._lock:
+                if self._session_factory is None:
+                    self._init_db()
+
     def _init_db(self):
         # Create database directory if it doesn't exist
         db_dir = os.path.dirname(self.db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
         
+        engine = self._create_engine(StaticPool)
+        
+        # Create session factory
+        session_factory = scoped_session(
+            sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=engine
+            )
+        )
+        
+        # Create tables
+        try:
+            Base.metadata.create_all(bind=engine)
+            self._migrate_schema(engine, session_factory)
+            logger.info(f"Database initialized at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Error initializing database: {e}")
+            raise
+        
+        # Published last: other threads wait on the lock until the schema is ready
+        self._engine = engine
+        self._session_factory = session_factory
+        
+        if self.verify:
+            # Verificar que las tablas se crearon correctamente
+            self._verify_tables()
+    
+    def _create_engine(self, poolclass):
         # Create engine with proper settings for concurrent access
-        self.engine = create_engine(
+        engine = create_engine(
             f'sqlite:///{self.db_path}',
             connect_args={
                 'check_same_thread': False,
                 'timeout': 30
             },
-            poolclass=StaticPool,
+            poolclass=poolclass,
             echo=False  # Cambiar a True para debug de SQL
         )
         
         # Enable WAL mode for better concurrency
-        @event.listens_for(self.engine, "connect")
+        @event.listens_for(engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
             cursor = dbapi_connection.cursor()
             cursor.execute("PRAGMA journal_mode=WAL")
@@ -40,27 +97,98 @@ class Database:
             cursor.execute("PRAGMA foreign_keys=ON")  # Habilitar foreign keys
             cursor.close()
         
-        # Create session factory
-        self.SessionLocal = scoped_session(
-            sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                bind=self.engine
-            )
-        )
-        
-        # Create tables
+        return engine
+
+    def private_sessionmaker(self):
+        """Session factory on its own engine, one connection per session.
+
+        For background threads: the shared engine has a single connection, so
+        their commits and rollbacks would end the transaction of whoever else
+        is using it.
+        """
+        self._ensure_initialized()
+        return sessionmaker(autocommit=False, autoflush=False, bind=self._create_engine(NullPool))
+
+    def _migrate_schema(self, engine, session_factory):
+        """Add columns and indexes introduced after a database was first created"""
+        inspector = inspect(engine)
+        added_columns = set()
+
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                    default = getattr(column.default, 'arg', None)
+                    if isinstance(default, (int, float)) and not isinstance(default, bool):
+                        ddl += f' NOT NULL DEFAULT {default}' if not column.nullable else f' DEFAULT {default}'
+                    conn.execute(text(ddl))
+                    added_columns.add((table.name, column.name))
+                    logger.info(f"🔧 Added column {table.name}.{column.name}")
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+
+        if any(column == 'category_mask' for _, column in added_columns):
+            self._backfill_category_masks(session_factory)
+
+        if ('video_queue', 'start_by') in added_columns:
+            self._backfill_aging_deadlines(session_factory)
+
+    def _backfill_aging_deadlines(self, session_factory):
+        """Fill start_by of the jobs still waiting in the queue"""
+        from models import VideoQueue
+        from job_queue import ACTIVE_STATUSES, aging_deadline
+
+        session = session_factory()
         try:
-            Base.metadata.create_all(bind=self.engine)
-            logger.info(f"Database initialized at {self.db_path}")
-            
-            # Verificar que las tablas se crearon correctamente
-            self._verify_tables()
-            
+            jobs = session.query(VideoQueue).filter(
+                VideoQueue.status.in_(ACTIVE_STATUSES),
+                VideoQueue.start_by == None
+            ).all()
+            for job in jobs:
+                job.start_by = aging_deadline(job.created_at or datetime.utcnow(), job.priority)
+            session.commit()
+            logger.info(f"✅ Backfilled aging deadlines of {len(jobs)} queued jobs")
         except Exception as e:
-            logger.error(f"Error initializing database: {e}")
-            raise
-    
+            session.rollback()
+            logger.error(f"Error backfilling aging deadlines: {e}")
+        finally:
+            session.close()
+
+    def _backfill_category_masks(self, session_factory):
+        """Fill category_mask from the legacy comma-joined categories strings"""
+        from models import Subtitle, SubtitleFlag, CommentFlag
+        from categories import category_mask
+
+        # Runs while the database is being set up, before get_session is available
+        session = session_factory()
+        try:
+            for model in (Subtitle, SubtitleFlag, CommentFlag):
+                # One UPDATE per distinct string rather than per row
+                distinct_values = session.query(model.categories).filter(
+                    model.categories.isnot(None),
+                    model.categories != '',
+                    model.category_mask == 0
+                ).distinct().all()
+
+                for (categories,) in distinct_values:
+                    mask = category_mask(session, categories)
+                    session.query(model).filter(model.categories == categories).update(
+                        {model.category_mask: mask}, synchronize_session=False
+                    )
+                logger.info(f"✅ Backfilled category masks for {model.__tablename__} ({len(distinct_values)} distinct values)")
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error backfilling category masks: {e}")
+        finally:
+            session.close()
+
     def _verify_tables(self):
         """Verificar que todas las tablas necesarias existen"""
         try:
@@ -118,10 +246,10 @@ class Database:
     def close(self):
         """Close database connections"""
         try:
-            if self.SessionLocal:
-                self.SessionLocal.remove()
-            if self.engine:
-                self.engine.dispose()
+            if self._session_factory:
+                self._session_factory.remove()
+            if self._engine:
+                self._engine.dispose()
             logger.info("Database connections closed")
         except Exception as e:
             logger.error(f"Error closing database: {e}")
@@ -253,5 +381,6 @@ def debug_database():
 
 if __name__ == "__main__":
     # Run migrations on direct execution
+    db.verify = True
     db.migrate_database()
     debug_database()
\ No newline at end of file
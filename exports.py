@@ -0,0 +1,202 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from sqlalchemy import select, Integer, Float, Boolean, DateTime, JSON
+from models import Video, Subtitle, SubtitleFlag, CommentFlag, ReportedItem
+
+# pyarrow is optional and slow to import, it is loaded on the first Parquet export
+pa = pq = None
+
+# Rows fetched from the database per round trip, and per Parquet row group
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Exported tables: model and its columns. Rows that belong to a video also get its YouTube id.
+EXPORT_TABLES = {
+    'videos': (Video, (
+        'video_id', 'title', 'uploader', 'upload_date', 'duration', 'view_count', 'like_count',
+        'comment_count', 'webpage_url', 'channel_url', 'has_captions', 'is_live', 'flagged_subtitles',
+        'flagged_comments', 'processing_status', 'processing_error', 'retrieval_date',
+        'processing_completed_at'
+    )),
+    'subtitles': (Subtitle, (
+        'id', 'timestamp', 'text', 'youtube_url', 'is_flagged', 'categories', 'category_scores', 'created_at'
+    )),
+    'subtitle_flags': (SubtitleFlag, (
+        'id', 'timestamp', 'text', 'categories', 'category_scores', 'youtube_url', 'created_at'
+    )),
+    'comment_flags': (CommentFlag, (
+        'id', 'comment_id', 'comment_author', 'author_thumbnail', 'text', 'categories', 'category_scores',
+        'youtube_url', 'created_at'
+    )),
+    'reports': (ReportedItem, (
+        'id', 'item_type', 'item_id', 'reported_by', 'reported_at', 'item_data'
+    ))
+}
+
+def _load_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # Parquet export is optional
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+def parquet_available():
+    return _load_pyarrow()
+
+def _belongs_to_video(model):
+    # Reports point to a flag row, not to a video
+    return model not in (Video, ReportedItem)
+
+def export_columns(table):
+    """(name, column) pairs of an exported table, the video id first for rows of a video"""
+    model, names = EXPORT_TABLES[table]
+    columns = [(name, getattr(model, name)) for name in names]
+    if _belongs_to_video(model):
+        columns.insert(0, ('video_id', Video.video_id))
+    return columns
+
+def export_query(table, project_id):
+    model, _ = EXPORT_TABLES[table]
+    query = select(*[column.label(name) for name, column in export_columns(table)])
+    if _belongs_to_video(model):
+        query = query.join(Video, Video.id == model.video_id)
+    return query.where(model.project_id == project_id).order_by(model.id)
+
+def export_batches(session, table, project_id, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the rows of a table in lists of up to ``batch_size`` tuples, read with a streaming cursor"""
+    result = session.execute(export_query(table, project_id).execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield rows
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _text_value(value, is_json):
+    if value is None:
+        return ''
+    if is_json:
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _ndjson(table, batches):
+    names = [name for name, _ in export_columns(table)]
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(names, map(_json_value, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        ).encode('utf-8')
+
+def _csv(table, batches):
+    columns = export_columns(table)
+    is_json = [isinstance(column.type, JSON) for _, column in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for rows in batches:
+        writer.writerows([_text_value(value, flag) for value, flag in zip(row, is_json)] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _arrow_type(column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp('us')
+    return pa.string()  # Text, and JSON columns stored as JSON text
+
+class _ChunkSink:
+    """Write-only file that keeps what was written until it is taken, to stream Parquet"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def _parquet(table, batches):
+    if not _load_pyarrow():
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    columns = export_columns(table)
+    schema = pa.schema([(name, _arrow_type(column)) for name, column in columns])
+    is_json = [isinstance(column.type, JSON) for _, column in columns]
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd')
+    try:
+        for rows in batches:
+            values = list(zip(*rows)) if rows else [[] for _ in columns]
+            arrays = [
+                pa.array([json.dumps(value, ensure_ascii=False) if value is not None else None for value in column_values]
+                         if flag else column_values, type=field.type)
+                for column_values, flag, field in zip(values, is_json, schema)
+            ]
+            # One row group per database batch
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+_WRITERS = {'ndjson': _ndjson, 'csv': _csv, 'parquet': _parquet}
+
+def export_stream(session, table, project_id, fmt):
+    """Yield the export of one table of a project as byte chunks, in constant memory"""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+    return _WRITERS[fmt](table, export_batches(session, table, project_id))
+
+def export_project(session, project_id, fmt, output_dir, tables=None):
+    """Write the tables of a project as ``<output_dir>/<table>.<fmt>``; returns the paths written"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for table in tables or EXPORT_TABLES:
+        path = os.path.join(output_dir, f"{table}.{fmt}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for chunk in export_stream(session, table, project_id, fmt):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
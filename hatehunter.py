@@ -6,26 +6,73 @@ import re
 import subprocess
 import sys
 import glob
-import openai
-import requests
 import time
 import hashlib
+import logging
 from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from urllib.parse import urlparse, parse_qs
-from openai import OpenAI
-from jinja2 import Environment, FileSystemLoader
 from datetime import datetime
 
 # Importar las nuevas dependencias para SQLite
 from database import db
 from models import Project, Video, Subtitle, SubtitleFlag, CommentFlag
-import socketio
+from exports import EXPORT_TABLES, export_project, parquet_available
+from categories import category_mask
+from job_queue import enqueue
+from progress import ProgressReporter
+from checkpoints import Checkpoint, clear_checkpoints
+from video_metadata import store_metadata, store_info, get_metadata, lookup_durations, METADATA_COLUMNS
+from channel_sync import (
+    SYNC_PAGE_SIZE, BUSY_STATUSES, channel_key, get_sync_state, known_videos, page_reaches_known,
+    select_sync_entries, recent_channel_videos, record_sync
+)
+# openai, requests, socketio and the thumbnail cache are imported by the stage
+# that uses them, so --help, exports and queue listings start without them
+
+logger = logging.getLogger(__name__)
 
 # Global instance
 api_manager = None
 
-# Queue file path (same as server.py)
-QUEUE_FILE = "hatehunter.tmp"
+# Machine readable progress for the server (--events-fd, or the control channel in --worker mode)
+progress = ProgressReporter()
+
+# Shared HTTP connection pool (kept warm across jobs in --worker mode), see get_http_session
+_http_session = None
+
+# Thumbnails and avatars are downloaded in the background, outside the results transaction
+_thumbnail_fetcher = None
+
+# Key sent to the moderation endpoint, set by get_moderation_client
+moderation_api_key = None
+
+# Moderation results kept in memory, oldest entries are dropped first
+MODERATION_CACHE_SIZE = 50000
+
+# Texts sent per request by the batched moderation (the endpoint takes a list of inputs)
+MODERATION_BATCH_SIZE = 32
+
+# Videos parsed, moderated and saved together by --import
+IMPORT_CHUNK_SIZE = 100
+
+# Web server that runs the queue, on the port server.py listens on (HATEHUNTER_PORT)
+SERVER_URL = os.environ.get("HATEHUNTER_SERVER", f"http://localhost:{os.environ.get('HATEHUNTER_PORT', 1338)}")
+
+
+def get_http_session():
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
+def get_thumbnail_fetcher():
+    global _thumbnail_fetcher
+    if _thumbnail_fetcher is None:
+        from thumbnails import ThumbnailFetcher
+        _thumbnail_fetcher = ThumbnailFetcher()
+    return _thumbnail_fetcher
 
 class ModerationAPIManager:
     def __init__(self, max_requests_per_second=10):
@@ -37,6 +84,11 @@ class ModerationAPIManager:
         self.cache_hits = 0
         self.api_calls = 0
     
+    def set_rate_limit(self, max_requests_per_second):
+        """Change the request budget without losing the cache (used between worker jobs)"""
+        self.max_requests_per_second = max_requests_per_second
+        self.request_interval = 1.0 / max_requests_per_second
+    
     def _get_text_hash(self, text):
         return hashlib.md5(text.encode('utf-8')).hexdigest()
     
@@ -71,32 +123,86 @@ class ModerationAPIManager:
             
             url = "https://api.openai.com/v1/moderations"
             headers = {
-                "Authorization": f"Bearer {openai.api_key}",
+                "Authorization": f"Bearer {moderation_api_key}",
                 "Content-Type": "application/json"
             }
             payload = {"input": text_clean, "model": "omni-moderation-latest"}
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = get_http_session().post(url, headers=headers, json=payload, timeout=30)
             
             if response.status_code != 200:
                 raise Exception(f"Moderation API request failed with status code {response.status_code}: {response.text}")
             
             result = response.json()
-            self.moderation_cache[text_hash] = result
+            self._remember(text_hash, result)
             print(f"✅ API call successful, result cached")
             
             return result
             
         except Exception as e:
             print(f"❌ Error in moderation API call: {e}")
-            return {"results": [{"flagged": False, "categories": {}}]}
+            # Marked so the fallback is never stored as a checkpoint
+            return {"results": [{"flagged": False, "categories": {}}], "error": str(e)}
+    
+    def _remember(self, text_hash, result):
+        if len(self.moderation_cache) >= MODERATION_CACHE_SIZE:
+            self.moderation_cache.pop(next(iter(self.moderation_cache)))
+        self.moderation_cache[text_hash] = result
+    
+    def moderate_texts(self, texts):
+        """Moderate many texts, sending up to MODERATION_BATCH_SIZE of them per request.
+        
+        Returns one response per text, shaped like ``moderate_text``'s. Cached and
+        repeated texts are not sent again.
+        """
+        responses = [None] * len(texts)
+        pending = {}  # text hash -> (clean text, indexes in texts)
+        for index, text in enumerate(texts):
+            text_clean = text.strip()
+            if not text_clean:
+                responses[index] = {"results": [{"flagged": False, "categories": {}}]}
+                continue
+            text_hash = self._get_text_hash(text_clean)
+            if text_hash in self.moderation_cache:
+                self.cache_hits += 1
+                responses[index] = self.moderation_cache[text_hash]
+            else:
+                pending.setdefault(text_hash, (text_clean, []))[1].append(index)
+        
+        items = list(pending.items())
+        for start in range(0, len(items), MODERATION_BATCH_SIZE):
+            batch = items[start:start + MODERATION_BATCH_SIZE]
+            self._wait_for_rate_limit()
+            self.api_calls += 1
+            try:
+                response = get_http_session().post(
+                    "https://api.openai.com/v1/moderations",
+                    headers={
+                        "Authorization": f"Bearer {moderation_api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json={"input": [text_clean for _, (text_clean, _) in batch], "model": "omni-moderation-latest"},
+                    timeout=60
+                )
+                if response.status_code != 200:
+                    raise Exception(f"Moderation API request failed with status code {response.status_code}: {response.text}")
+                results = response.json()["results"]
+                for (text_hash, (_, indexes)), result in zip(batch, results):
+                    single = {"results": [result]}
+                    self._remember(text_hash, single)
+                    for index in indexes:
+                        responses[index] = single
+                print(f"🔍 API call #{self.api_calls}: moderated {len(batch)} texts")
+            except Exception as e:
+                print(f"❌ Error in moderation API call: {e}")
+                for _, (_, indexes) in batch:
+                    for index in indexes:
+                        responses[index] = {"results": [{"flagged": False, "categories": {}}], "error": str(e)}
+        return responses
     
     def moderate_comment_with_client(self, comment_text, client):
-        moderation_response = self.moderate_text(comment_text)
-        result = moderation_response["results"][0]
-        categories_dict = result.get("categories", {})
-        hate_categories = [cat for cat, flagged in categories_dict.items() if flagged and "hate" in cat.lower()]
-        return hate_categories
+        """Return (hate categories, scores, whether the API answered)"""
+        return comment_moderation(self.moderate_text(comment_text))
     
     def print_stats(self):
         total_requests = self.api_calls + self.cache_hits
@@ -112,6 +218,36 @@ class ModerationAPIManager:
 def parse_keywords(value):
     return [kw.strip() for kw in value.split(',') if kw.strip()]
 
+def subtitle_moderation(moderation_response):
+    """(flagged, categories, scores) of a subtitle line from a moderation response"""
+    moderation_result = moderation_response["results"][0]
+    flagged = moderation_result.get("flagged", False)
+    categories = [cat for cat, val in moderation_result.get("categories", {}).items() if val]
+    scores = moderation_result.get("category_scores", {}) if flagged else None
+    return flagged, categories, scores
+
+def comment_moderation(moderation_response):
+    """(hate categories, scores, whether the API answered) of a comment from a moderation response"""
+    result = moderation_response["results"][0]
+    categories_dict = result.get("categories", {})
+    hate_categories = [cat for cat, flagged in categories_dict.items() if flagged and "hate" in cat.lower()]
+    scores = result.get("category_scores", {})
+    return hate_categories, scores, "error" not in moderation_response
+
+def comment_result(video_id, comment, hate_categories, scores):
+    """Flagged comment in the shape merge_analysis_results saves"""
+    return {
+        "Filename": f"{video_id}.comments",
+        "Timestamp": None,
+        "Texto": comment.get("text", ""),
+        "Categorías": ", ".join(hate_categories),
+        "YouTubeURL": f"https://www.youtube.com/watch?v={video_id}&lc={comment.get('id', '')}",
+        "CommentAuthor": comment.get("author", ""),
+        "CommentID": comment.get("id", ""),
+        "AuthorThumbnail": comment.get("author_thumbnail", ""),
+        "CategoryScores": scores
+    }
+
 def extract_video_id(url_or_id):
     if not url_or_id:
         return None
@@ -130,20 +266,15 @@ def extract_video_id(url_or_id):
     
     return url_or_id
 
-def ensure_thumbnail(video_id):
-    folder = "thumbnails"
-    os.makedirs(folder, exist_ok=True)
-    thumb_path = os.path.join(folder, f"{video_id}.jpg")
-    if not os.path.exists(thumb_path):
-        url = f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                with open(thumb_path, "wb") as f:
-                    f.write(response.content)
-                print(f"✅ Downloaded thumbnail for video {video_id}")
-        except Exception as e:
-            print(f"❌ Failed to download thumbnail for {video_id}: {e}")
+def fetch_thumbnails(video_ids, videos_metadata, comment_results):
+    """Queue the thumbnails, uploader avatars and comment author pictures of a run for the image cache"""
+    thumbnail_fetcher = get_thumbnail_fetcher()
+    for video_id in video_ids:
+        thumbnail_fetcher.submit_video(video_id)
+        metadata = videos_metadata.get(video_id) or {}
+        thumbnail_fetcher.submit_avatar(metadata.get('uploader_avatar'))
+    for url in {item.get("AuthorThumbnail") for item in comment_results}:
+        thumbnail_fetcher.submit_avatar(url, kind='author')
 
 def download_comments(video_id):
     url = f"https://www.youtube.com/watch?v={video_id}"
@@ -200,7 +331,7 @@ def process_video_comments(video_identifier):
 def moderate_comment(comment_text, client):
     return api_manager.moderate_comment_with_client(comment_text, client)
 
-def analyze_comments(video_list, keywords, client):
+def analyze_comments(video_list, keywords, client, project_name):
     results = []
     
     print(f"🔄 Starting comment analysis for {len(video_list)} videos...")
@@ -232,25 +363,27 @@ def analyze_comments(video_list, keywords, client):
             print(f"🔍 Filtered to {len(comments)} comments containing keywords: {', '.join(keywords)}")
         
         flagged_count = 0
+        checkpoint = Checkpoint(project_name, extracted_id, 'comment')
+        progress.stage('comments', total=len(comments), video=extracted_id)
         for comment_idx, comment in enumerate(comments, 1):
             if comment_idx % 50 == 0:
                 print(f"   📊 Processed {comment_idx}/{len(comments)} comments...")
             
             text = comment.get("text", "")
-            hate_categories = moderate_comment(text, client)
+            comment_key = comment.get("id") or hashlib.md5(text.encode('utf-8')).hexdigest()
+            saved = checkpoint.get(comment_key)
+            if saved is not None:
+                hate_categories, scores = saved["categories"], saved["scores"]
+            else:
+                hate_categories, scores, answered = moderate_comment(text, client)
+                if answered:
+                    checkpoint.add(comment_key, {"categories": hate_categories, "scores": scores if hate_categories else None})
+            progress.advance()
             if hate_categories:
                 flagged_count += 1
-                results.append({
-                    "Filename": f"{vid_id}.comments",
-                    "Timestamp": None,
-                    "Texto": text,
-                    "Categorías": ", ".join(hate_categories),
-                    "YouTubeURL": f"https://www.youtube.com/watch?v={vid_id}&lc={comment.get('id', '')}",
-                    "CommentAuthor": comment.get("author", ""),
-                    "CommentID": comment.get("id", ""),
-                    "AuthorThumbnail": comment.get("author_thumbnail", "")
-                })
+                results.append(comment_result(vid_id, comment, hate_categories, scores))
         
+        checkpoint.flush()
         print(f"🚩 Found {flagged_count} flagged comments for video {extracted_id}")
     
     print(f"\n✅ Comment analysis complete! Total flagged comments: {len(results)}")
@@ -259,25 +392,13 @@ def analyze_comments(video_list, keywords, client):
     return results
 
 def ensure_video_metadata(video_id):
-    info_file = f"{video_id}.info.json"
-    if not os.path.exists(info_file):
-        print(f"📥 Downloading metadata for video: {video_id}")
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        
-        cmd = [
-            "yt-dlp",
-            "--write-info-json",
-            "--skip-download",
-            "-o", "%(id)s.%(ext)s",
-            url
-        ]
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=60)
-            if os.path.exists(info_file):
-                print(f"✅ Metadata downloaded successfully: {info_file}")
-        except Exception as e:
-            print(f"❌ Failed to download metadata for {video_id}: {e}")
+    """Make sure the shared metadata store has this video, looking it up once if needed"""
+    session = db.get_session()
+    try:
+        if not get_metadata(session, [video_id]):
+            print(f"❌ Failed to get metadata for video: {video_id}")
+    finally:
+        session.close()
 
 def check_video_duration(video_url, min_duration_minutes):
     """Check if video meets minimum duration requirement. Returns (meets_requirement, duration_minutes)"""
@@ -286,26 +407,23 @@ def check_video_duration(video_url, min_duration_minutes):
 
     try:
         video_id = extract_video_id(video_url)
-        info_file = f"{video_id}.info.json"
 
-        # Download info if not exists
-        if not os.path.exists(info_file):
-            print(f"📥 Downloading video metadata to check duration...")
-            download_video_info(video_url)
+        # Duration from the metadata cache, looked up once if the video is not in it
+        session = db.get_session()
+        try:
+            duration_seconds = lookup_durations(session, [video_id]).get(video_id)
+        finally:
+            session.close()
 
-        # Read duration from info file
-        if os.path.exists(info_file):
-            with open(info_file, 'r', encoding='utf-8') as f:
-                info = json.load(f)
-                duration_seconds = info.get('duration', 0)
-                duration_minutes = duration_seconds / 60 if duration_seconds else 0
+        if duration_seconds is not None:
+            duration_minutes = duration_seconds / 60
 
-                if duration_minutes < min_duration_minutes:
-                    print(f"⏭️  Skipping video: {duration_minutes:.1f} min < {min_duration_minutes} min minimum")
-                    return False, duration_minutes
-                else:
-                    print(f"✅ Video duration: {duration_minutes:.1f} minutes (meets {min_duration_minutes} min requirement)")
-                    return True, duration_minutes
+            if duration_minutes < min_duration_minutes:
+                print(f"⏭️  Skipping video: {duration_minutes:.1f} min < {min_duration_minutes} min minimum")
+                return False, duration_minutes
+            else:
+                print(f"✅ Video duration: {duration_minutes:.1f} minutes (meets {min_duration_minutes} min requirement)")
+                return True, duration_minutes
 
         # If no info available, allow processing (fail-safe)
         return True, 0
@@ -461,18 +579,39 @@ def convert_srt_file(srt_file, threshold=30):
         output_lines.append("")
     return "\n".join(output_lines)
 
-def get_video_list(channel_url, min_duration_minutes=0):
-    """Get list of videos from channel, optionally filtering by minimum duration"""
+def fetch_channel_entries(channel_url, start=None, end=None):
+    """Flat listing of the channel uploads, newest first (only items start..end when given)"""
     playlist_url = channel_url.rstrip("/") + "/videos"
-    print("🔍 Retrieving video list from:", playlist_url)
-
-    # Always use flat-playlist first for speed (gets all video IDs quickly)
-    print("📥 Getting video list (fast mode)...")
-    result = subprocess.run(["yt-dlp", "-J", "--flat-playlist", playlist_url],
-                            capture_output=True, text=True, check=True)
-
-    data = json.loads(result.stdout)
-    entries = data.get("entries", [])
+    cmd = ["yt-dlp", "-J", "--flat-playlist"]
+    if start is not None:
+        cmd.extend(["--playlist-items", f"{start}-{end}"])
+    cmd.append(playlist_url)
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout).get("entries") or []
+
+def fetch_new_channel_entries(channel_url, last_video_id, known):
+    """Read the listing page by page until it reaches videos seen by the previous sync"""
+    entries = []
+    start = 1
+    while True:
+        page = fetch_channel_entries(channel_url, start, start + SYNC_PAGE_SIZE - 1)
+        entries.extend(page)
+        if len(page) < SYNC_PAGE_SIZE or page_reaches_known(page, last_video_id, known):
+            return entries
+        print(f"   📄 {len(entries)} uploads read, still newer than the last sync...")
+        start += SYNC_PAGE_SIZE
+
+def get_video_list(channel_url, min_duration_minutes=0, entries=None):
+    """Get list of videos from channel, optionally filtering by minimum duration.
+
+    ``entries`` is an already fetched listing to filter instead of the whole channel.
+    """
+    if entries is None:
+        print("🔍 Retrieving video list from:", channel_url.rstrip("/") + "/videos")
+
+        # Always use flat-playlist first for speed (gets all video IDs quickly)
+        print("📥 Getting video list (fast mode)...")
+        entries = fetch_channel_entries(channel_url)
     total = len(entries)
 
     print(f"📊 Found {total} videos in channel")
@@ -495,13 +634,27 @@ def get_video_list(channel_url, min_duration_minutes=0):
         print(f"✅ Returning all {len(video_list)} videos (no duration filter)")
         return video_list
 
-    # If duration filter is set, we need to check each video individually
+    # Most listings already carry the duration, only the entries without one are looked up
     print(f"⏱️  Filtering by minimum duration: {min_duration_minutes} minutes")
-    print(f"⚠️  This will check metadata for each video individually (may take time)")
+    listed = {
+        entry["id"]: {"title": entry.get("title"), "duration": entry["duration"]}
+        for entry in entries if entry.get("id") and entry.get("duration")
+    }
+    durations = {video_id: info["duration"] for video_id, info in listed.items()}
+    missing = [entry["id"] for entry in entries if entry.get("id") and entry["id"] not in durations]
+
+    session = db.get_session()
+    try:
+        store_metadata(session, listed)
+        session.commit()
+        if missing:
+            print(f"🔎 {len(missing)} videos have no duration in the listing, using the metadata cache or yt-dlp...")
+            durations.update(lookup_durations(session, missing))
+    finally:
+        session.close()
 
     video_list = []
     filtered_count = 0
-    checked_count = 0
 
     for idx, entry in enumerate(entries):
         video_id = entry.get("id")
@@ -511,46 +664,19 @@ def get_video_list(channel_url, min_duration_minutes=0):
         if timestamp is None:
             timestamp = total - idx
 
-        # Get duration for this specific video
-        try:
-            checked_count += 1
-            if checked_count % 10 == 0:
-                print(f"   ⏳ Checked {checked_count}/{total} videos... ({len(video_list)} passed filter)")
-
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-
-            # Get individual video info
-            info_result = subprocess.run(
-                ["yt-dlp", "-J", "--no-playlist", video_url],
-                capture_output=True,
-                text=True,
-                timeout=10  # 10 second timeout per video
-            )
-
-            if info_result.returncode == 0:
-                video_info = json.loads(info_result.stdout)
-                duration = video_info.get("duration", 0)
-                duration_minutes = duration / 60 if duration else 0
-
-                if duration_minutes >= min_duration_minutes:
-                    video_list.append({
-                        "id": video_id,
-                        "title": title,
-                        "timestamp": timestamp,
-                        "duration": duration
-                    })
-                else:
-                    filtered_count += 1
-            else:
-                # If failed to get info, skip this video
-                print(f"   ⚠️  Could not get info for {video_id}, skipping...")
-                filtered_count += 1
-
-        except subprocess.TimeoutExpired:
-            print(f"   ⏱️  Timeout checking {video_id}, skipping...")
+        duration = durations.get(video_id)
+        if duration is None:
+            # If failed to get info, skip this video
+            print(f"   ⚠️  Could not get info for {video_id}, skipping...")
             filtered_count += 1
-        except Exception as e:
-            print(f"   ❌ Error checking {video_id}: {e}")
+        elif duration / 60 >= min_duration_minutes:
+            video_list.append({
+                "id": video_id,
+                "title": title,
+                "timestamp": timestamp,
+                "duration": duration
+            })
+        else:
             filtered_count += 1
 
     if filtered_count > 0:
@@ -559,10 +685,9 @@ def get_video_list(channel_url, min_duration_minutes=0):
     print(f"✅ Found {len(video_list)} videos matching criteria (from {total} total)")
     return video_list
 
-def build_individual_video_command(video_id, base_args):
-    """Build a command for processing a single video"""
-    # Start with base python command
-    cmd = ['python3', 'hatehunter.py']
+def build_individual_video_args(video_id, base_args):
+    """Build the hatehunter arguments for processing a single video"""
+    cmd = []
     
     # Add project
     cmd.extend(['--project', base_args.project])
@@ -608,7 +733,37 @@ def build_individual_video_command(video_id, base_args):
     if base_args.no_moderation:
         cmd.append('--no-moderation')
 
-    return ' '.join(cmd)
+    return cmd
+
+def plan_incremental_sync(channel_url, args):
+    """List only the uploads that changed since the last sync of the channel.
+
+    Returns (video_list, newest_video_id, seen): the new or changed videos that
+    pass the duration filter, the newest upload of the channel and how many
+    uploads were read.
+    """
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=args.project).first()
+        state = get_sync_state(session, project, channel_url) if project else None
+        known = known_videos(session, project) if project else {}
+        last_video_id = state.last_video_id if state else None
+    finally:
+        session.close()
+
+    if last_video_id is None:
+        print("🆕 First sync of this channel, reading every upload")
+        entries = fetch_channel_entries(channel_url)
+    else:
+        print(f"🔄 Incremental sync: reading uploads newer than {last_video_id}")
+        entries = fetch_new_channel_entries(channel_url, last_video_id, known)
+
+    new, changed = select_sync_entries(entries, known)
+    print(f"📊 {len(entries)} uploads read: {len(new)} new, {len(changed)} changed")
+    newest_video_id = entries[0].get("id") if entries else None
+
+    video_list = get_video_list(channel_url, args.min_duration, entries=new + changed) if new or changed else []
+    return video_list, newest_video_id, len(entries)
 
 def add_channel_videos_to_queue(channel_url, args):
     """Process channel by adding individual video commands to the queue"""
@@ -616,56 +771,86 @@ def add_channel_videos_to_queue(channel_url, args):
     print("📋 This will add individual video commands to the processing queue")
 
     try:
-        # Get list of videos from the channel, filtered by minimum duration if specified
-        video_list = get_video_list(channel_url, args.min_duration)
+        newest_video_id, seen = None, 0
+        if args.incremental:
+            # Only the uploads since the last sync
+            video_list, newest_video_id, seen = plan_incremental_sync(channel_url, args)
+        else:
+            # Get list of videos from the channel, filtered by minimum duration if specified
+            video_list = get_video_list(channel_url, args.min_duration)
         
-        if not video_list:
+        if not video_list and not args.incremental:
             print("❌ No videos found in the channel")
             return
         
-        print(f"📹 Found {len(video_list)} videos in channel")
-        print(f"🔄 Building individual commands for each video...")
+        print(f"📹 Found {len(video_list)} videos to analyze in channel")
         
-        # Build commands for each video
-        commands = []
+        # Create video placeholders in database with 'queued' status, jobs reference them
+        videos = create_queued_video_placeholders(video_list, args.project, channel_url) if video_list else []
         
-        for i, video in enumerate(video_list, 1):
-            video_id = video["id"]
-            video_title = video.get("title", "Unknown Title")
+        # Queue one job per video in the database queue
+        print(f"📤 Adding {len(videos)} videos to the processing queue...")
+        
+        session = db.get_session()
+        try:
+            project = session.query(Project).filter_by(name=args.project).first()
+            if project is None:
+                project = Project(name=args.project)
+                session.add(project)
+                session.flush()
+            queued = 0
+            for video in session.query(Video).filter(
+                Video.project_id == project.id,
+                Video.video_id.in_(videos)
+            ):
+                _, created = enqueue(session, project, video, build_individual_video_args(video.video_id, args))
+                queued += created
             
-            # Build command for this individual video
-            command = build_individual_video_command(video_id, args)
-            commands.append(command)
+            # Comments keep coming in after a video is analyzed, re-scan the recent ones
+            rescanned = 0
+            if args.rescan_comments > 0:
+                for video in recent_channel_videos(session, project, channel_url, args.rescan_comments):
+                    if video.video_id in videos:
+                        continue
+                    job_args = build_individual_video_args(video.video_id, args)
+                    job_args.extend(flag for flag in ('--comments', '--skip-convert') if flag not in job_args)
+                    _, created = enqueue(session, project, video, job_args)
+                    if created:
+                        video.processing_status = 'queued'
+                        rescanned += 1
             
-            if i % 10 == 0:
-                print(f"   📝 Prepared {i}/{len(video_list)} commands...")
-        
-        print(f"✅ Prepared {len(commands)} video commands")
-        
-        # Write commands to queue file
-        print(f"📤 Adding commands to queue file: {QUEUE_FILE}")
-        
-        with open(QUEUE_FILE, 'a', encoding='utf-8') as f:
-            for command in commands:
-                f.write(command + '\n')
+            if args.incremental:
+                record_sync(session, project, channel_url, newest_video_id, seen, queued)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
         
-        print(f"🎉 Successfully added {len(commands)} video commands to the processing queue!")
-        print(f"📊 Queue file: {QUEUE_FILE}")
+        print(f"🎉 Successfully added {queued} videos to the processing queue!")
+        if queued < len(videos):
+            print(f"⏭️  {len(videos) - queued} videos were already queued")
+        if args.rescan_comments > 0:
+            print(f"💬 {rescanned} videos from the last {args.rescan_comments} days queued for a comment re-scan")
+        queued += rescanned
         print(f"🚀 Videos will be processed automatically by the server queue manager")
-        print(f"🌐 Monitor progress at: http://localhost:1337/project/{args.project}/videos")
-        
-        # Create video placeholders in database with 'queued' status
-        create_queued_video_placeholders(video_list, args.project)
+        print(f"🌐 Monitor progress at: {SERVER_URL}/project/{args.project}/videos")
         
         # Notify the server about new items in queue (if server is running)
-        try_notify_server(args.project, len(commands))
+        try_notify_server(args.project, queued)
         
     except Exception as e:
         print(f"❌ Error processing channel: {e}")
         raise
 
-def create_queued_video_placeholders(video_list, project_name):
-    """Create video entries in database with 'queued' status"""
+def create_queued_video_placeholders(video_list, project_name, channel_url=None):
+    """Create video entries in database with 'queued' status.
+
+    Known videos that were already analyzed (or failed) go back to 'queued', as
+    the channel run queues them again; without --incremental that is every video
+    of the channel. Videos already waiting or running are left as they are.
+    """
     print(f"🔄 Creating video placeholders in database...")
     
     session = db.get_session()
@@ -697,39 +882,44 @@ def create_queued_video_placeholders(video_list, project_name):
                     title=video_title,
                     webpage_url=f"https://www.youtube.com/watch?v={video_id}",
                     thumbnail=f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",
+                    channel_url=channel_key(channel_url) if channel_url else None,
                     processing_status='queued'
                 )
                 session.add(new_video)
                 created_count += 1
             else:
-                # Update existing video to 'queued' status
-                existing_video.processing_status = 'queued'
-                existing_video.processing_error = None
+                if existing_video.processing_status not in BUSY_STATUSES:
+                    # Analyzed before, it is queued again
+                    existing_video.processing_status = 'queued'
+                    existing_video.processing_error = None
+                if channel_url:
+                    existing_video.channel_url = channel_key(channel_url)
         
         session.commit()
         print(f"✅ Created/updated {created_count} video placeholders with 'queued' status")
+        return [video["id"] for video in video_list]
         
     except Exception as e:
         session.rollback()
         print(f"❌ Error creating video placeholders: {e}")
+        return []
     finally:
         session.close()
 
 def try_notify_server(project_name, video_count):
-    """Try to notify the server about new queue items"""
+    """Wake the server's queue dispatcher so the new items start right away"""
     try:
-        import requests
-        
-        # Try to ping the server to see if it's running
-        response = requests.get('http://localhost:1337/debug/processes', timeout=2)
+        response = get_http_session().post(f"{SERVER_URL}/api/queue/wake", timeout=2)
         
-        if response.status_code == 200:
-            print(f"✅ Server is running - queue will be processed automatically")
+        if response.status_code == 202:
+            print(f"✅ Server is running - queue processing started")
         else:
+            logger.debug(f"Queue wake at {SERVER_URL} answered {response.status_code}: {response.text[:200]}")
             print(f"⚠️ Server responded with status {response.status_code}")
             
-    except requests.exceptions.RequestException:
-        print(f"⚠️ Could not connect to server at localhost:1337")
+    except OSError as e:  # requests' RequestException is an IOError
+        logger.debug(f"Queue wake at {SERVER_URL} failed: {e}")
+        print(f"⚠️ Could not connect to server at {SERVER_URL}")
         print(f"💡 Make sure to start the server: python server.py")
         print(f"   The queue will be processed when the server starts")
 
@@ -779,7 +969,7 @@ def highlight_text(text, keywords):
         text = pattern.sub(lambda m: '<span style="background-color: yellow;">{}</span>'.format(m.group(0)), text)
     return text
 
-def analyze_file(file_path, keywords, no_moderation=False):
+def analyze_file(file_path, keywords, no_moderation=False, project_name=None):
     print(f"🔍 Analyzing file: {file_path}")
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.readlines()
@@ -794,10 +984,14 @@ def analyze_file(file_path, keywords, no_moderation=False):
 
     print(f"   Processing {len(content)} lines from {filename} (video_id: {video_id})")
 
+    checkpoint = None
     if no_moderation:
         print(f"   ⚠️ No moderation mode: Saving all subtitles without AI analysis")
+    else:
+        checkpoint = Checkpoint(project_name, video_id, 'subtitle')
 
     for i, line in enumerate(content):
+        progress.advance(video=video_id)
         line_clean = line.strip()
         if not line_clean:
             continue
@@ -828,11 +1022,16 @@ def analyze_file(file_path, keywords, no_moderation=False):
                 "YouTubeURL": youtube_url
             })
         else:
-            # Moderate the text with AI
-            moderation_response = moderate_text(line_clean)
-            moderation_result = moderation_response["results"][0]
-            flagged = moderation_result.get("flagged", False)
-            categories = [cat for cat, val in moderation_result.get("categories", {}).items() if val]
+            # Moderate the text with AI (or reuse the result saved by an earlier attempt)
+            text_key = hashlib.md5(line_clean.encode('utf-8')).hexdigest()
+            saved = checkpoint.get(text_key)
+            if saved is not None:
+                flagged, categories, scores = saved["flagged"], saved["categories"], saved["scores"]
+            else:
+                moderation_response = moderate_text(line_clean)
+                flagged, categories, scores = subtitle_moderation(moderation_response)
+                if "error" not in moderation_response:
+                    checkpoint.add(text_key, {"flagged": flagged, "categories": categories, "scores": scores})
 
             # Add to ALL subtitles
             all_subtitles.append({
@@ -841,6 +1040,7 @@ def analyze_file(file_path, keywords, no_moderation=False):
                 "Texto": line_clean,
                 "IsFlagged": flagged,
                 "Categorías": ", ".join(categories) if flagged else "",
+                "CategoryScores": scores,
                 "YouTubeURL": youtube_url
             })
 
@@ -855,101 +1055,46 @@ def analyze_file(file_path, keywords, no_moderation=False):
                     "Timestamp": timestamp,
                     "Texto": line_clean,
                     "Categorías": ", ".join(categories),
+                    "CategoryScores": scores,
                     "YouTubeURL": youtube_url
                 })
 
+    if checkpoint:
+        checkpoint.flush()
+
     print(f"   📝 Found {len(all_subtitles)} total subtitles in {filename}")
     if not no_moderation:
         print(f"   🚩 Found {len(flagged_results)} flagged items in {filename}")
     return all_subtitles, flagged_results
 
-def extract_video_metadata(video_id):
-    info_file = f"{video_id}.info.json"
-    print(f"🔍 Looking for metadata file: {info_file}")
-    
-    if not os.path.exists(info_file):
-        print(f"❌ Metadata file not found: {info_file}")
-        return None
-    
-    print(f"✅ Found metadata file: {info_file}")
-    
+def load_videos_metadata(video_ids):
+    """Metadata of the videos from the shared metadata store, keyed by video id.
+
+    ``*.info.json`` files yt-dlp left in the cwd (comment downloads) are saved to
+    the store first, so those videos are not looked up again. The rest are read
+    from the store and only fetched when missing or stale.
+    """
+    session = db.get_session()
     try:
-        with open(info_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"❌ Error reading metadata file: {e}")
-        return None
-    
-    print(f"📊 Video title: {data.get('title', 'Unknown')}")
-    
-    # Format duration
-    duration = data.get("duration")
-    if duration:
-        hours, remainder = divmod(duration, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        if hours:
-            duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-        else:
-            duration_str = f"{minutes}:{seconds:02d}"
-    else:
-        duration_str = None
-    
-    # Format upload date
-    upload_date = data.get("upload_date")
-    if upload_date and len(upload_date) == 8:
-        upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-    
-    # Format view count
-    view_count = data.get("view_count")
-    if view_count:
-        if view_count >= 1000000:
-            view_count = f"{view_count/1000000:.1f}M"
-        elif view_count >= 1000:
-            view_count = f"{view_count/1000:.1f}K"
-        else:
-            view_count = str(view_count)
-    
-    # Format like count
-    like_count = data.get("like_count")
-    if like_count:
-        if like_count >= 1000000:
-            like_count = f"{like_count/1000000:.1f}M"
-        elif like_count >= 1000:
-            like_count = f"{like_count/1000:.1f}K"
-        else:
-            like_count = str(like_count)
-    
-    # Format comment count
-    comment_count = data.get("comment_count")
-    if comment_count:
-        if comment_count >= 1000000:
-            comment_count = f"{comment_count/1000000:.1f}M"
-        elif comment_count >= 1000:
-            comment_count = f"{comment_count/1000:.1f}K"
+        for video_id in video_ids:
+            info_file = f"{video_id}.info.json"
+            if os.path.exists(info_file):
+                try:
+                    with open(info_file, "r", encoding="utf-8") as f:
+                        store_info(session, video_id, json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"❌ Error reading metadata file {info_file}: {e}")
+        session.commit()
+
+        metadata = get_metadata(session, video_ids)
+    finally:
+        session.close()
+
+    for video_id in video_ids:
+        if video_id in metadata:
+            print(f"📊 Metadata for {video_id}: {metadata[video_id]['title']}")
         else:
-            comment_count = str(comment_count)
-    
-    metadata = {
-        "id": video_id,
-        "title": data.get("title", "Untitled Video"),
-        "uploader": data.get("uploader") or data.get("channel"),
-        "uploader_avatar": data.get("uploader_avatar_url") or data.get("channel_avatar_url"),
-        "upload_date": upload_date,
-        "retrieval_date": datetime.now().strftime("%Y-%m-%d"),
-        "duration": duration_str,
-        "view_count": view_count,
-        "like_count": like_count,
-        "comment_count": comment_count,
-        "thumbnail": data.get("thumbnail") or f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-        "webpage_url": data.get("webpage_url") or f"https://www.youtube.com/watch?v={video_id}",
-        "quality": data.get("format_note") or data.get("resolution"),
-        "has_captions": bool(data.get("subtitles") or data.get("automatic_captions")),
-        "is_live": data.get("is_live", False),
-        "flagged_subtitles": 0,
-        "flagged_comments": 0
-    }
-    
-    print(f"✅ Successfully extracted metadata for: {video_id}")
+            print(f"❌ No metadata found for video: {video_id}")
     return metadata
 
 def cleanup_temporary_files(video_ids, keep_info_json=True):
@@ -1024,14 +1169,70 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
 
     print(f"🔍 Found {len(s30_files)} .s30 files to analyze")
 
+    total_lines = 0
+    for file in s30_files:
+        with open(file, 'r', encoding='utf-8') as f:
+            total_lines += sum(1 for _ in f)
+    progress.stage('moderation', total=total_lines)
+
     for file in s30_files:
-        file_all_subs, file_flagged_subs = analyze_file(file, keywords, no_moderation=no_moderation)
+        file_all_subs, file_flagged_subs = analyze_file(file, keywords, no_moderation=no_moderation, project_name=project_name)
         all_subtitles.extend(file_all_subs)
         subtitle_results.extend(file_flagged_subs)
     
     if comment_results is None:
         comment_results = []
     
+    progress.stage('saving')
+
+    all_video_ids = set()
+
+    # Extract video IDs from ALL subtitles (including non-flagged ones)
+    for item in all_subtitles:
+        video_id = item["Filename"].replace('.s30', '').split('.')[0]
+        all_video_ids.add(video_id)
+
+    # Also extract from flagged results and comments
+    for item in subtitle_results + comment_results:
+        video_id = item["Filename"].replace('.s30', '').split('.')[0]
+        all_video_ids.add(video_id)
+
+    # Metadata of every video in one batch, before the results transaction starts
+    videos_metadata = load_videos_metadata(sorted(all_video_ids)) if all_video_ids else {}
+
+    save_analysis_results(project_name, keywords, all_video_ids, all_subtitles, subtitle_results,
+                          comment_results, videos_metadata)
+
+    fetch_thumbnails(all_video_ids, videos_metadata, comment_results)
+    
+    # Clean up temporary files after saving to database
+    cleanup_temporary_files(list(all_video_ids), keep_info_json=True)
+    
+    notify_data_updated(project_name)
+    
+    print(f"\n✅ Analysis complete! View results at: {SERVER_URL}/project/{project_name}/videos")
+
+def notify_data_updated(project_name):
+    """Tell the connected clients that the results of a project changed"""
+    try:
+        import socketio
+        sio = socketio.Client()
+        sio.connect(SERVER_URL)
+        sio.emit('data_updated', {
+            'project': project_name,
+            'type': 'analysis_complete'
+        })
+        sio.disconnect()
+    except Exception as e:
+        print(f"⚠️ Could not notify WebSocket server about updates: {e}")
+
+def save_analysis_results(project_name, keywords, all_video_ids, all_subtitles, subtitle_results,
+                          comment_results, videos_metadata):
+    """Save analyzed subtitles and flags in one transaction and mark their videos completed.
+
+    Rows already stored for a video are not added twice. Videos created by this
+    call cannot have any yet, so their rows skip that lookup.
+    """
     # Get database session
     session = db.get_session()
     
@@ -1045,17 +1246,7 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
         
         # Process videos first
         video_map = {}  # video_id -> Video object
-        all_video_ids = set()
-
-        # Extract video IDs from ALL subtitles (including non-flagged ones)
-        for item in all_subtitles:
-            video_id = item["Filename"].replace('.s30', '').split('.')[0]
-            all_video_ids.add(video_id)
-
-        # Also extract from flagged results and comments
-        for item in subtitle_results + comment_results:
-            video_id = item["Filename"].replace('.s30', '').split('.')[0]
-            all_video_ids.add(video_id)
+        new_videos = set()
         
         # Create or update videos and mark them as completed
         for video_id in all_video_ids:
@@ -1063,10 +1254,9 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                 project_id=project.id,
                 video_id=video_id
             ).first()
+            metadata = videos_metadata.get(video_id)
             
             if not video:
-                # Extract metadata if available
-                metadata = extract_video_metadata(video_id)
                 if metadata:
                     video = Video(
                         project_id=project.id,
@@ -1097,16 +1287,20 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                     )
                 session.add(video)
                 session.flush()
+                new_videos.add(video_id)
             else:
                 # Update existing video to completed
                 video.processing_status = 'completed'
                 video.processing_completed_at = datetime.utcnow()
                 video.processing_error = None
+                
+                # Placeholders only know the title, fill in what they miss
+                if metadata:
+                    for field in METADATA_COLUMNS:
+                        if field != 'thumbnail' and metadata.get(field) and not getattr(video, field):
+                            setattr(video, field, metadata[field])
             
             video_map[video_id] = video
-            
-            # Ensure thumbnail
-            ensure_thumbnail(video_id)
 
         # Save ALL subtitles to the new Subtitle table
         print(f"💾 Saving {len(all_subtitles)} total subtitles to database...")
@@ -1115,8 +1309,8 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
             video = video_map.get(video_id)
 
             if video:
-                # Check if already exists
-                existing = session.query(Subtitle).filter_by(
+                # Check if already exists (videos created above have no rows yet)
+                existing = video_id not in new_videos and session.query(Subtitle).filter_by(
                     project_id=project.id,
                     video_id=video.id,
                     timestamp=item.get("Timestamp"),
@@ -1131,7 +1325,9 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                         text=item["Texto"],
                         youtube_url=item.get("YouTubeURL", ""),
                         is_flagged=item.get("IsFlagged", False),
-                        categories=item.get("Categorías", "")
+                        categories=item.get("Categorías", ""),
+                        category_mask=category_mask(session, item.get("Categorías", "")),
+                        category_scores=item.get("CategoryScores")
                     )
                     session.add(subtitle)
 
@@ -1142,8 +1338,8 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
             video = video_map.get(video_id)
 
             if video:
-                # Check if already exists
-                existing = session.query(SubtitleFlag).filter_by(
+                # Check if already exists (videos created above have no rows yet)
+                existing = video_id not in new_videos and session.query(SubtitleFlag).filter_by(
                     project_id=project.id,
                     video_id=video.id,
                     timestamp=item.get("Timestamp"),
@@ -1157,6 +1353,8 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                         timestamp=item.get("Timestamp"),
                         text=highlight_text(item["Texto"], keywords),
                         categories=item.get("Categorías", ""),
+                        category_mask=category_mask(session, item.get("Categorías", "")),
+                        category_scores=item.get("CategoryScores"),
                         youtube_url=item.get("YouTubeURL", "")
                     )
                     session.add(subtitle_flag)
@@ -1167,8 +1365,8 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
             video = video_map.get(video_id)
             
             if video:
-                # Check if already exists
-                existing = session.query(CommentFlag).filter_by(
+                # Check if already exists (videos created above have no rows yet)
+                existing = video_id not in new_videos and session.query(CommentFlag).filter_by(
                     project_id=project.id,
                     video_id=video.id,
                     comment_id=item.get("CommentID", ""),
@@ -1184,11 +1382,14 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                         author_thumbnail=item.get("AuthorThumbnail", ""),
                         text=highlight_text(item["Texto"], keywords),
                         categories=item.get("Categorías", ""),
+                        category_mask=category_mask(session, item.get("Categorías", "")),
+                        category_scores=item.get("CategoryScores"),
                         youtube_url=item.get("YouTubeURL", "")
                     )
                     session.add(comment_flag)
         
-        # Update video counts
+        # Update video counts (the session does not autoflush)
+        session.flush()
         for video in video_map.values():
             video.flagged_subtitles = session.query(SubtitleFlag).filter_by(
                 project_id=project.id,
@@ -1199,6 +1400,9 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
                 video_id=video.id
             ).count()
         
+        # Results are saved, the checkpoints of these videos are no longer needed
+        clear_checkpoints(session, project_name, all_video_ids)
+        
         # Commit all changes
         session.commit()
 
@@ -1208,29 +1412,12 @@ def merge_analysis_results(keywords, project_name, comment_results=None, no_mode
         print(f"   - {len(comment_results)} comment flags")
         print(f"   - {len(video_map)} videos processed and marked as completed")
         
-        # Clean up temporary files after saving to database
-        cleanup_temporary_files(list(all_video_ids), keep_info_json=True)
-        
-        # Notify connected clients about the update
-        try:
-            sio = socketio.Client()
-            sio.connect('http://localhost:1337')
-            sio.emit('data_updated', {
-                'project': project_name,
-                'type': 'analysis_complete'
-            })
-            sio.disconnect()
-        except Exception as e:
-            print(f"⚠️ Could not notify WebSocket server about updates: {e}")
-        
     except Exception as e:
         session.rollback()
         print(f"❌ Error saving to database: {e}")
         raise
     finally:
         session.close()
-    
-    print(f"\n✅ Analysis complete! View results at: http://localhost:1337/project/{project_name}/videos")
 
 def convert_all_srt_files(threshold):
     srt_files = glob.glob("*.srt")
@@ -1239,6 +1426,7 @@ def convert_all_srt_files(threshold):
         return False
     
     print(f"🔄 Converting {len(srt_files)} SRT files...")
+    progress.stage('convert', total=len(srt_files))
     
     for srt_file in srt_files:
         print(f"Converting {srt_file}...")
@@ -1248,6 +1436,7 @@ def convert_all_srt_files(threshold):
         with open(out_file, "w", encoding="utf-8") as f:
             f.write(output_text)
         print(f"Converted file saved as {out_file}")
+        progress.advance()
     
     return True
 
@@ -1334,14 +1523,25 @@ def update_video_processing_status(project_name, video_urls, status, error_messa
     finally:
         session.close()
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description="HateHunter Tool with Queue Support for Channel Processing")
     group = parser.add_mutually_exclusive_group(required=False)
     group.add_argument("--channel", type=str, help="YouTube channel URL (adds all videos to processing queue)")
     group.add_argument("--video", type=str, nargs="+", help="YouTube video URL(s) to process")
+    group.add_argument("--worker", action="store_true",
+                       help="Run as a long-lived queue worker reading JSON jobs from stdin (used by server.py)")
+    group.add_argument("--import", dest="import_dirs", nargs="+", metavar="DIR",
+                       help="Import .srt files and yt-dlp .info.json/.comments.json dumps found in these directories into --project, without downloading anything")
+    group.add_argument("--export", choices=["ndjson", "csv", "parquet"],
+                       help="Export the videos, subtitles, flags and reports of --project in this format and exit")
     parser.add_argument("--language", type=str, default="en", help="Language for subtitles (default: en)")
     parser.add_argument("--openai-api-key", type=str, help="OpenAI API key for content moderation")
     parser.add_argument("--threshold", type=int, default=30, help="Time threshold (in seconds) for SRT grouping (default: 30)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Channel mode: only queue videos uploaded or changed since the last sync of the channel "
+                             "(without it every video of the channel is analyzed again)")
+    parser.add_argument("--rescan-comments", type=int, default=0, metavar="DAYS",
+                        help="Channel mode: also re-scan the comments of videos uploaded in the last DAYS days (default: 0 = off)")
     parser.add_argument("--min-duration", type=int, default=0, help="Minimum video duration in minutes. Skip videos shorter than this (default: 0 = analyze all)")
     parser.add_argument("--skip-convert", action="store_true", help="Skip converting SRT files")
     parser.add_argument("--skip-analyze", action="store_true", help="Skip analyzing converted files")
@@ -1358,9 +1558,471 @@ def main():
                         help="Keep JSON files after processing (default: clean up)")
     parser.add_argument("--no-moderation", action="store_true",
                         help="Save all subtitles without AI moderation (no hate speech detection)")
+    parser.add_argument("--workdir", type=str,
+                        help="Directory for temporary files (SRT, JSON). Needed when several jobs run at once")
+    parser.add_argument("--output", type=str,
+                        help="Export mode: directory to write the files to (default: exports/<project>)")
+    parser.add_argument("--tables", type=lambda value: [t.strip() for t in value.split(",") if t.strip()],
+                        help="Export mode: comma-separated tables to export (default: all)")
+    parser.add_argument("--events-fd", type=int,
+                        help="File descriptor to write JSON progress events to, one per line (used by server.py)")
+    return parser
+
+def moderation_stats():
+    """Cumulative (api_calls, cache_hits) of the moderation manager, for progress events"""
+    if api_manager is None:
+        return 0, 0
+    return api_manager.api_calls, api_manager.cache_hits
+
+# OpenAI clients by API key, reused across worker jobs
+_openai_clients = {}
+
+def get_moderation_client(args, interactive=True):
+    """Return the OpenAI client for this run, or None if no moderation is needed"""
+    if (args.skip_analyze or args.no_moderation) and not args.comments:
+        # No API key needed for no-moderation mode
+        print("⚠️ No moderation mode: Skipping OpenAI API configuration")
+        return None
+
+    api_key = os.environ.get("OPENAI_API_KEY") or args.openai_api_key
+    if not api_key:
+        if not interactive:
+            raise ValueError("No OpenAI API key: set OPENAI_API_KEY or pass --openai-api-key")
+        api_key = input("Please enter your OpenAI API key: ")
+
+    global moderation_api_key
+    moderation_api_key = api_key
+    if api_key not in _openai_clients:
+        from openai import OpenAI  # Slow to import, only loaded when moderating
+        _openai_clients[api_key] = OpenAI(api_key=api_key)
+    return _openai_clients[api_key]
+
+def process_videos(args, client):
+    """Download, convert and analyze the videos given with --video"""
+    video_list = []
+    comment_results = []
+
+    check_videos_already_processed(args.project, args.video)
+
+    # Filter videos by duration if min_duration is specified
+    videos_to_process = []
+    if args.min_duration > 0:
+        print(f"\n⏱️  Checking video durations (minimum: {args.min_duration} minutes)...")
+        progress.stage('metadata', total=len(args.video))
+        for video_url in args.video:
+            meets_requirement, duration = check_video_duration(video_url, args.min_duration)
+            progress.advance(video=extract_video_id(video_url))
+            if meets_requirement:
+                videos_to_process.append(video_url)
+            else:
+                print(f"⏭️  Skipped: {video_url}")
+
+        if not videos_to_process:
+            print(f"\n⚠️  All videos were filtered out (shorter than {args.min_duration} minutes)")
+            print("✅ Nothing to process")
+            return
+
+        print(f"\n✅ {len(videos_to_process)}/{len(args.video)} videos meet duration requirement")
+    else:
+        videos_to_process = args.video
+
+    video_list = videos_to_process
+
+    # Mark videos as processing at start
+    print("🔄 Marking videos as processing...")
+    update_video_processing_status(args.project, videos_to_process, 'processing')
+
+    try:
+        # Download subtitles if not skipped
+        if not args.skip_convert:
+            progress.stage('download', total=len(videos_to_process))
+            for video_url in videos_to_process:
+                download_subtitles_for_video(video_url, args.language)
+                progress.advance(video=extract_video_id(video_url))
+        
+        # Process comments if requested
+        if args.comments:
+            print("\n📝 Processing comments...")
+            comment_results = analyze_comments(video_list, args.keywords, client, args.project)
+        
+        # Convert SRT files if not skipped
+        if not args.skip_convert:
+            srt_found = convert_all_srt_files(args.threshold)
+            if not srt_found and not args.comments:
+                print("⚠️ No subtitles found to process and --comments not specified.")
+                print("The videos might not have subtitles in the requested language.")
+                print("💡 Try:")
+                print("   - Using --update-ytdlp to update yt-dlp")
+                print("   - Using --language en for English subtitles")
+                print("   - Using --comments to process comments instead")
+                print("   - Check if the videos are publicly accessible")
+                
+                # Mark as completed even if no subtitles
+                print("🔄 Marking videos as completed (no subtitles found)...")
+                update_video_processing_status(args.project, args.video, 'completed')
+        
+        # Analyze results
+        if not args.skip_analyze:
+            s30_files = glob.glob("*.s30")
+            if s30_files or args.comments:
+                merge_analysis_results(args.keywords, args.project, comment_results, no_moderation=args.no_moderation)
+                if not s30_files:
+                    # A comment-only run with nothing flagged saves no rows, the videos are still done
+                    update_video_processing_status(args.project, args.video, 'completed')
+            else:
+                print("⚠️ No subtitle files to analyze. Use --comments to process comments only.")
+                # Mark as completed if no analysis
+                print("🔄 Marking videos as completed (no analysis needed)...")
+                update_video_processing_status(args.project, args.video, 'completed')
+
+                # Clean up temporary files even if no analysis
+                video_ids = [extract_video_id(url) for url in args.video]
+                cleanup_temporary_files(video_ids, keep_info_json=not args.keep_json)
+        elif args.comments and comment_results:
+            merge_analysis_results(args.keywords, args.project, comment_results, no_moderation=args.no_moderation)
+        else:
+            # Mark as completed if analysis was skipped
+            print("🔄 Marking videos as completed (analysis skipped)...")
+            update_video_processing_status(args.project, args.video, 'completed')
+            
+            # Clean up temporary files
+            video_ids = [extract_video_id(url) for url in args.video]
+            cleanup_temporary_files(video_ids, keep_info_json=not args.keep_json)
+            
+    except Exception as e:
+        print(f"❌ Error during processing: {e}")
+        update_video_processing_status(args.project, args.video, 'failed', str(e))
+        raise
+
+def run_worker(parser):
+    """Serve analysis jobs until stdin closes.
+
+    Each stdin line is a JSON job ``{"job_id": ..., "args": [...]}`` with the same
+    arguments as the command line. Progress events (``"type": "progress"``) are
+    written back while the job runs, followed by one ``"type": "result"`` line.
+    The process keeps its imports, database engine, HTTP pool, OpenAI clients and
+    moderation cache between jobs. Regular output goes to stderr.
+    """
+    global api_manager
+    # yt-dlp and other subprocesses inherit fd 1, so the control channel moves to
+    # a private copy of it and fd 1 is pointed to stderr like sys.stdout
+    sys.stdout.flush()
+    control = os.fdopen(os.dup(1), 'w', buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    base_dir = os.getcwd()
+    ytdlp_updated = False
+
+    print(f"👷 Worker {os.getpid()} ready")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        result = {'status': 'completed', 'error': None}
+        try:
+            job = json.loads(line)
+            job_id = job.get('job_id')
+            args = parser.parse_args(job.get('args', []))
+            if not args.video:
+                raise ValueError("Worker jobs need --video")
+
+            if args.workdir:
+                os.makedirs(args.workdir, exist_ok=True)
+                os.chdir(args.workdir)
+
+            if args.update_ytdlp and not ytdlp_updated:
+                ytdlp_updated = update_ytdlp()
+
+            if api_manager is None:
+                api_manager = ModerationAPIManager(max_requests_per_second=args.rate_limit)
+            else:
+                api_manager.set_rate_limit(args.rate_limit)
+
+            client = get_moderation_client(args, interactive=False)
+            progress.attach(control, job_id=job_id, stats=moderation_stats)
+            process_videos(args, client)
+        except SystemExit as e:
+            # argparse errors end up here
+            if e.code not in (0, None):
+                # Retrying would fail the same way
+                result = {'status': 'failed', 'error': f'Invalid job arguments (exit code {e.code})', 'retryable': False}
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            result = {'status': 'failed', 'error': str(e)}
+        finally:
+            # The job is only done once its images are stored
+            if _thumbnail_fetcher is not None:
+                _thumbnail_fetcher.wait()
+            os.chdir(base_dir)
+            sys.stdout.flush()
+
+        progress.finish(result['status'], result['error'])
+        progress.detach()
+        control.write(json.dumps({'type': 'result', 'job_id': job_id, **result}) + '\n')
+        control.flush()
+
+def export_results(args):
+    """Write the tables of a project to files, one per table"""
+    tables = args.tables or list(EXPORT_TABLES)
+    unknown = [table for table in tables if table not in EXPORT_TABLES]
+    if unknown:
+        print(f"❌ Unknown tables: {', '.join(unknown)} (available: {', '.join(EXPORT_TABLES)})")
+        sys.exit(1)
+    if args.export == "parquet" and not parquet_available():
+        print("❌ Parquet export needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+    
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=args.project).first()
+        if not project:
+            print(f"❌ Project not found: {args.project}")
+            sys.exit(1)
+        output_dir = args.output or os.path.join("exports", args.project)
+        start = time.time()
+        for path in export_project(session, project.id, args.export, output_dir, tables):
+            print(f"💾 {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+        print(f"✅ Exported {len(tables)} tables of {args.project} in {time.time() - start:.1f}s")
+    finally:
+        session.close()
 
+def find_archive_files(directories):
+    """Files of an archive grouped by video id: ``{'srt': [paths], 'info': path, 'comments': path}``.
+
+    The directories and their subdirectories are walked in parallel.
+    """
+    def walk(root, recursive):
+        found = []
+        for current, subdirs, files in os.walk(root):
+            found.extend(os.path.join(current, name) for name in files
+                         if name.endswith((".srt", ".info.json", ".comments.json")))
+            if not recursive:
+                break
+        return found
+
+    roots = []
+    for directory in directories:
+        if not os.path.isdir(directory):
+            print(f"⚠️ Not a directory: {directory}")
+            continue
+        roots.append((directory, False))
+        roots.extend((entry.path, True) for entry in os.scandir(directory) if entry.is_dir())
+
+    with ThreadPoolExecutor(max_workers=min(max(len(roots), 1), 8)) as pool:
+        paths = [path for found in pool.map(lambda root: walk(*root), roots) for path in found]
+
+    videos = {}
+    for path in sorted(paths):
+        name = os.path.basename(path)
+        entry = videos.setdefault(name.split(".")[0], {"srt": [], "info": None, "comments": None})
+        if name.endswith(".srt"):
+            entry["srt"].append(path)
+        elif name.endswith(".info.json"):
+            entry["info"] = path
+        else:
+            entry["comments"] = path
+    return videos
+
+def pick_subtitle_file(paths, language):
+    """The .srt of a video in ``language`` (VIDEO_ID.<lang>.srt), else the first one"""
+    for path in paths:
+        parts = os.path.basename(path).split(".")
+        if len(parts) > 2 and parts[1].split("-")[0] == language:
+            return path
+    return paths[0] if paths else None
+
+def parse_archive(job):
+    """Read the files of one video (runs in a worker process).
+
+    Returns the merged subtitle groups from ``process_srt``, the metadata and the
+    comments of the dump, or the error that stopped it.
+    """
+    video_id, srt_path, info_path, comments_path, threshold = job
+    parsed = {"id": video_id, "groups": [], "info": None, "comments": [], "error": None}
+    try:
+        if srt_path:
+            with open(srt_path, "r", encoding="utf-8", errors="replace") as f:
+                parsed["groups"] = [(timestamp, text) for timestamp, text in process_srt(f.read(), threshold) if text.strip()]
+
+        comments = None
+        if info_path:
+            with open(info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            comments = info.pop("comments", None)
+            # The metadata store only needs to know whether there are captions
+            info["subtitles"] = bool(info.get("subtitles"))
+            info["automatic_captions"] = bool(info.get("automatic_captions"))
+            for key in ("formats", "requested_formats", "thumbnails", "heatmap"):
+                info.pop(key, None)
+            parsed["info"] = info
+        if not comments and comments_path:
+            with open(comments_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            comments = data if isinstance(data, list) else data.get("comments")
+        parsed["comments"] = [
+            {key: comment.get(key, "") for key in ("id", "text", "author", "author_thumbnail")}
+            for comment in comments or [] if comment.get("text")
+        ]
+    except (OSError, ValueError, AttributeError) as e:
+        parsed["error"] = str(e)
+    return parsed
+
+def import_chunk(parsed_videos, args, known_comment_ids):
+    """Moderate and save one chunk of parsed videos; returns (subtitles, flagged subtitles, flagged comments)"""
+    keywords = args.keywords
+    video_ids = [parsed["id"] for parsed in parsed_videos]
+
+    session = db.get_session()
+    try:
+        for parsed in parsed_videos:
+            if parsed["info"]:
+                store_info(session, parsed["id"], parsed["info"])
+        session.commit()
+        # Only what the dumps brought, nothing is looked up on YouTube
+        videos_metadata = get_metadata(session, video_ids, fetch=False)
+    finally:
+        session.close()
+
+    # Subtitle groups of the whole chunk go through the batched moderation together
+    lines = [(parsed["id"], timestamp, text) for parsed in parsed_videos for timestamp, text in parsed["groups"]]
+    if args.no_moderation:
+        moderations = [None] * len(lines)
+    else:
+        moderations = api_manager.moderate_texts([text for _, _, text in lines])
+
+    all_subtitles, subtitle_results = [], []
+    for (video_id, timestamp, text), moderation_response in zip(lines, moderations):
+        item = {
+            "Filename": f"{video_id}.s30",
+            "Timestamp": float(timestamp),
+            "Texto": text,
+            "IsFlagged": False,
+            "Categorías": "",
+            "YouTubeURL": f"https://www.youtube.com/watch?v={video_id}&t={int(timestamp)}"
+        }
+        if moderation_response is not None:
+            flagged, categories, scores = subtitle_moderation(moderation_response)
+            item.update({"IsFlagged": flagged, "Categorías": ", ".join(categories) if flagged else "", "CategoryScores": scores})
+            if flagged and (not keywords or any(keyword.lower() in text.lower() for keyword in keywords)):
+                subtitle_results.append({key: item[key] for key in ("Filename", "Timestamp", "Texto", "Categorías", "CategoryScores", "YouTubeURL")})
+        all_subtitles.append(item)
+
+    comment_results = []
+    if args.comments:
+        comments = [
+            (parsed["id"], comment) for parsed in parsed_videos for comment in parsed["comments"]
+            if comment.get("id") not in known_comment_ids
+            and (not keywords or any(kw.lower() in comment["text"].lower() for kw in keywords))
+        ]
+        moderations = api_manager.moderate_texts([comment["text"] for _, comment in comments])
+        for (video_id, comment), moderation_response in zip(comments, moderations):
+            hate_categories, scores, _ = comment_moderation(moderation_response)
+            if hate_categories:
+                comment_results.append(comment_result(video_id, comment, hate_categories, scores))
+
+    save_analysis_results(args.project, keywords, set(video_ids), all_subtitles, subtitle_results,
+                          comment_results, videos_metadata)
+    return len(all_subtitles), len(subtitle_results), len(comment_results)
+
+def import_archives(args):
+    """Backfill a project from local .srt files and yt-dlp dumps, without any YouTube traffic.
+
+    Files are parsed in worker processes one chunk ahead of the moderation, so
+    parsing, the batched moderation calls and the database writes overlap.
+    Videos whose subtitles are already in the project keep them, and comments
+    already flagged are not moderated again.
+    """
+    global api_manager
+    start = time.time()
+    archive = find_archive_files(args.import_dirs)
+    print(f"📂 Found {len(archive)} videos in {', '.join(args.import_dirs)}")
+    if not archive:
+        return
+
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=args.project).first()
+        imported, known_comment_ids = set(), set()
+        if project:
+            imported = {video_id for video_id, in session.query(Video.video_id).filter(
+                Video.project_id == project.id,
+                session.query(Subtitle.id).filter(Subtitle.video_id == Video.id).exists()
+            )}
+            known_comment_ids = {comment_id for comment_id, in session.query(CommentFlag.comment_id).filter(
+                CommentFlag.project_id == project.id
+            )}
+    finally:
+        session.close()
+
+    jobs = []
+    for video_id, files in archive.items():
+        srt_path = None if video_id in imported else pick_subtitle_file(files["srt"], args.language)
+        if srt_path or files["info"] or (args.comments and files["comments"]):
+            jobs.append((video_id, srt_path, files["info"], files["comments"], args.threshold))
+    skipped = sum(1 for video_id in archive if video_id in imported)
+    if skipped:
+        print(f"⏭️  {skipped} videos already have their subtitles in {args.project}")
+    if not jobs:
+        print("✅ Nothing to import")
+        return
+
+    api_manager = ModerationAPIManager(max_requests_per_second=args.rate_limit)
+    get_moderation_client(args)
+
+    totals = [0, 0, 0]
+    failed = 0
+    chunks = [jobs[i:i + IMPORT_CHUNK_SIZE] for i in range(0, len(jobs), IMPORT_CHUNK_SIZE)]
+    with ProcessPoolExecutor() as pool:
+        pending = [pool.submit(parse_archive, job) for job in chunks[0]]
+        for index in range(len(chunks)):
+            parsed_videos = [future.result() for future in pending]
+            # Parse the next chunk while this one is moderated and saved
+            pending = [pool.submit(parse_archive, job) for job in chunks[index + 1]] if index + 1 < len(chunks) else []
+
+            for parsed in parsed_videos:
+                if parsed["error"]:
+                    failed += 1
+                    print(f"❌ Could not read the files of {parsed['id']}: {parsed['error']}")
+            parsed_videos = [parsed for parsed in parsed_videos if not parsed["error"]]
+            if parsed_videos:
+                for total_index, count in enumerate(import_chunk(parsed_videos, args, known_comment_ids)):
+                    totals[total_index] += count
+            print(f"📥 Imported {min((index + 1) * IMPORT_CHUNK_SIZE, len(jobs))}/{len(jobs)} videos")
+
+    if not args.no_moderation or args.comments:
+        api_manager.print_stats()
+    notify_data_updated(args.project)
+    print(f"\n✅ Imported {len(jobs) - failed} videos into {args.project} in {time.time() - start:.1f}s")
+    print(f"   - {totals[0]} subtitles, {totals[1]} flagged subtitles, {totals[2]} flagged comments")
+    if failed:
+        print(f"   - {failed} videos could not be read")
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
+    if args.worker:
+        run_worker(parser)
+        return
+    
+    if args.export:
+        export_results(args)
+        return
+    
+    if args.import_dirs:
+        import_archives(args)
+        return
+    
+    if args.events_fd is not None:
+        progress.attach(os.fdopen(args.events_fd, 'w', buffering=1), stats=moderation_stats)
+    
+    # Each queue worker gets its own directory, so the *.srt/*.s30 globs never see another job's files
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        os.chdir(args.workdir)
+    
     # Update yt-dlp if requested
     if args.update_ytdlp:
         if not update_ytdlp():
@@ -1384,7 +2046,7 @@ def main():
             add_channel_videos_to_queue(args.channel, args)
             print(f"\n🎉 Channel processing setup complete!")
             print(f"🚀 All videos have been added to the processing queue")
-            print(f"🌐 Monitor progress at: http://localhost:1337/project/{args.project}/videos")
+            print(f"🌐 Monitor progress at: {SERVER_URL}/project/{args.project}/videos")
             return
             
         except Exception as e:
@@ -1399,114 +2061,20 @@ def main():
         print(f"🚀 API Manager configured: max {args.rate_limit} requests/second")
         
         # Configure OpenAI API (only if we need moderation)
-        # Skip API configuration if using --no-moderation (unless analyzing comments)
-        if (not args.skip_analyze and not args.no_moderation) or args.comments:
-            env_key = os.environ.get("OPENAI_API_KEY")
-            if env_key:
-                openai.api_key = env_key
-                client = OpenAI(api_key=env_key)
-            elif args.openai_api_key:
-                openai.api_key = args.openai_api_key
-                client = OpenAI(api_key=args.openai_api_key)
-            else:
-                api_key_input = input("Please enter your OpenAI API key: ")
-                openai.api_key = api_key_input
-                client = OpenAI(api_key=api_key_input)
-        else:
-            # No API key needed for no-moderation mode
-            client = None
-            print("⚠️ No moderation mode: Skipping OpenAI API configuration")
-
-        video_list = []
-        comment_results = []
-
-        check_videos_already_processed(args.project, args.video)
-
-        # Filter videos by duration if min_duration is specified
-        videos_to_process = []
-        if args.min_duration > 0:
-            print(f"\n⏱️  Checking video durations (minimum: {args.min_duration} minutes)...")
-            for video_url in args.video:
-                meets_requirement, duration = check_video_duration(video_url, args.min_duration)
-                if meets_requirement:
-                    videos_to_process.append(video_url)
-                else:
-                    print(f"⏭️  Skipped: {video_url}")
-
-            if not videos_to_process:
-                print(f"\n⚠️  All videos were filtered out (shorter than {args.min_duration} minutes)")
-                print("✅ Nothing to process")
-                sys.exit(0)
-
-            print(f"\n✅ {len(videos_to_process)}/{len(args.video)} videos meet duration requirement")
-        else:
-            videos_to_process = args.video
-
-        video_list = videos_to_process
-
-        # Mark videos as processing at start
-        print("🔄 Marking videos as processing...")
-        update_video_processing_status(args.project, videos_to_process, 'processing')
-
+        client = get_moderation_client(args)
         try:
-            # Download subtitles if not skipped
-            if not args.skip_convert:
-                for video_url in videos_to_process:
-                    download_subtitles_for_video(video_url, args.language)
-            
-            # Process comments if requested
-            if args.comments:
-                print("\n📝 Processing comments...")
-                comment_results = analyze_comments(video_list, args.keywords, client)
-            
-            # Convert SRT files if not skipped
-            if not args.skip_convert:
-                srt_found = convert_all_srt_files(args.threshold)
-                if not srt_found and not args.comments:
-                    print("⚠️ No subtitles found to process and --comments not specified.")
-                    print("The videos might not have subtitles in the requested language.")
-                    print("💡 Try:")
-                    print("   - Using --update-ytdlp to update yt-dlp")
-                    print("   - Using --language en for English subtitles")
-                    print("   - Using --comments to process comments instead")
-                    print("   - Check if the videos are publicly accessible")
-                    
-                    # Mark as completed even if no subtitles
-                    print("🔄 Marking videos as completed (no subtitles found)...")
-                    update_video_processing_status(args.project, args.video, 'completed')
-            
-            # Analyze results
-            if not args.skip_analyze:
-                s30_files = glob.glob("*.s30")
-                if s30_files or args.comments:
-                    merge_analysis_results(args.keywords, args.project, comment_results, no_moderation=args.no_moderation)
-                else:
-                    print("⚠️ No subtitle files to analyze. Use --comments to process comments only.")
-                    # Mark as completed if no analysis
-                    print("🔄 Marking videos as completed (no analysis needed)...")
-                    update_video_processing_status(args.project, args.video, 'completed')
-
-                    # Clean up temporary files even if no analysis
-                    video_ids = [extract_video_id(url) for url in args.video]
-                    cleanup_temporary_files(video_ids, keep_info_json=not args.keep_json)
-            elif args.comments and comment_results:
-                merge_analysis_results(args.keywords, args.project, comment_results, no_moderation=args.no_moderation)
-            else:
-                # Mark as completed if analysis was skipped
-                print("🔄 Marking videos as completed (analysis skipped)...")
-                update_video_processing_status(args.project, args.video, 'completed')
-                
-                # Clean up temporary files
-                video_ids = [extract_video_id(url) for url in args.video]
-                cleanup_temporary_files(video_ids, keep_info_json=not args.keep_json)
-                
+            process_videos(args, client)
         except Exception as e:
-            print(f"❌ Error during processing: {e}")
-            update_video_processing_status(args.project, args.video, 'failed', str(e))
+            progress.finish('failed', str(e))
             raise
+        progress.finish()
+    
+    # Let the thumbnail downloads finish before exiting
+    if _thumbnail_fetcher is not None:
+        _thumbnail_fetcher.shutdown()
     
     print("\n🎯 Processing complete!")
-    print(f"📊 View results at: http://localhost:1337/project/{args.project}/videos")
+    print(f"📊 View results at: {SERVER_URL}/project/{args.project}/videos")
     print("💡 Make sure the web server is running: python server.py")
 
 if __name__ == "__main__":
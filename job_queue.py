@@ -0,0 +1,509 @@
+import heapq
+import itertools
+import logging
+import math
+import os
+import shlex
+import socket
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+from sqlalchemy import update, or_, func
+from models import Project, Video, VideoQueue
+
+logger = logging.getLogger(__name__)
+
+# Legacy queue file written by older hatehunter.py versions
+LEGACY_QUEUE_FILE = "hatehunter.tmp"
+
+# A running job renews its lease well before this, an expired lease means the worker died
+LEASE_SECONDS = 300
+
+# A video with a job in one of these states is not queued again
+ACTIVE_STATUSES = ('queued', 'processing', 'paused')
+
+# A waiting job gains one priority level per AGING_SECONDS, up to the normal priority (0)
+AGING_SECONDS = 3600
+
+# Best queued job of a project, as compared by pick_fair
+QueueHead = namedtuple('QueueHead', 'id project_id priority')
+
+# Priority of expedited jobs, ahead of everything queued normally
+EXPEDITE_PRIORITY = 100
+
+# Jobs started within this window count as service a project received, for fair sharing
+FAIR_SHARE_WINDOW = timedelta(hours=1)
+
+# A failed job waits RETRY_BACKOFF, doubled on every further failure, before it runs again
+RETRY_BACKOFF = timedelta(minutes=1)
+
+def worker_id():
+    """Lease owner name for this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _owner_alive(owner):
+    """Whether a lease owner on this host still runs (unknown hosts count as alive)"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def parse_command(command):
+    """Split a legacy ``python3 hatehunter.py ...`` queue line into hatehunter arguments"""
+    parts = shlex.split(command)
+    for i, part in enumerate(parts):
+        if os.path.basename(part) == 'hatehunter.py':
+            return parts[i + 1:]
+    raise ValueError(f"Not a hatehunter command: {command}")
+
+def command_option(args, option):
+    """Value of ``--option`` in an argument list, or None"""
+    for i, part in enumerate(args):
+        if part == option and i + 1 < len(args):
+            return args[i + 1]
+    return None
+
+def enqueue(session, project, video, args, priority=0):
+    """Queue an analysis of ``video`` with the given hatehunter arguments.
+
+    A video with a job already queued or running is not queued twice; the existing
+    job is returned instead. The caller commits.
+    """
+    existing = session.query(VideoQueue).filter(
+        VideoQueue.video_id == video.id,
+        VideoQueue.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if existing:
+        return existing, False
+
+    now = datetime.utcnow()
+    job = VideoQueue(
+        project_id=project.id,
+        video_id=video.id,
+        status='queued',
+        analysis_params={'args': list(args)},
+        priority=priority,
+        created_at=now,
+        start_by=aging_deadline(now, priority)
+    )
+    session.add(job)
+    return job, True
+
+def aging_deadline(created_at, priority):
+    """When a job queued at ``created_at`` with ``priority`` reaches normal priority (its ``start_by``)"""
+    return created_at + timedelta(seconds=max(-(priority or 0), 0) * AGING_SECONDS)
+
+def effective_priority(priority, start_by, now=None):
+    """Priority of a queued job including aging.
+
+    Aging lifts low priority (negative) jobs one level per ``AGING_SECONDS`` of
+    waiting, but never above normal priority, so old work cannot jump ahead of
+    expedited jobs or take the fair share of other projects. Counted from the
+    stored ``start_by`` deadline, so the order of low priority jobs is the
+    order of that indexed column.
+    """
+    priority = priority or 0
+    if priority >= 0 or start_by is None:
+        return priority
+    remaining = (start_by - (now or datetime.utcnow())).total_seconds()
+    return min(-math.ceil(remaining / AGING_SECONDS), 0)
+
+def project_service(session):
+    """Jobs per project id running or started within the fair share window"""
+    cutoff = datetime.utcnow() - FAIR_SHARE_WINDOW
+    return dict(session.query(VideoQueue.project_id, func.count(VideoQueue.id)).filter(
+        or_(VideoQueue.status == 'processing', VideoQueue.started_at >= cutoff)
+    ).group_by(VideoQueue.project_id).all())
+
+def project_weights(session):
+    """Queue weight per project id"""
+    return dict(session.query(Project.id, Project.queue_weight).all())
+
+def pick_fair(heads, service, weights):
+    """Choose the next job among the best queued job of each project.
+
+    ``heads`` are ``(job_id, project_id, priority)`` tuples. The highest effective
+    priority wins; among equals, the project with the least recent service for its
+    weight, then the oldest job.
+    """
+    def key(head):
+        job_id, project_id, priority = head
+        weight = max(weights.get(project_id) or 1, 1)
+        return -priority, service.get(project_id, 0) / weight, job_id
+    return min(heads, key=key, default=None)
+
+def queue_heads(session, exclude_projects=()):
+    """Best queued job of each project, as ``QueueHead`` tuples.
+
+    Only two candidates per project are read, each with one seek on an index:
+    the highest priority normal job and the low priority job closest to its
+    aging deadline. The rest of the queue is never sorted.
+    """
+    now = datetime.utcnow()
+
+    def candidate(*criteria, order_by):
+        return session.query(VideoQueue.id).filter(
+            VideoQueue.status == 'queued',
+            VideoQueue.project_id == Project.id,
+            or_(VideoQueue.retry_after == None, VideoQueue.retry_after <= now),
+            *criteria
+        ).order_by(*order_by).limit(1).correlate(Project).scalar_subquery()
+
+    projects = session.query(
+        Project.id,
+        candidate(VideoQueue.priority >= 0, order_by=(VideoQueue.priority.desc(), VideoQueue.id)),
+        candidate(VideoQueue.priority < 0, order_by=(VideoQueue.start_by, VideoQueue.id))
+    )
+    if exclude_projects:
+        projects = projects.filter(Project.id.notin_(list(exclude_projects)))
+    job_ids = [job_id for _, normal, low in projects for job_id in (normal, low) if job_id is not None]
+    if not job_ids:
+        return []
+
+    heads = {}
+    for job_id, project_id, priority, start_by in session.query(
+        VideoQueue.id, VideoQueue.project_id, VideoQueue.priority, VideoQueue.start_by
+    ).filter(VideoQueue.id.in_(job_ids)):
+        head = QueueHead(job_id, project_id, effective_priority(priority, start_by, now))
+        best = heads.get(project_id)
+        if best is None or (-head.priority, head.id) < (-best.priority, best.id):
+            heads[project_id] = head
+    return list(heads.values())
+
+def claim_next(session, owner, lease_seconds=LEASE_SECONDS, exclude_projects=()):
+    """Atomically take the next queued job, or return None if the queue is empty.
+
+    The job is chosen by ``pick_fair`` over the head of each project's queue. The
+    claim is a compare-and-set UPDATE on the row status, so two workers (or two
+    server processes sharing the database) can never start the same job. Jobs of
+    ``exclude_projects`` (ids) are skipped, e.g. projects at their concurrency cap.
+    """
+    weights = project_weights(session)
+    while True:
+        candidate = pick_fair(
+            queue_heads(session, exclude_projects), project_service(session), weights
+        )
+        if candidate is None:
+            return None
+
+        now = datetime.utcnow()
+        result = session.execute(
+            update(VideoQueue).where(
+                VideoQueue.id == candidate.id,
+                VideoQueue.status == 'queued'
+            ).values(
+                status='processing',
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                started_at=now,
+                error_message=None
+            )
+        )
+        session.commit()
+        if result.rowcount == 1:
+            return session.get(VideoQueue, candidate.id)
+        # Another worker won the race for this row, try the next one
+
+def expedite(session, video, priority=EXPEDITE_PRIORITY):
+    """Raise the priority of the queued job of ``video``; returns the job or None"""
+    job = session.query(VideoQueue).filter(
+        VideoQueue.video_id == video.id,
+        VideoQueue.status == 'queued'
+    ).first()
+    if job:
+        job.priority = priority
+        job.start_by = aging_deadline(job.created_at or datetime.utcnow(), priority)
+        session.commit()
+    return job
+
+def average_job_seconds(session, sample=50):
+    """Mean run time of the last ``sample`` completed jobs, or None without history"""
+    rows = session.query(VideoQueue.started_at, VideoQueue.completed_at).filter(
+        VideoQueue.status == 'completed',
+        VideoQueue.started_at.isnot(None),
+        VideoQueue.completed_at.isnot(None)
+    ).order_by(VideoQueue.completed_at.desc()).limit(sample).all()
+    durations = [(completed - started).total_seconds() for started, completed in rows]
+    return sum(durations) / len(durations) if durations else None
+
+def queue_positions(session, max_workers, per_project_limit=0, job_seconds=None):
+    """Simulate the scheduler to place every queued job.
+
+    Returns ``{job_id: {'position': n, 'starts_in': seconds}}``. Positions are
+    global (1 = next to start). Start times assume every job takes
+    ``job_seconds``; they are None without an estimate or without workers. A job
+    backing off after a failure is not placed before its ``retry_after``, as
+    ``claim_next`` would not start it either.
+    """
+    now = datetime.utcnow()
+    queues = {}  # project id -> heap of (-effective priority, job id)
+    deferred = []  # (seconds until the backoff ends, project id, heap entry)
+    for job_id, project_id, priority, start_by, retry_after in session.query(
+        VideoQueue.id, VideoQueue.project_id, VideoQueue.priority, VideoQueue.start_by, VideoQueue.retry_after
+    ).filter(VideoQueue.status == 'queued'):
+        entry = (-effective_priority(priority, start_by, now), job_id)
+        if retry_after and retry_after > now:
+            deferred.append(((retry_after - now).total_seconds(), project_id, entry))
+        else:
+            queues.setdefault(project_id, []).append(entry)
+    for queue in queues.values():
+        heapq.heapify(queue)
+    deferred = deque(sorted(deferred))
+
+    service = project_service(session)
+    weights = project_weights(session)
+    timed = bool(job_seconds) and max_workers > 0
+    job_seconds = job_seconds or 0
+
+    # Worker slots as (free at, sequence, project of the job running there or None)
+    sequence = itertools.count()
+    slots = []
+    active = {}
+    for project_id, started_at in session.query(VideoQueue.project_id, VideoQueue.started_at).filter(
+        VideoQueue.status == 'processing'
+    ):
+        elapsed = (now - started_at).total_seconds() if started_at else 0
+        slots.append((max(job_seconds - elapsed, 0), next(sequence), project_id))
+        active[project_id] = active.get(project_id, 0) + 1
+    for _ in range(max(max_workers, 1) - len(slots)):
+        slots.append((0, next(sequence), None))
+    heapq.heapify(slots)
+
+    positions = {}
+    while any(queues.values()) or deferred:
+        free_at, _, finished_project = heapq.heappop(slots)
+        if finished_project is not None:
+            active[finished_project] -= 1
+
+        while deferred and deferred[0][0] <= free_at:
+            _, project_id, entry = deferred.popleft()
+            heapq.heappush(queues.setdefault(project_id, []), entry)
+
+        heads = [
+            (queue[0][1], project_id, -queue[0][0])
+            for project_id, queue in queues.items()
+            if queue and not (per_project_limit and active.get(project_id, 0) >= per_project_limit)
+        ]
+        if not heads:
+            # Every project with work is at its cap or backing off: this slot idles
+            # until another job ends or a backoff is over
+            waits = [slot[0] for slot in slots if slot[2] is not None]
+            if deferred:
+                waits.append(deferred[0][0])
+            heapq.heappush(slots, (min(waits, default=free_at), next(sequence), None))
+            continue
+
+        job_id, project_id, _ = pick_fair(heads, service, weights)
+        heapq.heappop(queues[project_id])
+        positions[job_id] = {
+            'position': len(positions) + 1,
+            'starts_in': round(free_at) if timed else None
+        }
+        active[project_id] = active.get(project_id, 0) + 1
+        service[project_id] = service.get(project_id, 0) + 1
+        heapq.heappush(slots, (free_at + job_seconds, next(sequence), project_id))
+
+    return positions
+
+def renew_lease(session, job_id, owner, lease_seconds=LEASE_SECONDS):
+    """Extend the lease of a running job; False if the job is no longer ours"""
+    result = session.execute(
+        update(VideoQueue).where(
+            VideoQueue.id == job_id,
+            VideoQueue.lease_owner == owner,
+            VideoQueue.status == 'processing'
+        ).values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    )
+    session.commit()
+    return result.rowcount == 1
+
+def finish(session, job_id, owner, status, error_message=None):
+    """Mark a leased job as ``completed`` or ``failed`` and drop the lease"""
+    session.execute(
+        update(VideoQueue).where(
+            VideoQueue.id == job_id,
+            VideoQueue.lease_owner == owner
+        ).values(
+            status=status,
+            completed_at=datetime.utcnow(),
+            error_message=error_message,
+            lease_owner=None,
+            lease_expires_at=None
+        )
+    )
+    session.commit()
+
+def retry_or_fail(session, job_id, owner, error_message):
+    """Record a failed run of a leased job.
+
+    While ``retry_count`` is below ``max_retries`` the job goes back to the queue
+    and waits an exponential backoff; it resumes from its checkpoints. Returns
+    the new status ('queued' or 'failed'), or None if the job is no longer ours.
+    """
+    job = session.get(VideoQueue, job_id)
+    if job is None or job.lease_owner != owner or job.status != 'processing':
+        return None
+
+    now = datetime.utcnow()
+    job.retry_count = (job.retry_count or 0) + 1
+    job.error_message = error_message
+    job.lease_owner = None
+    job.lease_expires_at = None
+    if job.retry_count > (job.max_retries or 0):
+        job.status = 'failed'
+        job.completed_at = now
+    else:
+        job.status = 'queued'
+        job.started_at = None
+        job.retry_after = now + RETRY_BACKOFF * 2 ** (job.retry_count - 1)
+    session.commit()
+    return job.status
+
+def release(session, job_id, owner, status='queued'):
+    """Give a leased job back to the queue (or pause it) without counting it as a failure"""
+    session.execute(
+        update(VideoQueue).where(
+            VideoQueue.id == job_id,
+            VideoQueue.lease_owner == owner,
+            VideoQueue.status == 'processing'
+        ).values(status=status, lease_owner=None, lease_expires_at=None, started_at=None)
+    )
+    session.commit()
+
+def set_job_status(session, project_id, from_statuses, status, video_ids=None):
+    """Move waiting jobs of a project to ``status`` (pause, resume, cancel).
+
+    Only jobs still in ``from_statuses`` change, so a job claimed by a worker in the
+    meantime is left alone. ``video_ids`` (Video row ids) limits it to some videos.
+    Returns ``(job_id, video_id)`` pairs of the changed jobs, with YouTube video ids.
+    """
+    query = session.query(VideoQueue.id).filter(
+        VideoQueue.project_id == project_id,
+        VideoQueue.status.in_(from_statuses)
+    )
+    if video_ids is not None:
+        query = query.filter(VideoQueue.video_id.in_(list(video_ids)))
+    job_ids = [job_id for (job_id,) in query.all()]
+    if not job_ids:
+        return []
+
+    values = {'status': status}
+    if status == 'cancelled':
+        values['completed_at'] = datetime.utcnow()
+    session.execute(
+        update(VideoQueue).where(
+            VideoQueue.id.in_(job_ids),
+            VideoQueue.status.in_(from_statuses)
+        ).values(**values)
+    )
+    session.commit()
+
+    return session.query(VideoQueue.id, Video.video_id).join(
+        Video, Video.id == VideoQueue.video_id
+    ).filter(VideoQueue.id.in_(job_ids), VideoQueue.status == status).all()
+
+def recover_expired(session):
+    """Requeue jobs whose worker died: the lease expired or its process is gone.
+
+    Each recovery counts as a retry; jobs out of retries are marked failed.
+    Returns the recovered jobs.
+    """
+    now = datetime.utcnow()
+    jobs = session.query(VideoQueue).filter(
+        VideoQueue.status == 'processing',
+        or_(VideoQueue.lease_expires_at == None, VideoQueue.lease_expires_at < now,
+            VideoQueue.lease_owner.like(f"{socket.gethostname()}:%"))
+    ).all()
+
+    recovered = []
+    for job in jobs:
+        if job.lease_expires_at and job.lease_expires_at >= now and _owner_alive(job.lease_owner):
+            continue
+        job.retry_count = (job.retry_count or 0) + 1
+        job.lease_owner = None
+        job.lease_expires_at = None
+        if job.retry_count > (job.max_retries or 0):
+            job.status = 'failed'
+            job.completed_at = now
+            job.error_message = 'Worker lost too many times'
+        else:
+            job.status = 'queued'
+            job.started_at = None
+        recovered.append(job)
+
+    session.commit()
+    if recovered:
+        logger.info(f"Recovered {len(recovered)} jobs from dead workers")
+    return recovered
+
+def import_legacy_queue_file(session, path=LEGACY_QUEUE_FILE):
+    """Move the lines of an old ``hatehunter.tmp`` queue file into the database queue"""
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    imported = 0
+    for line in lines:
+        try:
+            args = parse_command(line)
+        except ValueError as e:
+            logger.warning(f"Skipping queue line: {e}")
+            continue
+        project_name = command_option(args, '--project')
+        video_url = command_option(args, '--video')
+        if not project_name or not video_url:
+            logger.warning(f"Skipping queue line without --project/--video: {line}")
+            continue
+
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            project = Project(name=project_name)
+            session.add(project)
+            session.flush()
+
+        video_id = extract_video_id(video_url)
+        video = session.query(Video).filter_by(project_id=project.id, video_id=video_id).first()
+        if not video:
+            video = Video(
+                project_id=project.id,
+                video_id=video_id,
+                title=f'Video {video_id}',
+                webpage_url=f"https://www.youtube.com/watch?v={video_id}",
+                thumbnail=f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",
+                processing_status='queued'
+            )
+            session.add(video)
+            session.flush()
+
+        _, created = enqueue(session, project, video, args)
+        imported += created
+
+    session.commit()
+    os.remove(path)
+    logger.info(f"Imported {imported} jobs from legacy queue file {path}")
+    return imported
+
+def extract_video_id(url):
+    """Extract the 11 character video id from a YouTube URL (or return the input)"""
+    parsed = urlparse(url)
+    if parsed.hostname and 'youtu.be' in parsed.hostname:
+        return parsed.path.lstrip('/')
+    qs = parse_qs(parsed.query)
+    if 'v' in qs:
+        return qs['v'][0]
+    return os.path.basename(parsed.path) if parsed.scheme else url
+
+def queue_counts(session, project_id=None):
+    """Number of jobs per status, optionally for one project"""
+    query = session.query(VideoQueue.status, func.count(VideoQueue.id))
+    if project_id is not None:
+        query = query.filter(VideoQueue.project_id == project_id)
+    return dict(query.group_by(VideoQueue.status).all())
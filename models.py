@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON, Index, desc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -12,6 +12,7 @@ class Project(Base):
     name = Column(String(255), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    queue_weight = Column(Integer, default=1)  # Share of the queue workers relative to other projects
     
     # Relationships
     videos = relationship('Video', back_populates='project', cascade='all, delete-orphan')
@@ -20,13 +21,15 @@ class Project(Base):
     comment_flags = relationship('CommentFlag', back_populates='project', cascade='all, delete-orphan')
     reported_items = relationship('ReportedItem', back_populates='project', cascade='all, delete-orphan')
     video_queue = relationship('VideoQueue', back_populates='project', cascade='all, delete-orphan')
+    channel_syncs = relationship('ChannelSync', back_populates='project', cascade='all, delete-orphan')
+    watched_channels = relationship('WatchedChannel', back_populates='project', cascade='all, delete-orphan')
 
 class Video(Base):
     __tablename__ = 'videos'
     
     id = Column(Integer, primary_key=True)
     video_id = Column(String(50), nullable=False)
-    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False, index=True)
     title = Column(String(500))
     uploader = Column(String(255))
     uploader_avatar = Column(String(500))
@@ -43,9 +46,10 @@ class Video(Base):
     is_live = Column(Boolean, default=False)
     flagged_subtitles = Column(Integer, default=0)
     flagged_comments = Column(Integer, default=0)
+    channel_url = Column(String(500))  # Channel the video was queued from, for incremental syncs
     
     # NUEVO CAMPO: Estado de procesamiento
-    processing_status = Column(String(50), default='pending')  # 'pending', 'processing', 'completed', 'failed'
+    processing_status = Column(String(50), default='pending')  # 'pending', 'queued', 'processing', 'paused', 'completed', 'failed', 'cancelled'
     processing_started_at = Column(DateTime)
     processing_completed_at = Column(DateTime)
     processing_error = Column(Text)  # Para almacenar errores si falla el procesamiento
@@ -64,7 +68,7 @@ class VideoQueue(Base):
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
     video_id = Column(Integer, ForeignKey('videos.id'), nullable=False)
     
-    # Queue status: 'queued', 'processing', 'completed', 'failed'
+    # Queue status: 'queued', 'processing', 'paused', 'completed', 'failed', 'cancelled'
     status = Column(String(50), default='queued', nullable=False)
     
     # Analysis parameters stored as JSON
@@ -73,6 +77,7 @@ class VideoQueue(Base):
     # Priority and ordering
     priority = Column(Integer, default=0)  # Higher number = higher priority
     created_at = Column(DateTime, default=datetime.utcnow)
+    start_by = Column(DateTime)  # When a low priority job has aged up to normal priority (see job_queue)
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     
@@ -80,17 +85,31 @@ class VideoQueue(Base):
     error_message = Column(Text)
     retry_count = Column(Integer, default=0)
     max_retries = Column(Integer, default=3)
+    retry_after = Column(DateTime)  # A failed job waits until then before it is retried
+    
+    # Lease held by the worker running the job ("host:pid"), renewed while it runs
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime)
     
     # Relationships
     project = relationship('Project', back_populates='video_queue')
     video = relationship('Video', back_populates='queue_items')
 
+    __table_args__ = (
+        Index('ix_video_queue_claim', 'status', 'priority', 'id'),
+        # Queue heads of one project: best normal job, and low priority job closest to its aging deadline
+        Index('ix_video_queue_project_head', 'status', 'project_id', desc('priority'), 'id'),
+        Index('ix_video_queue_project_aging', 'status', 'project_id', 'start_by', 'id'),
+        Index('ix_video_queue_started', 'started_at'),
+        Index('ix_video_queue_video_status', 'video_id', 'status'),
+    )
+
 class Subtitle(Base):
     __tablename__ = 'subtitles'
 
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False)
+    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False, index=True)
     timestamp = Column(Float)
     text = Column(Text)
     youtube_url = Column(String(500))
@@ -98,21 +117,30 @@ class Subtitle(Base):
 
     # Flag information (if flagged as hate speech)
     is_flagged = Column(Boolean, default=False)
-    categories = Column(String(500))  # Only filled if is_flagged=True
+    categories = Column(String(500))  # Only filled if is_flagged=True (legacy display string)
+    category_mask = Column(Integer, default=0, nullable=False)  # Bits from the categories table
+    category_scores = Column(JSON)  # Moderation scores, only for flagged rows
 
     # Relationships
     project = relationship('Project', back_populates='subtitles')
     video = relationship('Video', back_populates='subtitles')
 
+    __table_args__ = (
+        Index('ix_subtitles_project_mask', 'project_id', 'category_mask'),
+        Index('ix_subtitles_project_id', 'project_id', 'id'),
+    )
+
 class SubtitleFlag(Base):
     __tablename__ = 'subtitle_flags'
 
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False)
+    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False, index=True)
     timestamp = Column(Float)
     text = Column(Text)
     categories = Column(String(500))
+    category_mask = Column(Integer, default=0, nullable=False)
+    category_scores = Column(JSON)
     youtube_url = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -120,17 +148,23 @@ class SubtitleFlag(Base):
     project = relationship('Project', back_populates='subtitle_flags')
     video = relationship('Video', back_populates='subtitle_flags')
 
+    __table_args__ = (
+        Index('ix_subtitle_flags_project_mask', 'project_id', 'category_mask'),
+    )
+
 class CommentFlag(Base):
     __tablename__ = 'comment_flags'
     
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False)
+    video_id = Column(Integer, ForeignKey('videos.id'), nullable=False, index=True)
     comment_author = Column(String(255))
     comment_id = Column(String(100))
     author_thumbnail = Column(String(500))
     text = Column(Text)
     categories = Column(String(500))
+    category_mask = Column(Integer, default=0, nullable=False)
+    category_scores = Column(JSON)
     youtube_url = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -138,6 +172,18 @@ class CommentFlag(Base):
     project = relationship('Project', back_populates='comment_flags')
     video = relationship('Video', back_populates='comment_flags')
 
+    __table_args__ = (
+        Index('ix_comment_flags_project_mask', 'project_id', 'category_mask'),
+        Index('ix_comment_flags_project_id', 'project_id', 'id'),
+    )
+
+class Category(Base):
+    __tablename__ = 'categories'
+
+    # Category dictionary: the bit of a category in ``category_mask`` is ``id - 1``
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+
 class ReportedItem(Base):
     __tablename__ = 'reported_items'
     
@@ -152,6 +198,121 @@ class ReportedItem(Base):
     # Relationships
     project = relationship('Project', back_populates='reported_items')
 
+class DataChange(Base):
+    __tablename__ = 'data_changes'
+
+    # Append-only change log: the highest id of a project is its data version
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    item_type = Column(String(20), nullable=False)  # 'video', 'video_subtitles', 'video_comments', 'subtitle_report', 'comment_report'
+    item_id = Column(Integer)  # Row id (video id for video_*, subtitle/comment id for reports), NULL = every item of the type
+    deleted = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_data_changes_project_id', 'project_id', 'id'),
+    )
+
+class VideoMetadata(Base):
+    __tablename__ = 'video_metadata'
+
+    # YouTube metadata shared by every project and the CLI, so a video is looked up only once
+    id = Column(Integer, primary_key=True)
+    video_id = Column(String(50), nullable=False, unique=True)  # YouTube video id
+    title = Column(String(500))
+    uploader = Column(String(255))
+    uploader_avatar = Column(String(500))
+    upload_date = Column(String(20))  # YYYY-MM-DD
+    duration = Column(Integer)  # Seconds
+    view_count = Column(Integer)
+    like_count = Column(Integer)
+    comment_count = Column(Integer)
+    thumbnail = Column(String(500))
+    webpage_url = Column(String(500))
+    quality = Column(String(50))
+    has_captions = Column(Boolean)
+    is_live = Column(Boolean)
+    fetched_at = Column(DateTime)  # Last full yt-dlp lookup, NULL if only known from a channel listing
+
+class CachedImage(Base):
+    __tablename__ = 'cached_images'
+
+    # Thumbnails and avatars downloaded to the local cache, the file name is the hash of the content
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1000), nullable=False, unique=True)
+    kind = Column(String(20), nullable=False)  # 'video', 'avatar' or 'author'
+    key = Column(String(255))  # Video id, or the URL hash for avatars
+    content_hash = Column(String(64))  # sha256 of the image, NULL until downloaded
+    content_type = Column(String(50))
+    size = Column(Integer, default=0)
+    etag = Column(String(255))
+    last_modified = Column(String(100))
+    fetched_at = Column(DateTime)  # Last download or revalidation
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+    failures = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index('ix_cached_images_key', 'kind', 'key'),
+        Index('ix_cached_images_used', 'last_used_at'),
+    )
+
+class ChannelSync(Base):
+    __tablename__ = 'channel_syncs'
+
+    # Where the last incremental sync of a channel stopped
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
+    channel_url = Column(String(500), nullable=False)
+    last_video_id = Column(String(50))  # Newest upload seen, listings are newest first
+    last_synced_at = Column(DateTime)
+    videos_seen = Column(Integer, default=0)
+    videos_queued = Column(Integer, default=0)  # Queued by the last sync
+
+    project = relationship('Project', back_populates='channel_syncs')
+
+    __table_args__ = (
+        Index('ix_channel_syncs_channel', 'project_id', 'channel_url', unique=True),
+    )
+
+class WatchedChannel(Base):
+    __tablename__ = 'watched_channels'
+
+    # Channels synced on a schedule by the server's channel monitor
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
+    channel_url = Column(String(500), nullable=False)
+    interval_minutes = Column(Integer, default=1440, nullable=False)
+    enabled = Column(Boolean, default=True, nullable=False)
+    analysis_params = Column(JSON)  # Options of the analyze form (language, comments, min_duration...)
+    next_check_at = Column(DateTime)
+    last_checked_at = Column(DateTime)
+    last_status = Column(String(20))  # 'running', 'completed', 'failed', 'interrupted'
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    project = relationship('Project', back_populates='watched_channels')
+
+    __table_args__ = (
+        Index('ix_watched_channels_channel', 'project_id', 'channel_url', unique=True),
+        Index('ix_watched_channels_due', 'enabled', 'next_check_at'),
+    )
+
+class AnalysisCheckpoint(Base):
+    __tablename__ = 'analysis_checkpoints'
+
+    # Moderation results of a video being analyzed, so a retried job skips finished items
+    id = Column(Integer, primary_key=True)
+    project_name = Column(String(255), nullable=False)
+    video_id = Column(String(50), nullable=False)  # YouTube video id
+    item_type = Column(String(20), nullable=False)  # 'subtitle' or 'comment'
+    item_key = Column(String(100), nullable=False)  # Text hash of the subtitle line, or the comment id
+    result = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_analysis_checkpoints_video', 'project_name', 'video_id', 'item_type'),
+    )
+
 class ActiveUser(Base):
     __tablename__ = 'active_users'
     
@@ -0,0 +1,272 @@
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_, func
+from database import db
+from models import Project, WatchedChannel
+from channel_sync import channel_key
+
+logger = logging.getLogger(__name__)
+
+# Each check is scheduled at the interval +/- this fraction, so channels added together drift apart
+JITTER = 0.1
+
+# First checks of newly watched channels are spread over this window
+FIRST_CHECK_SPREAD = timedelta(minutes=10)
+
+MIN_INTERVAL_MINUTES = 15
+
+# Longest the scheduler sleeps without looking at the watchlist (other processes may edit it)
+MAX_SLEEP_SECONDS = 60
+
+# Options of the analyze form kept with a watched channel and used for every sync
+MONITOR_OPTIONS = (
+    'language', 'threshold', 'min_duration', 'rate_limit', 'analyze_subtitles', 'analyze_comments',
+    'openai_api_key', 'keywords', 'rescan_comments', 'skip_convert', 'skip_analyze'
+)
+
+def next_check(interval_minutes, now=None):
+    """When to check a channel again: one interval from ``now`` with jitter"""
+    now = now or datetime.utcnow()
+    return now + timedelta(seconds=interval_minutes * 60 * random.uniform(1 - JITTER, 1 + JITTER))
+
+def first_check(interval_minutes, now=None):
+    now = now or datetime.utcnow()
+    spread = min(FIRST_CHECK_SPREAD.total_seconds(), interval_minutes * 60)
+    return now + timedelta(seconds=random.uniform(0, spread))
+
+def watch_channel(session, project, channel_url, interval_minutes=1440, options=None):
+    """Add a channel to the watchlist of a project, or update its interval and options.
+
+    The caller commits.
+    """
+    interval = max(int(interval_minutes), MIN_INTERVAL_MINUTES)
+    key = channel_key(channel_url)
+    watched = session.query(WatchedChannel).filter_by(project_id=project.id, channel_url=key).first()
+    if watched is None:
+        watched = WatchedChannel(
+            project_id=project.id,
+            channel_url=key,
+            interval_minutes=interval,
+            next_check_at=first_check(interval)
+        )
+        session.add(watched)
+    elif watched.interval_minutes != interval:
+        watched.interval_minutes = interval
+        watched.next_check_at = next_check(interval, watched.last_checked_at)
+    watched.enabled = True
+    if options is not None:
+        watched.analysis_params = {key: value for key, value in options.items() if key in MONITOR_OPTIONS}
+    return watched
+
+def watched_to_dict(watched):
+    params = dict(watched.analysis_params or {})
+    if params.get('openai_api_key'):
+        params['openai_api_key'] = '***'
+    return {
+        'id': watched.id,
+        'channel_url': watched.channel_url,
+        'interval_minutes': watched.interval_minutes,
+        'enabled': watched.enabled,
+        'options': params,
+        'next_check_at': watched.next_check_at.isoformat() if watched.next_check_at else None,
+        'last_checked_at': watched.last_checked_at.isoformat() if watched.last_checked_at else None,
+        'last_status': watched.last_status,
+        'last_error': watched.last_error
+    }
+
+def claim_due(session, limit, now=None):
+    """Take up to ``limit`` channels whose check is due, oldest first.
+
+    The next check is scheduled when a channel is claimed, with a compare-and-set
+    on ``next_check_at``, so two server processes never sync the same channel
+    and a crash during the sync does not stop the schedule. Returns their ids.
+    """
+    now = now or datetime.utcnow()
+    due = session.query(WatchedChannel.id, WatchedChannel.next_check_at, WatchedChannel.interval_minutes).filter(
+        WatchedChannel.enabled == True,
+        or_(WatchedChannel.next_check_at == None, WatchedChannel.next_check_at <= now)
+    ).order_by(WatchedChannel.next_check_at).limit(limit).all()
+
+    claimed = []
+    for watched_id, next_check_at, interval in due:
+        result = session.execute(
+            update(WatchedChannel).where(
+                WatchedChannel.id == watched_id,
+                WatchedChannel.next_check_at == next_check_at
+            ).values(
+                next_check_at=next_check(interval, now),
+                last_checked_at=now,
+                last_status='running',
+                last_error=None
+            )
+        )
+        if result.rowcount == 1:
+            claimed.append(watched_id)
+    session.commit()
+    return claimed
+
+class ChannelMonitor:
+    """Background scheduler that syncs the watched channels.
+
+    Every due channel runs an incremental ``hatehunter.py --channel`` sync, which
+    queues only the new uploads. At most ``max_syncs`` syncs run at once (the
+    concurrency budget); the rest wait for the next free slot, so hundreds of
+    channels due at the same time do not start together.
+    """
+
+    def __init__(self, build_command, on_synced=None):
+        self.build_command = build_command  # Request data -> hatehunter.py command
+        self.on_synced = on_synced  # Called with (project_name, channel_url, status)
+        self.max_syncs = int(os.environ.get('HATEHUNTER_MONITOR_SYNCS', 2))
+        self.running = {}  # watched channel id -> {'project', 'channel_url', 'process'}
+        self.lock = threading.Lock()
+        self.is_running = True
+        self.wakeup = threading.Condition()
+        self.wakeup_pending = False
+
+    def wake(self):
+        with self.wakeup:
+            self.wakeup_pending = True
+            self.wakeup.notify()
+
+    def wait(self, timeout):
+        with self.wakeup:
+            if not self.wakeup_pending:
+                self.wakeup.wait(timeout)
+            self.wakeup_pending = False
+
+    def resize(self, max_syncs):
+        self.max_syncs = max(int(max_syncs), 0)
+        logger.info(f"Channel monitor budget set to {self.max_syncs} concurrent syncs")
+        self.wake()
+
+    def status(self):
+        return {
+            'max_syncs': self.max_syncs,
+            'running': [
+                {'id': watched_id, 'project': sync['project'], 'channel_url': sync['channel_url']}
+                for watched_id, sync in list(self.running.items())
+            ]
+        }
+
+    def start(self):
+        session = db.get_session()
+        try:
+            # Syncs cut short by a previous server run
+            session.query(WatchedChannel).filter_by(last_status='running').update(
+                {'last_status': 'interrupted'}, synchronize_session=False
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error recovering channel monitor: {e}")
+        finally:
+            session.close()
+
+        def scheduler():
+            while self.is_running:
+                try:
+                    self.dispatch()
+                    self.wait(self.seconds_until_due())
+                except Exception as e:
+                    logger.error(f"Error in channel monitor: {e}")
+                    time.sleep(10)
+
+        threading.Thread(target=scheduler, daemon=True).start()
+        logger.info("Channel monitor started")
+
+    def seconds_until_due(self):
+        """Time until the next check is due, capped to MAX_SLEEP_SECONDS"""
+        session = db.get_session()
+        try:
+            due = session.query(func.min(WatchedChannel.next_check_at)).filter(
+                WatchedChannel.enabled == True
+            ).scalar()
+        finally:
+            session.close()
+        if due is None:
+            return MAX_SLEEP_SECONDS
+        return min(max((due - datetime.utcnow()).total_seconds(), 1), MAX_SLEEP_SECONDS)
+
+    def dispatch(self):
+        """Start syncs of due channels while the budget allows"""
+        with self.lock:
+            free = self.max_syncs - len(self.running)
+            if not self.is_running or free <= 0:
+                return
+
+            session = db.get_session()
+            try:
+                syncs = []
+                for watched_id in claim_due(session, free):
+                    watched = session.get(WatchedChannel, watched_id)
+                    project = session.get(Project, watched.project_id)
+                    data = dict(watched.analysis_params or {})
+                    data.update(project=project.name, channel=watched.channel_url, incremental=True)
+                    syncs.append((watched_id, project.name, watched.channel_url, data))
+            finally:
+                session.close()
+
+            for watched_id, project_name, channel_url, data in syncs:
+                self.running[watched_id] = {'project': project_name, 'channel_url': channel_url, 'process': None}
+                threading.Thread(
+                    target=self.run_sync, args=(watched_id, project_name, channel_url, data), daemon=True
+                ).start()
+
+    def run_sync(self, watched_id, project_name, channel_url, data):
+        status, error = 'completed', None
+        logger.info(f"📡 Syncing watched channel {channel_url} ({project_name})")
+        try:
+            process = subprocess.Popen(
+                self.build_command(data),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1,
+                cwd=os.getcwd()
+            )
+            self.running[watched_id]['process'] = process
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    logger.info(f"Monitor [{channel_url}]: {line}")
+            return_code = process.wait()
+            if return_code != 0:
+                status, error = 'failed', f'Channel sync exited with code {return_code}'
+        except Exception as e:
+            status, error = 'failed', str(e)
+        finally:
+            self.running.pop(watched_id, None)
+
+        session = db.get_session()
+        try:
+            session.query(WatchedChannel).filter_by(id=watched_id).update(
+                {'last_status': status, 'last_error': error}, synchronize_session=False
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving sync result of {channel_url}: {e}")
+        finally:
+            session.close()
+
+        if status == 'completed':
+            logger.info(f"✅ Watched channel {channel_url} synced")
+        else:
+            logger.error(f"❌ Sync of watched channel {channel_url} failed: {error}")
+        if self.on_synced:
+            self.on_synced(project_name, channel_url, status)
+        self.wake()
+
+    def stop(self):
+        self.is_running = False
+        for sync in list(self.running.values()):
+            process = sync['process']
+            if process and process.poll() is None:
+                process.terminate()
+        self.wake()
@@ -0,0 +1,159 @@
+import json
+import time
+
+# Stage labels shown in the UI
+STAGE_MESSAGES = {
+    'metadata': 'Checking video metadata',
+    'download': 'Downloading subtitles',
+    'comments': 'Analyzing comments',
+    'convert': 'Converting subtitle files',
+    'moderation': 'Analyzing subtitles with AI moderation',
+    'saving': 'Saving results',
+    'done': 'Analysis completed'
+}
+
+class ProgressReporter:
+    """Writes progress events as JSON lines to a stream (does nothing without one).
+
+    Every event carries the stage, items done/total, moderation API calls and cache
+    hits since ``attach``, elapsed times and an ETA for the current stage. Item
+    updates are rate limited with ``min_interval``; stage changes always go out.
+    """
+
+    def __init__(self, min_interval=0.25):
+        self.min_interval = min_interval
+        self.stream = None
+        self.stats = None
+        self.job_id = None
+        self._reset()
+
+    def _reset(self):
+        self.started = time.monotonic()
+        self.stage_name = None
+        self.stage_started = self.started
+        self.done = 0
+        self.total = None
+        self.video = None
+        self.timings = {}
+        self.last_emit = 0
+        self.baseline = (0, 0)
+
+    def attach(self, stream, job_id=None, stats=None):
+        """Start reporting to ``stream``; ``stats`` returns cumulative (api_calls, cache_hits)"""
+        self._reset()
+        self.stream = stream
+        self.job_id = job_id
+        self.stats = stats
+        self.baseline = stats() if stats else (0, 0)
+
+    def detach(self):
+        self.stream = None
+        self.stats = None
+
+    def _close_stage(self, now):
+        if self.stage_name:
+            self.timings[self.stage_name] = round(
+                self.timings.get(self.stage_name, 0) + now - self.stage_started, 3)
+
+    def stage(self, name, total=None, video=None):
+        """Enter a stage with ``total`` items (None when unknown)"""
+        now = time.monotonic()
+        if name != self.stage_name:
+            self._close_stage(now)
+            self.stage_name = name
+        self.stage_started = now
+        self.done = 0
+        self.total = total
+        self.video = video
+        self._emit(now)
+
+    def advance(self, count=1, video=None):
+        """Count finished items of the current stage"""
+        self.done += count
+        if video is not None:
+            self.video = video
+        now = time.monotonic()
+        if now - self.last_emit >= self.min_interval or self.done == self.total:
+            self._emit(now)
+
+    def finish(self, status='completed', error=None):
+        """Send the final event with the time spent in each stage"""
+        now = time.monotonic()
+        self._close_stage(now)
+        self.stage_name = 'done'
+        self.stage_started = now
+        self.done, self.total = 0, None
+        self._emit(now, status=status, error=error, timings=self.timings)
+
+    def _emit(self, now, **extra):
+        self.last_emit = now
+        if not self.stream:
+            return
+
+        api_calls, cache_hits = self.stats() if self.stats else (0, 0)
+        stage_elapsed = now - self.stage_started
+        eta = None
+        if self.total and self.done:
+            eta = round(stage_elapsed / self.done * (self.total - self.done), 1)
+
+        event = {
+            'type': 'progress',
+            'job_id': self.job_id,
+            'stage': self.stage_name,
+            'video': self.video,
+            'done': self.done,
+            'total': self.total,
+            'api_calls': api_calls - self.baseline[0],
+            'cache_hits': cache_hits - self.baseline[1],
+            'elapsed': round(now - self.started, 3),
+            'stage_elapsed': round(stage_elapsed, 3),
+            'eta': eta,
+            **extra
+        }
+        try:
+            self.stream.write(json.dumps(event) + '\n')
+            self.stream.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            # Nobody is listening any more, keep working without progress
+            self.stream = None
+
+class ProgressThrottle:
+    """Decides which progress events are forwarded to the browsers.
+
+    At most one event per key every ``interval`` seconds, except stage changes and
+    final events which are always sent.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.last = {}  # key -> (stage, monotonic time of the last forwarded event)
+
+    def should_send(self, key, event):
+        now = time.monotonic()
+        stage, sent_at = self.last.get(key, (None, 0))
+        if (event.get('stage') == stage and event.get('stage') != 'done'
+                and event.get('done') != event.get('total')
+                and now - sent_at < self.interval):
+            return False
+        self.last[key] = (event.get('stage'), now)
+        return True
+
+    def forget(self, key):
+        self.last.pop(key, None)
+
+def progress_message(event):
+    """Human readable summary of a progress event for the UI"""
+    message = STAGE_MESSAGES.get(event.get('stage'), event.get('stage') or '')
+    if event.get('total'):
+        message += f" ({event['done']}/{event['total']})"
+    if event.get('video'):
+        message += f" - {event['video']}"
+    return message
+
+def progress_percent(event):
+    """Percentage of the current stage, or None when the total is unknown"""
+    if event.get('stage') == 'done':
+        return 100
+    if event.get('total'):
+        return int(event['done'] * 100 / event['total'])
+    return None
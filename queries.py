@@ -0,0 +1,395 @@
+import logging
+import time
+from threading import Lock
+from sqlalchemy import func, union, case, or_
+from models import Project, Video, Subtitle, SubtitleFlag, CommentFlag, ReportedItem
+from categories import category_names
+from changes import DELTA_LIMIT, current_version, changes_since
+
+logger = logging.getLogger(__name__)
+
+def _count_by_project(session, model):
+    """Subquery counting rows of ``model`` per project"""
+    return session.query(
+        model.project_id.label('project_id'),
+        func.count(model.id).label('count')
+    ).group_by(model.project_id).subquery()
+
+def project_summaries(session):
+    """Build the project list with counts and categories in a constant number of queries.
+
+    One grouped query returns every project with its video/subtitle/comment counts,
+    and a second one returns the distinct (project, category_mask) pairs, which the
+    ``(project_id, category_mask)`` indexes answer without touching the flag rows.
+    """
+    video_counts = _count_by_project(session, Video)
+    subtitle_counts = _count_by_project(session, SubtitleFlag)
+    comment_counts = _count_by_project(session, CommentFlag)
+
+    rows = session.query(
+        Project.id,
+        Project.name,
+        Project.updated_at,
+        func.coalesce(video_counts.c.count, 0),
+        func.coalesce(subtitle_counts.c.count, 0),
+        func.coalesce(comment_counts.c.count, 0)
+    ).outerjoin(
+        video_counts, video_counts.c.project_id == Project.id
+    ).outerjoin(
+        subtitle_counts, subtitle_counts.c.project_id == Project.id
+    ).outerjoin(
+        comment_counts, comment_counts.c.project_id == Project.id
+    ).order_by(Project.id).all()
+
+    masks_query = union(
+        session.query(SubtitleFlag.project_id, SubtitleFlag.category_mask).filter(
+            SubtitleFlag.category_mask != 0
+        ).distinct(),
+        session.query(CommentFlag.project_id, CommentFlag.category_mask).filter(
+            CommentFlag.category_mask != 0
+        ).distinct()
+    )
+    masks_by_project = {}
+    for project_id, mask in session.execute(masks_query):
+        masks_by_project[project_id] = masks_by_project.get(project_id, 0) | mask
+
+    projects_data = []
+    for project_id, name, updated_at, videos_count, subtitles_count, comments_count in rows:
+        projects_data.append({
+            'name': name,
+            'subtitles_count': subtitles_count,
+            'comments_count': comments_count,
+            'videos_count': videos_count,
+            'categories': category_names(session, masks_by_project.get(project_id, 0)),
+            'date': updated_at.strftime("%Y-%m-%d %H:%M") if updated_at else ""
+        })
+
+    return projects_data
+
+# Order used by the videos page when sorting by processing status
+STATUS_ORDER = ['processing', 'queued', 'paused', 'pending', 'failed', 'cancelled', 'completed']
+
+VIDEO_SORT_DEFAULT_ORDER = {
+    'status': 'asc',
+    'flags': 'desc',
+    'upload_date': 'desc',
+    'title': 'asc'
+}
+
+def _count_by_video(session, model, project_id):
+    """Subquery counting rows of ``model`` per video of a project"""
+    return session.query(
+        model.video_id.label('video_id'),
+        func.count(model.id).label('count')
+    ).filter(model.project_id == project_id).group_by(model.video_id).subquery()
+
+def video_to_dict(video, flagged_subtitles, flagged_comments):
+    """Serialize a video row the way the videos page expects it"""
+    return {
+        'id': video.video_id,
+        'title': video.title or f'Video {video.video_id}',
+        'uploader': video.uploader or '',
+        'upload_date': video.upload_date or '',
+        'duration': video.duration or '',
+        'view_count': video.view_count or '',
+        'like_count': video.like_count or '',
+        'comment_count': video.comment_count or '',
+        'thumbnail': video.thumbnail or f"https://img.youtube.com/vi/{video.video_id}/mqdefault.jpg",
+        'webpage_url': video.webpage_url or f"https://www.youtube.com/watch?v={video.video_id}",
+        'flagged_subtitles': flagged_subtitles,
+        'flagged_comments': flagged_comments,
+        'processing_status': video.processing_status or 'completed',
+        'processing_error': video.processing_error
+    }
+
+def subtitle_to_dict(subtitle, video_id, is_reported):
+    """Serialize a subtitle row the way the subtitles page expects it"""
+    return {
+        'id': subtitle.id,
+        'video_id': video_id,
+        'timestamp': subtitle.timestamp,
+        'text': subtitle.text,
+        'categories': subtitle.categories if subtitle.categories else '',
+        'youtube_url': subtitle.youtube_url,
+        'is_flagged': subtitle.is_flagged,
+        'is_reported': is_reported
+    }
+
+def comment_to_dict(comment, video_id, is_reported):
+    """Serialize a flagged comment row the way the comments page expects it"""
+    return {
+        'id': comment.id,
+        'video_id': video_id,
+        'author': comment.comment_author,
+        'author_thumbnail': comment.author_thumbnail,
+        'text': comment.text,
+        'categories': comment.categories,
+        'youtube_url': comment.youtube_url,
+        'is_reported': is_reported
+    }
+
+def reported_ids(session, project_id, item_type, ids):
+    """Return which of ``ids`` are reported, for one page of rows"""
+    if not ids:
+        return set()
+    return set(item_id for item_id, in session.query(ReportedItem.item_id).filter(
+        ReportedItem.project_id == project_id,
+        ReportedItem.item_type == item_type,
+        ReportedItem.item_id.in_(ids)
+    ))
+
+def video_listing(session, project_id, page=1, per_page=60, sort='status', order=None,
+                  statuses=None, flagged_only=False, search=None):
+    """Return one page of a project's videos with their flag counts.
+
+    Flag counts come from a single LEFT JOIN over per-video grouped counts, and a
+    second grouped query returns the per-status totals for the whole project, so the
+    cost no longer grows with one query per video.
+    """
+    subtitle_counts = _count_by_video(session, SubtitleFlag, project_id)
+    comment_counts = _count_by_video(session, CommentFlag, project_id)
+    flagged_subtitles = func.coalesce(subtitle_counts.c.count, 0)
+    flagged_comments = func.coalesce(comment_counts.c.count, 0)
+    total_flags = flagged_subtitles + flagged_comments
+    status = func.coalesce(Video.processing_status, 'completed')
+
+    def with_filters(query):
+        query = query.outerjoin(
+            subtitle_counts, subtitle_counts.c.video_id == Video.id
+        ).outerjoin(
+            comment_counts, comment_counts.c.video_id == Video.id
+        ).filter(Video.project_id == project_id)
+        if flagged_only:
+            query = query.filter(total_flags > 0)
+        if search:
+            pattern = f'%{search}%'
+            query = query.filter(or_(
+                Video.title.like(pattern),
+                Video.uploader.like(pattern),
+                Video.video_id.like(pattern)
+            ))
+        return query
+
+    # Per-status totals (ignoring the status filter, the queue bar needs all of them)
+    status_counts = {}
+    flagged_videos = 0
+    counts_query = with_filters(session.query(
+        status,
+        func.count(Video.id),
+        func.sum(case((total_flags > 0, 1), else_=0))
+    )).group_by(status)
+    for status_value, count, flagged in counts_query:
+        status_counts[status_value] = count
+        flagged_videos += flagged or 0
+
+    if statuses:
+        total = sum(status_counts.get(value, 0) for value in statuses)
+    else:
+        total = sum(status_counts.values())
+
+    if sort not in VIDEO_SORT_DEFAULT_ORDER:
+        sort = 'status'
+    if order not in ('asc', 'desc'):
+        order = VIDEO_SORT_DEFAULT_ORDER[sort]
+
+    if sort == 'status':
+        sort_column = case(
+            {value: position for position, value in enumerate(STATUS_ORDER)},
+            value=status,
+            else_=len(STATUS_ORDER)
+        )
+    elif sort == 'flags':
+        sort_column = total_flags
+    elif sort == 'upload_date':
+        sort_column = func.coalesce(Video.upload_date, '')
+    else:
+        sort_column = func.lower(func.coalesce(Video.title, ''))
+
+    sort_column = sort_column.asc() if order == 'asc' else sort_column.desc()
+
+    query = with_filters(session.query(Video, flagged_subtitles, flagged_comments))
+    if statuses:
+        query = query.filter(status.in_(statuses))
+
+    page = max(page, 1)
+    per_page = max(min(per_page, 500), 1)
+    rows = query.order_by(sort_column, Video.id.desc()).offset((page - 1) * per_page).limit(per_page).all()
+
+    return {
+        'videos': [video_to_dict(video, subs, comments) for video, subs, comments in rows],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total + per_page - 1) // per_page,
+        'sort': sort,
+        'order': order,
+        'status_counts': status_counts,
+        'flagged_videos': flagged_videos
+    }
+
+# Cached totals for filtered listings: {(project_id, kind, filters): (count, computed_at)}
+COUNT_CACHE_TTL = 60
+_count_cache = {}
+_count_cache_lock = Lock()
+
+def cached_count(key, query):
+    """Count ``query`` at most once per COUNT_CACHE_TTL seconds for the same key"""
+    now = time.time()
+    with _count_cache_lock:
+        entry = _count_cache.get(key)
+    if entry and now - entry[1] < COUNT_CACHE_TTL:
+        return entry[0]
+
+    total = query.order_by(None).count()
+    with _count_cache_lock:
+        _count_cache[key] = (total, now)
+    return total
+
+def invalidate_counts(project_id):
+    """Drop cached totals of a project after its data changed"""
+    with _count_cache_lock:
+        for key in [key for key in _count_cache if key[0] == project_id]:
+            del _count_cache[key]
+
+def keyset_page(query, id_column, per_page, cursor=None, direction='next'):
+    """Fetch one page of ``query`` ordered by ``id_column`` descending, using a cursor.
+
+    ``cursor`` is the id at the edge of the page the client is on: ``next`` returns
+    rows older than it, ``prev`` rows newer than it. Only ``per_page + 1`` rows are
+    read, whatever the depth of the page.
+    """
+    if direction == 'prev' and cursor is not None:
+        rows = query.filter(id_column > cursor).order_by(id_column.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if cursor is not None:
+            query = query.filter(id_column < cursor)
+        rows = query.order_by(id_column.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = cursor is not None
+
+    return rows, {
+        'has_next': has_next,
+        'has_prev': has_prev
+    }
+
+def videos_by_ids(session, project_id, ids):
+    """Serialize the given videos of a project with their flag counts"""
+    if not ids:
+        return []
+    subtitle_counts = _count_by_video(session, SubtitleFlag, project_id)
+    comment_counts = _count_by_video(session, CommentFlag, project_id)
+    rows = session.query(
+        Video,
+        func.coalesce(subtitle_counts.c.count, 0),
+        func.coalesce(comment_counts.c.count, 0)
+    ).outerjoin(
+        subtitle_counts, subtitle_counts.c.video_id == Video.id
+    ).outerjoin(
+        comment_counts, comment_counts.c.video_id == Video.id
+    ).filter(Video.project_id == project_id, Video.id.in_(ids)).all()
+    return [video_to_dict(video, subs, comments) for video, subs, comments in rows]
+
+def project_summary(session, project):
+    """Counters and data version of a project, sent when a client joins its room"""
+    status_counts = dict(session.query(
+        func.coalesce(Video.processing_status, 'completed'), func.count(Video.id)
+    ).filter(Video.project_id == project.id).group_by(
+        func.coalesce(Video.processing_status, 'completed')
+    ).all())
+
+    subtitles_count, flagged_subtitles_count = session.query(
+        func.count(Subtitle.id),
+        func.coalesce(func.sum(case((Subtitle.is_flagged == True, 1), else_=0)), 0)
+    ).filter(Subtitle.project_id == project.id).one()
+
+    comments_count = session.query(func.count(CommentFlag.id)).filter(
+        CommentFlag.project_id == project.id
+    ).scalar()
+
+    reported = dict(session.query(
+        ReportedItem.item_type, func.count(ReportedItem.id)
+    ).filter(ReportedItem.project_id == project.id).group_by(ReportedItem.item_type).all())
+
+    return {
+        'project': project.name,
+        'version': current_version(session, project.id),
+        'videos_count': sum(status_counts.values()),
+        'status_counts': status_counts,
+        'subtitles_count': subtitles_count,
+        'flagged_subtitles_count': flagged_subtitles_count,
+        'comments_count': comments_count,
+        'reported': {
+            'subtitle': reported.get('subtitle', 0),
+            'comment': reported.get('comment', 0)
+        }
+    }
+
+def project_delta(session, project, since):
+    """Rows of a project that changed after version ``since``.
+
+    Only ids come from the change log; the rows themselves are read in one query
+    per type. Subtitles and comments are logged per video, so every row of a
+    changed video is sent and ``reloaded`` lists those videos: the client replaces
+    what it shows for them. When the client is too far behind, ``resync`` asks it
+    to reload the pages it shows through the HTTP APIs instead.
+    """
+    version, changes, resync = changes_since(session, project.id, since)
+    delta = {
+        'project': project.name,
+        'since': since,
+        'version': version,
+        'resync': resync,
+        'videos': [],
+        'subtitles': [],
+        'comments': [],
+        'reloaded': {},
+        'deleted': {},
+        'reports': {}
+    }
+    # Per-row entries from before the per-video log can't be replayed
+    if resync or 'subtitle' in changes or 'comment' in changes:
+        delta['resync'] = True
+        return delta
+
+    if changes.get('video', {}).get('deleted'):
+        delta['deleted']['video'] = changes['video']['deleted']
+
+    delta['videos'] = videos_by_ids(session, project.id, changes.get('video', {}).get('changed'))
+
+    for item_type, key, model, to_dict in (
+        ('subtitle', 'subtitles', Subtitle, subtitle_to_dict),
+        ('comment', 'comments', CommentFlag, comment_to_dict)
+    ):
+        video_ids = changes.get(f'video_{key}', {}).get('changed')
+        if not video_ids:
+            continue
+        rows = session.query(model, Video.video_id).join(Video).filter(
+            model.project_id == project.id,
+            model.video_id.in_(video_ids)
+        ).order_by(model.id).limit(DELTA_LIMIT + 1).all()
+        if len(rows) > DELTA_LIMIT:
+            return {**delta, 'resync': True, 'videos': [], 'subtitles': [], 'comments': [], 'reloaded': {}, 'deleted': {}}
+        reported = reported_ids(session, project.id, item_type, [row.id for row, _ in rows])
+        delta[key] = [to_dict(row, video_id, row.id in reported) for row, video_id in rows]
+        delta['reloaded'][item_type] = [
+            video_id for video_id, in session.query(Video.video_id).filter(Video.id.in_(video_ids)).order_by(Video.id)
+        ]
+
+    for item_type in ('subtitle', 'comment'):
+        entry = changes.get(f'{item_type}_report')
+        if not entry:
+            continue
+        # A report row can be added and removed again within the delta, ask for the final state
+        candidates = entry['changed'] + entry['deleted']
+        reported = reported_ids(session, project.id, item_type, candidates)
+        delta['reports'][item_type] = {
+            'cleared': entry['all'],
+            'reported': sorted(reported),
+            'unreported': sorted(set(candidates) - reported)
+        }
+
+    return delta
@@ -0,0 +1,299 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import func, literal, null, or_, union_all, select
+from database import db
+from models import Video, SubtitleFlag, CommentFlag, ReportedItem
+from changes import current_version
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Rows read from the database per round trip while the report is streamed
+REPORT_BATCH_SIZE = 500
+
+# Built reports, one file per project and report-set version. Resolved at import like the thumbnails.
+REPORTS_DIR = os.path.abspath("reports")
+
+# Reports built at the same time; rendering is CPU bound and would starve the server
+REPORT_WORKERS = 1
+
+# Finished jobs kept around for status requests
+MAX_FINISHED_JOBS = 100
+
+# Rendered pieces are sent in groups of this many, instead of one tiny write each
+STREAM_BUFFER = 100
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(['html', 'j2'])
+)
+
+def default_thumbnail(video_id):
+    return f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
+
+def _reported(project_id, item_type):
+    """Ids of the items of one type marked as reported, each id once"""
+    return select(ReportedItem.item_id).where(
+        ReportedItem.project_id == project_id,
+        ReportedItem.item_type == item_type
+    )
+
+def _flag_counts(session, model, project_id, item_type):
+    return session.query(
+        model.video_id.label('video_id'),
+        func.count(model.id).label('count')
+    ).filter(
+        model.project_id == project_id,
+        model.id.in_(_reported(project_id, item_type))
+    ).group_by(model.video_id).subquery()
+
+def report_summary(session, project_id):
+    """One row per video with reported items: ``{'video', 'subtitles', 'comments'}`` counts.
+
+    A single grouped query, the per-video sections are streamed afterwards by
+    ``report_sections``.
+    """
+    subtitle_counts = _flag_counts(session, SubtitleFlag, project_id, 'subtitle')
+    comment_counts = _flag_counts(session, CommentFlag, project_id, 'comment')
+    rows = session.query(
+        Video,
+        func.coalesce(subtitle_counts.c.count, 0),
+        func.coalesce(comment_counts.c.count, 0)
+    ).outerjoin(
+        subtitle_counts, subtitle_counts.c.video_id == Video.id
+    ).outerjoin(
+        comment_counts, comment_counts.c.video_id == Video.id
+    ).filter(
+        Video.project_id == project_id,
+        or_(subtitle_counts.c.count != None, comment_counts.c.count != None)
+    ).order_by(Video.id)
+    return [{'video': video, 'subtitles': subtitles, 'comments': comments} for video, subtitles, comments in rows]
+
+def reported_rows(session, project_id):
+    """Every reported subtitle and comment of a project in one query, grouped by video.
+
+    Subtitles come before comments within a video, so the report can be written
+    while the rows are read.
+    """
+    subtitles = select(
+        SubtitleFlag.video_id.label('video_pk'),
+        literal(0).label('kind'),
+        SubtitleFlag.id.label('id'),
+        SubtitleFlag.timestamp.label('timestamp'),
+        null().label('author'),
+        null().label('author_thumbnail'),
+        SubtitleFlag.text.label('text'),
+        SubtitleFlag.categories.label('categories'),
+        SubtitleFlag.youtube_url.label('youtube_url')
+    ).where(
+        SubtitleFlag.project_id == project_id,
+        SubtitleFlag.id.in_(_reported(project_id, 'subtitle'))
+    )
+    comments = select(
+        CommentFlag.video_id,
+        literal(1),
+        CommentFlag.id,
+        null(),
+        CommentFlag.comment_author,
+        CommentFlag.author_thumbnail,
+        CommentFlag.text,
+        CommentFlag.categories,
+        CommentFlag.youtube_url
+    ).where(
+        CommentFlag.project_id == project_id,
+        CommentFlag.id.in_(_reported(project_id, 'comment'))
+    )
+    query = union_all(subtitles, comments).order_by('video_pk', 'kind', 'id')
+    return session.execute(query).yield_per(REPORT_BATCH_SIZE)
+
+def report_sections(session, project_id, summary):
+    """Yield one ``{'video', 'subtitles', 'comments'}`` section at a time.
+
+    Only the items of the current video are held in memory.
+    """
+    videos = {row['video'].id: row['video'] for row in summary}
+    section = None
+    for row in reported_rows(session, project_id):
+        if section is None or section['video'].id != row.video_pk:
+            if section is not None:
+                yield section
+            section = {'video': videos[row.video_pk], 'subtitles': [], 'comments': []}
+        section['comments' if row.kind else 'subtitles'].append(row)
+    if section is not None:
+        yield section
+
+def render_report(session, project_name, project_id, summary, on_section=None):
+    """Stream the HTML report of a project as chunks of text.
+
+    ``on_section`` is called with the number of videos written so far.
+    """
+    sections = report_sections(session, project_id, summary)
+    if on_section is not None:
+        sections = _counted(sections, on_section)
+    stream = environment.get_template('report.html.j2').stream(
+        project_name=project_name,
+        generated_at=datetime.now(),
+        summary=summary,
+        total_subtitles=sum(row['subtitles'] for row in summary),
+        total_comments=sum(row['comments'] for row in summary),
+        sections=sections,
+        default_thumbnail=default_thumbnail
+    )
+    stream.enable_buffering(STREAM_BUFFER)
+    return stream
+
+def _counted(sections, on_section):
+    for done, section in enumerate(sections, 1):
+        yield section
+        on_section(done)
+
+def report_version(session, project_id):
+    """Version of everything a report shows: reported items, flagged rows and video metadata.
+
+    The data change log only grows, the reported items part guards against
+    change ids reused after the log is pruned.
+    """
+    reports_count, last_report = session.query(
+        func.count(ReportedItem.id), func.max(ReportedItem.id)
+    ).filter(ReportedItem.project_id == project_id).one()
+    return f"{current_version(session, project_id)}-{reports_count}-{last_report or 0}"
+
+def artifact_path(project_id, version):
+    return os.path.join(REPORTS_DIR, str(project_id), f"{version}.html")
+
+def remove_artifacts(project_id, keep=None):
+    """Delete the built reports of a project, except the ``keep`` version"""
+    directory = os.path.join(REPORTS_DIR, str(project_id))
+    if keep is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if name != f"{keep}.html":
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+class ReportBuilder:
+    """Builds HTML reports in the background and keeps the result on disk.
+
+    A report is stored under the report-set version of its project, so asking
+    again for an unchanged project returns the existing file at once, and two
+    requests for the same version share one job. ``on_progress`` is called with
+    the job dict whenever it advances.
+    """
+
+    def __init__(self, on_progress=None, workers=REPORT_WORKERS):
+        self.on_progress = on_progress
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reports')
+        self.jobs = {}  # job id -> job dict
+        self.lock = threading.Lock()
+
+    def request(self, project):
+        """Job building the current report of ``project``; completed right away when it is cached"""
+        session = db.get_session()
+        try:
+            version = report_version(session, project.id)
+        finally:
+            session.close()
+
+        with self.lock:
+            for job in self.jobs.values():
+                if job['project_id'] == project.id and job['version'] == version and job['status'] in ('queued', 'running'):
+                    return dict(job)
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'project': project.name,
+                'project_id': project.id,
+                'version': version,
+                'status': 'queued',
+                'progress': 0,
+                'error': None,
+                'cached': False,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            if os.path.exists(artifact_path(project.id, version)):
+                job.update(status='completed', progress=100, cached=True)
+            self._forget_finished()
+            self.jobs[job['id']] = job
+
+        if job['status'] == 'queued':
+            self.pool.submit(self._build_safely, job['id'])
+        return dict(job)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+    def _update(self, job_id, **values):
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(values)
+            job = dict(job)
+        if self.on_progress:
+            self.on_progress(job)
+
+    def _build_safely(self, job_id):
+        try:
+            self._build(job_id)
+        except Exception as e:
+            logger.error(f"Error building report job {job_id}: {e}")
+            self._update(job_id, status='failed', error=str(e))
+
+    def _build(self, job_id):
+        job = self.get(job_id)
+        self._update(job_id, status='running')
+        path = artifact_path(job['project_id'], job['version'])
+        session = db.get_session()
+        try:
+            summary = report_summary(session, job['project_id'])
+            if not summary:
+                self._update(job_id, status='failed', error='No valid reported content found')
+                return
+
+            started = time.time()
+            reported = 0
+
+            def on_section(done):
+                nonlocal reported
+                percent = done * 100 // len(summary)
+                if percent - reported >= 5:
+                    reported = percent
+                    self._update(job_id, progress=min(percent, 99))
+                # Let the server answer requests while a big report renders
+                time.sleep(0)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{job_id}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for chunk in render_report(session, job['project'], job['project_id'], summary, on_section):
+                        f.write(chunk)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        finally:
+            session.close()
+
+        remove_artifacts(job['project_id'], keep=job['version'])
+        logger.info(f"Built report for project {job['project']} with {len(summary)} videos in {time.time() - started:.1f}s")
+        self._update(job_id, status='completed', progress=100)
@@ -11,16 +11,42 @@ import json
 import time
 import re
 import sys
+import shutil
+import unicodedata
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_from_directory, Response
+from urllib.parse import quote
+from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, redirect, Response, stream_with_context
 from flask_socketio import SocketIO
 from flask_cors import CORS
-from datetime import datetime
+from werkzeug.http import dump_options_header
+from datetime import datetime, timedelta
 
 # Import after monkey_patch
 from websocket_handler import WebSocketHandler
 from database import db
-from models import Project, Video, SubtitleFlag, CommentFlag, ReportedItem
+from models import Project, Video, Subtitle, SubtitleFlag, CommentFlag, ReportedItem, VideoQueue, WatchedChannel, CachedImage
+from categories import category_facets, matching_mask, has_any_category
+from queries import (
+    project_summaries, video_listing, cached_count, invalidate_counts, keyset_page,
+    subtitle_to_dict, comment_to_dict, reported_ids
+)
+from changes import prune_changes
+from checkpoints import prune_checkpoints
+from worker_pool import WorkerPool
+from monitor import ChannelMonitor, watch_channel, watched_to_dict
+from video_metadata import get_metadata, refresh_metadata
+from thumbnails import (
+    ThumbnailFetcher, FETCH_TIMEOUT, VARIANT_WIDTHS, cached_image, image_variant, prune_cache,
+    localize_thumbnails, localize_avatars, video_thumbnail_path, video_thumbnail_url
+)
+from reports import ReportBuilder, artifact_path, remove_artifacts
+from exports import EXPORT_TABLES, EXPORT_FORMATS, export_stream, parquet_available
+from progress import ProgressThrottle, progress_message, progress_percent
+from job_queue import (
+    worker_id, parse_command, command_option, enqueue, claim_next, renew_lease,
+    finish, retry_or_fail, release, recover_expired, import_legacy_queue_file, queue_counts,
+    set_job_status, expedite, average_job_seconds, queue_positions, EXPEDITE_PRIORITY
+)
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +55,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Port of the web server; hatehunter.py reads the same variable to reach it
+SERVER_PORT = int(os.environ.get('HATEHUNTER_PORT', 1338))
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -51,24 +80,110 @@ ws_handler = WebSocketHandler(socketio)
 
 # Global dictionary to track running analysis processes
 running_analyses = {}
-
-# Queue file path
-QUEUE_FILE = "hatehunter.tmp"
+analysis_processes = {}  # project_name -> hatehunter.py subprocess, so it can be cancelled
+
+# Progress events from hatehunter.py are forwarded to the browsers at most once a second per run
+progress_throttle = ProgressThrottle(interval=1.0)
+
+def forward_progress(project_name, key, event, **extra):
+    """Emit a hatehunter progress event as ``analysis_progress`` unless throttled"""
+    if not progress_throttle.should_send(key, event):
+        return
+    socketio.emit('analysis_progress', {
+        'project': project_name,
+        **event,
+        'message': progress_message(event),
+        'progress': progress_percent(event),
+        **extra
+    }, room=f"project_{project_name}")
+
+# Per-job working directories (each worker downloads and converts in its own one)
+WORKDIR_ROOT = os.path.abspath('workdirs')
 
 class HateHunterQueueManager:
     def __init__(self):
         self.processing_lock = threading.Lock()
         self.is_running = True
-        self.check_interval = 2  # Check every 2 seconds
-        self.current_processing = None
+        self.check_interval = 30  # Fallback poll: jobs queued by other processes, expired leases
+        self.lease_renew_interval = 60  # Seconds between lease renewals of a running job
+        self.worker_id = worker_id()
+        
+        # Concurrency: jobs are network/API bound, so several can run at once
+        self.max_workers = int(os.environ.get('HATEHUNTER_WORKERS', 4))
+        self.per_project_limit = int(os.environ.get('HATEHUNTER_PROJECT_WORKERS', 2))  # 0 = no cap
+        self.running_jobs = {}  # job_id -> {'video_id', 'project', 'project_id', 'started_at'}
+        self.worker_pool = WorkerPool(max_idle=self.max_workers)
+        self.job_workers = {}  # job_id -> AnalysisWorker running it
+        self.stop_requests = {}  # job_id -> 'paused' or 'cancelled', for running jobs being stopped
+        
+        # Placeholder cards waiting for their metadata, looked up by one background worker
+        self.enrich_lock = threading.Lock()
+        self.enrich_pending = []  # (project_name, video_id)
+        self.enrich_running = False
+        
+        # Enqueues, finished jobs and resizes wake the dispatcher instead of waiting for the poll
+        self.wakeup = threading.Condition()
+        self.wakeup_pending = False
+    
+    def wake(self):
+        """Ask the dispatcher to look at the queue now"""
+        with self.wakeup:
+            self.wakeup_pending = True
+            self.wakeup.notify()
+    
+    def wait_for_work(self, timeout):
+        """Sleep until ``wake()`` is called or ``timeout`` seconds pass"""
+        with self.wakeup:
+            if not self.wakeup_pending:
+                self.wakeup.wait(timeout)
+            self.wakeup_pending = False
+    
+    @property
+    def current_processing(self):
+        """Video ids being analyzed right now"""
+        return [job['video_id'] for job in self.running_jobs.values()]
+    
+    def resize(self, max_workers=None, per_project_limit=None):
+        """Change the concurrency caps; running jobs finish, new ones follow the new caps"""
+        with self.processing_lock:
+            if max_workers is not None:
+                self.max_workers = max(int(max_workers), 0)
+                self.worker_pool.max_idle = self.max_workers
+            if per_project_limit is not None:
+                self.per_project_limit = max(int(per_project_limit), 0)
+        logger.info(f"Queue workers resized: max_workers={self.max_workers}, per_project_limit={self.per_project_limit}")
+        self.wake()
+    
+    def worker_status(self):
+        """Caps and running jobs, for the admin endpoint"""
+        return {
+            'max_workers': self.max_workers,
+            'per_project_limit': self.per_project_limit,
+            'running': len(self.running_jobs),
+            'jobs': [
+                {'job_id': job_id, **{key: value for key, value in job.items() if key != 'project_id'}}
+                for job_id, job in list(self.running_jobs.items())
+            ]
+        }
         
     def start_queue_processor(self):
         """Start the background queue processor"""
+        session = db.get_session()
+        try:
+            # Jobs left by a previous server run, and lines from the old queue file
+            recover_expired(session)
+            import_legacy_queue_file(session)
+        except Exception as e:
+            logger.error(f"Error recovering queue: {e}")
+            session.rollback()
+        finally:
+            session.close()
+        
         def queue_processor():
             while self.is_running:
                 try:
-                    self.process_queue_file()
-                    time.sleep(self.check_interval)
+                    self.process_queue()
+                    self.wait_for_work(self.check_interval)
                 except Exception as e:
                     logger.error(f"Error in queue processor: {e}")
                     time.sleep(10)  # Wait longer on error
@@ -77,141 +192,264 @@ class HateHunterQueueManager:
         thread.start()
         logger.info("HateHunter queue processor started")
     
-    def process_queue_file(self):
-        """Process the hatehunter.tmp file"""
+    def process_queue(self):
+        """Claim queued jobs from the database until the worker caps are reached"""
         with self.processing_lock:
-            try:
-                # Check if queue file exists
-                if not os.path.exists(QUEUE_FILE):
+            while self.is_running and len(self.running_jobs) < self.max_workers:
+                if not self.start_next_job():
                     return
-                
-                # Read all lines from the queue file
-                with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
-                    lines = [line.strip() for line in f.readlines() if line.strip()]
-                
-                if not lines:
-                    # Empty file, remove it
-                    os.remove(QUEUE_FILE)
-                    logger.info("Empty queue file removed")
-                    return
-                
-                # If we're already processing something, don't start new
-                if self.current_processing:
+    
+    def start_next_job(self):
+        """Claim and start one job; False when nothing can be started"""
+        # Projects already at their cap are skipped, so one big channel cannot starve the rest
+        per_project = {}
+        for job in self.running_jobs.values():
+            per_project[job['project_id']] = per_project.get(job['project_id'], 0) + 1
+        exclude = set()
+        if self.per_project_limit:
+            exclude = {project_id for project_id, count in per_project.items() if count >= self.per_project_limit}
+        
+        session = db.get_session()
+        try:
+            recover_expired(session)
+            job = claim_next(session, self.worker_id, exclude_projects=exclude)
+            if not job:
+                return False
+            
+            job_id = job.id
+            project_id = job.project_id
+            video_id = job.video.video_id
+            project_name = job.project.name
+            args = (job.analysis_params or {}).get('args', [])
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error claiming queue job: {e}")
+            return False
+        finally:
+            session.close()
+        
+        logger.info(f"🚀 Starting queue processing for video: {video_id} in project: {project_name} ({len(self.running_jobs) + 1}/{self.max_workers} workers)")
+        
+        # Update video status to processing
+        self.update_video_status(project_name, video_id, 'processing')
+        
+        # Start processing the job
+        self.running_jobs[job_id] = {
+            'video_id': video_id,
+            'project': project_name,
+            'project_id': project_id,
+            'started_at': datetime.utcnow().isoformat()
+        }
+        self.execute_job(job_id, args, project_name, video_id)
+        return True
+    
+    def renew_lease_while_running(self, job_id, done):
+        """Keep the lease of a running job alive until ``done`` is set"""
+        while not done.wait(self.lease_renew_interval):
+            session = db.get_session()
+            try:
+                if not renew_lease(session, job_id, self.worker_id):
+                    logger.warning(f"Lost the lease of queue job {job_id}")
                     return
-                
-                # Get the first command
-                command = lines[0]
-                remaining_lines = lines[1:]
-                
-                # Extract video ID from command for tracking
-                video_id = self.extract_video_id_from_command(command)
-                project_name = self.extract_project_from_command(command)
-                
-                logger.info(f"🚀 Starting queue processing for video: {video_id} in project: {project_name}")
-                
-                # Update video status to processing
-                if video_id and project_name:
-                    self.update_video_status(project_name, video_id, 'processing')
-                
-                # Remove the first line from file (write remaining lines back)
-                if remaining_lines:
-                    with open(QUEUE_FILE, 'w', encoding='utf-8') as f:
-                        f.write('\n'.join(remaining_lines) + '\n')
-                else:
-                    # No more lines, remove file
-                    os.remove(QUEUE_FILE)
-                    logger.info("Queue file processed completely and removed")
-                
-                # Start processing the command
-                self.current_processing = video_id
-                self.execute_command(command, project_name, video_id)
-                
             except Exception as e:
-                logger.error(f"Error processing queue file: {e}")
+                session.rollback()
+                logger.error(f"Error renewing lease of job {job_id}: {e}")
+            finally:
+                session.close()
+    
+    def finish_job(self, job_id, status, error_message=None):
+        """Record the final state of a queue job"""
+        session = db.get_session()
+        try:
+            finish(session, job_id, self.worker_id, status, error_message)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error finishing queue job {job_id}: {e}")
+        finally:
+            session.close()
     
-    def execute_command(self, command, project_name, video_id):
-        """Execute a hatehunter command in a separate thread"""
+    def fail_job(self, job_id, project_name, video_id, error_message, retryable=True):
+        """Requeue a failed job while it has retries left, otherwise mark it failed.
+        
+        Returns True when the job will be retried.
+        """
+        session = db.get_session()
+        try:
+            if retryable:
+                status = retry_or_fail(session, job_id, self.worker_id, error_message)
+            else:
+                finish(session, job_id, self.worker_id, 'failed', error_message)
+                status = 'failed'
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error recording failure of queue job {job_id}: {e}")
+            status = None
+        finally:
+            session.close()
+        
+        if status == 'queued':
+            self.update_video_status(project_name, video_id, 'queued')
+            logger.warning(f"🔁 Queue analysis failed for {video_id}, will retry from its checkpoint: {error_message}")
+            return True
+        self.update_video_status(project_name, video_id, 'failed', error_message)
+        logger.error(f"❌ Queue analysis failed for {video_id}: {error_message}")
+        return False
+    
+    def execute_job(self, job_id, args, project_name, video_id):
+        """Execute a hatehunter job in a separate thread"""
         def run_command():
+            lease_done = threading.Event()
+            threading.Thread(
+                target=self.renew_lease_while_running,
+                args=(job_id, lease_done),
+                daemon=True
+            ).start()
+            workdir = os.path.join(WORKDIR_ROOT, f'job_{job_id}')
+            worker = None
+            stop = None
+            retrying = False
             try:
-                logger.info(f"🔄 Executing: {command}")
-                
-                # Split command into arguments
-                cmd_args = command.split()
-                
-                # Run the command
-                process = subprocess.Popen(
-                    cmd_args,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1,
-                    cwd=os.getcwd()
-                )
+                # A warm worker process runs the job, only the arguments come from the queue
+                worker = self.worker_pool.acquire()
+                self.job_workers[job_id] = worker
+                if job_id in self.stop_requests:
+                    # Stopped while waiting for the worker: nothing ran, keep the worker warm
+                    self.worker_pool.release(worker)
+                    worker = None
+                    logger.info(f"Job {job_id} for {video_id} was stopped before it started")
+                    return
+                logger.info(f"🔄 Executing job {job_id} on worker {worker.pid}: hatehunter.py {' '.join(args)}")
                 
-                # Monitor progress
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        line = output.strip()
-                        if line:
-                            logger.info(f"Queue-analysis [{video_id}]: {line}")
+                def on_event(event):
+                    self.running_jobs.get(job_id, {})['progress'] = event
+                    forward_progress(project_name, job_id, event, video_id=video_id)
                 
-                # Wait for completion
-                return_code = process.wait()
-                logger.info(f"Queue analysis for {video_id} completed with return code: {return_code}")
+                result = worker.run(job_id, list(args) + ['--workdir', workdir], label=video_id, on_event=on_event)
+                self.worker_pool.release(worker)
+                worker = None
+                logger.info(f"Queue analysis for {video_id} finished: {result['status']}")
                 
                 # Update video status based on result
-                if return_code == 0:
+                if result['status'] == 'completed':
+                    self.stop_requests.pop(job_id, None)  # Finished before the stop took effect
+                    self.finish_job(job_id, 'completed')
                     self.update_video_status(project_name, video_id, 'completed')
                     logger.info(f"✅ Queue analysis completed successfully for {video_id}")
                     
                     # Notify clients about completion
                     self.notify_analysis_complete(project_name, video_id)
-                else:
-                    self.update_video_status(project_name, video_id, 'failed', f'Analysis failed with return code {return_code}')
-                    logger.error(f"❌ Queue analysis failed for {video_id}")
+                elif job_id not in self.stop_requests:
+                    retrying = self.fail_job(
+                        job_id, project_name, video_id,
+                        result.get('error') or 'Analysis failed',
+                        retryable=result.get('retryable', True)
+                    )
                 
             except Exception as e:
-                logger.error(f"Error executing command for {video_id}: {e}")
-                self.update_video_status(project_name, video_id, 'failed', str(e))
+                if job_id not in self.stop_requests:
+                    logger.error(f"Error executing job for {video_id}: {e}")
+                    retrying = self.fail_job(job_id, project_name, video_id, str(e))
             
             finally:
+                lease_done.set()
+                self.job_workers.pop(job_id, None)
+                stop = self.stop_requests.pop(job_id, None)
+                if stop:
+                    self.record_stop(job_id, project_name, video_id, stop)
+                if worker:
+                    # The job blew up mid-way, don't hand this worker to the next one
+                    self.worker_pool.discard(worker)
+                # A paused or retried job keeps its downloads for the next run
+                if '--keep-json' not in args and stop != 'paused' and not retrying:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                progress_throttle.forget(job_id)
                 # Mark as no longer processing
-                self.current_processing = None
+                self.running_jobs.pop(job_id, None)
                 logger.info(f"Finished processing {video_id}, ready for next item")
+                self.wake()
         
         # Start command execution in background thread
         command_thread = threading.Thread(target=run_command, daemon=True)
         command_thread.start()
     
-    def extract_video_id_from_command(self, command):
-        """Extract video ID from hatehunter command"""
+    def record_stop(self, job_id, project_name, video_id, status):
+        """Record a running job stopped by the user: paused jobs wait to be resumed"""
+        session = db.get_session()
         try:
-            # Look for --video parameter
-            parts = command.split()
-            for i, part in enumerate(parts):
-                if part == '--video' and i + 1 < len(parts):
-                    video_url = parts[i + 1]
-                    return self.extract_video_id_from_url(video_url)
-            return None
+            if status == 'paused':
+                release(session, job_id, self.worker_id, status='paused')
+            else:
+                finish(session, job_id, self.worker_id, 'cancelled', 'Cancelled by user')
         except Exception as e:
-            logger.error(f"Error extracting video ID from command: {e}")
-            return None
+            session.rollback()
+            logger.error(f"Error recording stop of queue job {job_id}: {e}")
+        finally:
+            session.close()
+        
+        error_message = 'Cancelled during analysis, results may be partial' if status == 'cancelled' else None
+        self.update_video_status(project_name, video_id, status, error_message)
+        logger.info(f"⏹️ Queue job {job_id} for {video_id} {status} while running")
+    
+    def stop_running(self, project_id, status, video_id=None):
+        """Terminate the running jobs of a project (or of one video); returns how many"""
+        stopped = 0
+        for job_id, job in list(self.running_jobs.items()):
+            if job['project_id'] != project_id or (video_id and job['video_id'] != video_id):
+                continue
+            self.stop_requests[job_id] = status
+            worker = self.job_workers.get(job_id)
+            if worker:
+                worker.terminate()
+            stopped += 1
+        return stopped
     
-    def extract_project_from_command(self, command):
-        """Extract project name from hatehunter command"""
+    def control_jobs(self, project_name, action, video_id=None):
+        """Pause, resume or cancel the jobs of a project, or of one of its videos.
+        
+        Waiting jobs change state in the database, running ones have their worker
+        terminated. Returns the number of jobs affected, or None if the project or
+        video does not exist.
+        """
+        transitions = {
+            'pause': (('queued',), 'paused'),
+            'resume': (('paused',), 'queued'),
+            'cancel': (('queued', 'paused'), 'cancelled')
+        }
+        from_statuses, status = transitions[action]
+        
+        session = db.get_session()
         try:
-            # Look for --project parameter
-            parts = command.split()
-            for i, part in enumerate(parts):
-                if part == '--project' and i + 1 < len(parts):
-                    return parts[i + 1]
-            return None
-        except Exception as e:
-            logger.error(f"Error extracting project from command: {e}")
-            return None
+            project = session.query(Project).filter_by(name=project_name).first()
+            if not project:
+                return None
+            project_id = project.id
+            video_ids = None
+            if video_id:
+                video = session.query(Video).filter_by(project_id=project.id, video_id=video_id).first()
+                if not video:
+                    return None
+                video_ids = [video.id]
+            changed = set_job_status(session, project_id, from_statuses, status, video_ids)
+        finally:
+            session.close()
+        
+        for _, changed_video_id in changed:
+            self.update_video_status(project_name, changed_video_id, status)
+        
+        affected = len(changed)
+        if action == 'resume':
+            if changed:
+                self.wake()
+        else:
+            affected += self.stop_running(project_id, status, video_id)
+        
+        if action == 'cancel' and not video_id and project_name in analysis_processes:
+            # A one-shot run started from the analyze endpoint (e.g. listing a channel)
+            analysis_processes[project_name].terminate()
+            affected += 1
+        
+        logger.info(f"{action.capitalize()} {project_name}{f' / {video_id}' if video_id else ''}: {affected} jobs")
+        return affected
     
     def extract_video_id_from_url(self, url):
         """Extract video ID from YouTube URL"""
@@ -258,7 +496,7 @@ class HateHunterQueueManager:
                     elif status == 'completed':
                         video.processing_completed_at = datetime.utcnow()
                         video.processing_error = None
-                    elif status == 'failed':
+                    elif status in ('failed', 'cancelled'):
                         video.processing_error = error_message
                     
                     session.commit()
@@ -297,6 +535,9 @@ class HateHunterQueueManager:
                 ).first()
                 
                 if video:
+                    # New rows invalidate the cached listing totals
+                    invalidate_counts(project.id)
+                    
                     # Get flag counts
                     subtitle_count = session.query(SubtitleFlag).filter_by(
                         project_id=project.id,
@@ -324,192 +565,235 @@ class HateHunterQueueManager:
         except Exception as e:
             logger.error(f"Error notifying analysis complete: {e}")
     
-    def add_commands_to_queue(self, commands):
-        """Add commands to the queue file"""
-        try:
-            # Append commands to the queue file
-            with open(QUEUE_FILE, 'a', encoding='utf-8') as f:
-                for command in commands:
-                    f.write(command + '\n')
-            
-            logger.info(f"Added {len(commands)} commands to queue file")
-            
-            # Immediately create video cards for queued videos
-            self.create_queued_video_cards(commands)
-            
-        except Exception as e:
-            logger.error(f"Error adding commands to queue: {e}")
-            raise
-    
-    def create_queued_video_cards(self, commands):
-        """Create video cards in 'queued' status for each command"""
-        try:
-            for command in commands:
-                video_id = self.extract_video_id_from_command(command)
-                project_name = self.extract_project_from_command(command)
-                
-                if video_id and project_name:
-                    # Check if video already exists, if not create it
-                    self.ensure_video_exists(project_name, video_id)
-                    # Update status to queued
-                    self.update_video_status(project_name, video_id, 'queued')
-        except Exception as e:
-            logger.error(f"Error creating queued video cards: {e}")
-    
-    def ensure_video_exists(self, project_name, video_id):
-        """Ensure video exists in database, create if not"""
+    def add_commands_to_queue(self, commands, priority=0):
+        """Add hatehunter commands to the database queue.
+        
+        New videos get lightweight placeholder cards, created with their jobs in one
+        transaction so the request returns right away. Their metadata is looked up
+        afterwards by ``enrich_metadata`` and pushed to the browsers.
+        """
+        jobs = []
+        seen = set()
+        for command in commands:
+            args = parse_command(command)
+            video_id = self.extract_video_id_from_url(command_option(args, '--video'))
+            project_name = command_option(args, '--project')
+            if not video_id or not project_name:
+                raise ValueError(f"Command needs --project and --video: {command}")
+            if (project_name, video_id) not in seen:
+                seen.add((project_name, video_id))
+                jobs.append((project_name, video_id, args))
+        
+        added = []  # (project_name, card data) of the new placeholders
+        requeued = []  # (project_name, video_id, old status) of existing videos
+        queued = 0
+        session = db.get_session()
         try:
-            session = db.get_session()
-            try:
-                # Get or create project
+            projects = {}
+            for project_name in dict.fromkeys(name for name, _, _ in jobs):
                 project = session.query(Project).filter_by(name=project_name).first()
                 if not project:
                     project = Project(name=project_name)
                     session.add(project)
                     session.flush()
-                
-                # Check if video exists
-                video = session.query(Video).filter_by(
-                    project_id=project.id,
-                    video_id=video_id
-                ).first()
-                
-                if not video:
-                    # Fetch basic metadata
-                    metadata = self.fetch_video_metadata(video_id)
-                    
-                    # Create video
+                projects[project_name] = project
+            
+            videos = {}
+            for project_name, project in projects.items():
+                video_ids = [video_id for name, video_id, _ in jobs if name == project_name]
+                for video in session.query(Video).filter(
+                    Video.project_id == project.id,
+                    Video.video_id.in_(video_ids)
+                ):
+                    videos[(project_name, video.video_id)] = video
+            
+            for project_name, video_id, args in jobs:
+                project = projects[project_name]
+                video = videos.get((project_name, video_id))
+                if video is None:
+                    # Create the video card first, the job references it
                     video = Video(
                         project_id=project.id,
                         video_id=video_id,
-                        title=metadata['title'],
-                        uploader=metadata['uploader'],
-                        upload_date=metadata['upload_date'],
-                        view_count=metadata['view_count'],
-                        comment_count=metadata['comment_count'],
-                        duration=metadata['duration'],
-                        thumbnail=metadata['thumbnail'],
+                        title=f'Video {video_id}',
+                        thumbnail=f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",
                         webpage_url=f"https://www.youtube.com/watch?v={video_id}",
-                        processing_status='pending'
+                        processing_status='queued'
                     )
                     session.add(video)
-                    session.commit()
-                    
-                    logger.info(f"Created video card for {video_id}")
-                    
-                    # Notify clients about new video
-                    video_data = {
-                        'id': video.video_id,
-                        'title': video.title,
-                        'uploader': video.uploader,
-                        'upload_date': video.upload_date,
-                        'duration': video.duration,
-                        'view_count': video.view_count,
-                        'comment_count': video.comment_count,
-                        'thumbnail': video.thumbnail,
-                        'webpage_url': video.webpage_url,
-                        'flagged_subtitles': 0,
-                        'flagged_comments': 0,
-                        'processing_status': 'pending'
-                    }
-                    
-                    ws_handler.notify_video_added(project_name, video_data)
+                    session.flush()
+                    added.append((project_name, video_card(video)))
                 
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Error ensuring video exists: {e}")
-            finally:
-                session.close()
+                _, created = enqueue(session, project, video, args, priority=priority)
+                queued += created
+                if created and video.processing_status != 'queued':
+                    requeued.append((project_name, video_id, video.processing_status))
+                    video.processing_status = 'queued'
+                    video.processing_error = None
+            
+            session.commit()
         except Exception as e:
-            logger.error(f"Error in ensure_video_exists: {e}")
+            session.rollback()
+            logger.error(f"Error queueing videos: {e}")
+            raise
+        finally:
+            session.close()
+        
+        for project_name, card in added:
+            ws_handler.notify_video_added(project_name, card)
+        for project_name, video_id, old_status in requeued:
+            ws_handler.notify_video_status_changed(project_name, video_id, old_status, 'queued')
+        self.enrich_metadata([(project_name, card['id']) for project_name, card in added])
+        
+        logger.info(f"Added {queued} jobs to the queue ({len(jobs) - queued} already queued)")
+        if queued:
+            self.wake()
+        return queued
+    
+    def enrich_metadata(self, videos):
+        """Look up the metadata of placeholder cards, ``(project_name, video_id)`` pairs, in the background"""
+        if not videos:
+            return
+        with self.enrich_lock:
+            self.enrich_pending.extend(videos)
+            if self.enrich_running:
+                return
+            self.enrich_running = True
+        threading.Thread(target=self.enrich_worker, daemon=True).start()
+    
+    def enrich_worker(self):
+        # Everything queued meanwhile goes into the next batch
+        while True:
+            with self.enrich_lock:
+                batch, self.enrich_pending = self.enrich_pending, []
+                if not batch:
+                    self.enrich_running = False
+                    return
+            try:
+                self.enrich_batch(batch)
+            except Exception as e:
+                logger.error(f"Error enriching video metadata: {e}")
     
-    def fetch_video_metadata(self, video_id):
-        """Fetch basic video metadata using yt-dlp"""
+    def enrich_batch(self, batch):
+        """Fill placeholder cards from the metadata store (one concurrent lookup) and push them"""
+        updates = []
+        session = db.get_session()
         try:
-            cmd = [
-                "yt-dlp",
-                "--write-info-json",
-                "--skip-download",
-                "--print", "%(title)s|%(uploader)s|%(upload_date)s|%(view_count)s|%(comment_count)s|%(duration)s|%(thumbnail)s",
-                f"https://www.youtube.com/watch?v={video_id}"
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                # Parse the output
-                output = result.stdout.strip()
-                parts = output.split('|')
+            metadata = get_metadata(session, [video_id for _, video_id in batch])
+            for project_name, video_id in batch:
+                fresh = metadata.get(video_id)
+                if not fresh:
+                    continue
+                video = session.query(Video).join(Project).filter(
+                    Project.name == project_name,
+                    Video.video_id == video_id
+                ).first()
+                if not video:
+                    continue  # Deleted in the meantime
                 
-                if len(parts) >= 7:
-                    title, uploader, upload_date, view_count, comment_count, duration, thumbnail = parts[:7]
-                    
-                    # Format upload date
-                    if upload_date and len(upload_date) == 8:
-                        upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                    
-                    # Format duration
-                    if duration and duration.isdigit():
-                        duration_sec = int(duration)
-                        hours, remainder = divmod(duration_sec, 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        if hours:
-                            duration = f"{hours}:{minutes:02d}:{seconds:02d}"
-                        else:
-                            duration = f"{minutes}:{seconds:02d}"
-                    
-                    # Format counts
-                    def format_count(count):
-                        if count and count.isdigit():
-                            count = int(count)
-                            if count >= 1000000:
-                                return f"{count/1000000:.1f}M"
-                            elif count >= 1000:
-                                return f"{count/1000:.1f}K"
-                            else:
-                                return str(count)
-                        return count or ''
-                    
-                    return {
-                        'title': title or f'Video {video_id}',
-                        'uploader': uploader or '',
-                        'upload_date': upload_date or '',
-                        'view_count': format_count(view_count),
-                        'comment_count': format_count(comment_count),
-                        'duration': duration or '',
-                        'thumbnail': thumbnail or f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
-                    }
-            
-            # Fallback if parsing fails
-            return {
-                'title': f'Video {video_id}',
-                'uploader': '',
-                'upload_date': '',
-                'view_count': '',
-                'comment_count': '',
-                'duration': '',
-                'thumbnail': f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
-            }
+                card = {field: fresh[field] for field in CARD_METADATA_FIELDS if fresh.get(field)}
+                for field, value in card.items():
+                    setattr(video, field, value)
+                thumbnail_fetcher.submit_video(video_id)
+                thumbnail_fetcher.submit_avatar(fresh.get('uploader_avatar'))
+                updates.append((project_name, video_id, video.processing_status, card))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        
+        # Same status before and after: the browsers only merge the new card data
+        for project_name, video_id, status, card in updates:
+            ws_handler.notify_video_status_changed(project_name, video_id, status, status, card)
+        logger.info(f"Enriched metadata of {len(updates)}/{len(batch)} queued videos")
+    
+    def refresh_project_metadata(self, project_name):
+        """Refresh stale metadata (counters included) of every video of a project in one batch"""
+        session = db.get_session()
+        try:
+            project = session.query(Project).filter_by(name=project_name).first()
+            if not project:
+                return 0
+            videos = session.query(Video).filter_by(project_id=project.id).all()
+            metadata = refresh_metadata(session, [video.video_id for video in videos])
             
+            updated = 0
+            for video in videos:
+                fresh = metadata.get(video.video_id)
+                if not fresh:
+                    continue
+                for field in CARD_METADATA_FIELDS:
+                    if fresh.get(field) and getattr(video, field) != fresh[field]:
+                        setattr(video, field, fresh[field])
+                        updated += 1
+            session.commit()
         except Exception as e:
-            logger.error(f"Error fetching metadata for {video_id}: {e}")
-            return {
-                'title': f'Video {video_id}',
-                'uploader': '',
-                'upload_date': '',
-                'view_count': '',
-                'comment_count': '',
-                'duration': '',
-                'thumbnail': f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
-            }
+            session.rollback()
+            logger.error(f"Error refreshing metadata of {project_name}: {e}")
+            return 0
+        finally:
+            session.close()
+        
+        logger.info(f"Refreshed metadata of {len(metadata)} videos in {project_name} ({updated} fields changed)")
+        if updated:
+            socketio.emit('data_updated', {
+                'project': project_name,
+                'type': 'metadata_refreshed'
+            }, room=f"project_{project_name}")
+        return len(metadata)
+    
+    def queue_positions(self, session):
+        """Position and estimated start of every queued job under the current caps"""
+        return queue_positions(
+            session,
+            self.max_workers,
+            self.per_project_limit,
+            job_seconds=average_job_seconds(session)
+        )
     
     def stop(self):
-        """Stop the queue processor"""
+        """Stop the queue processor and hand running jobs back to the queue"""
         self.is_running = False
+        self.wake()
+        session = db.get_session()
+        try:
+            for job_id in list(self.running_jobs):
+                release(session, job_id, self.worker_id)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error releasing running jobs: {e}")
+        finally:
+            session.close()
+        self.worker_pool.stop_all()
 
 # Initialize queue manager
 queue_manager = HateHunterQueueManager()
 
+# Thumbnails and avatars for the local image cache, downloaded in the background
+thumbnail_fetcher = ThumbnailFetcher()
+
+# Card fields filled in from the metadata store once a placeholder is created
+CARD_METADATA_FIELDS = ('title', 'uploader', 'upload_date', 'duration', 'view_count', 'like_count', 'comment_count')
+
+def video_card(video):
+    """Data of a video card as sent in video_added events"""
+    return {
+        'id': video.video_id,
+        'title': video.title,
+        'uploader': video.uploader,
+        'upload_date': video.upload_date,
+        'duration': video.duration,
+        'view_count': video.view_count,
+        'comment_count': video.comment_count,
+        'thumbnail': video_thumbnail_path(video.video_id),
+        'webpage_url': video.webpage_url,
+        'flagged_subtitles': video.flagged_subtitles or 0,
+        'flagged_comments': video.flagged_comments or 0,
+        'processing_status': video.processing_status
+    }
+
 def extract_video_id(url_or_id):
     """Extract video ID from YouTube URL or return the ID if already extracted"""
     if not url_or_id:
@@ -530,600 +814,48 @@ def extract_video_id(url_or_id):
     
     return url_or_id
 
-def escape_html(text):
-    """Escape HTML characters"""
-    if not text:
-        return ''
-    
-    html_escape_table = {
-        "&": "&amp;",
-        '"': "&quot;",
-        "'": "&#x27;",
-        ">": "&gt;",
-        "<": "&lt;",
-    }
-    
-    return "".join(html_escape_table.get(c, c) for c in str(text))
-
-def format_categories(categories):
-    """Format categories with proper HTML tags"""
-    if not categories:
-        return 'None'
-    
-    tags = []
-    for cat in categories.split(','):
-        cat = cat.strip()
-        if not cat:
-            continue
-            
-        class_name = ''
-        if 'hate' in cat.lower():
-            class_name = 'hate'
-        elif 'harassment' in cat.lower():
-            class_name = 'harassment'
-        elif 'violence' in cat.lower():
-            class_name = 'violence'
-        
-        tags.append(f'<span class="category-tag {class_name}">{escape_html(cat)}</span>')
-    
-    return ''.join(tags) if tags else 'None'
-
-def generate_html_report(project, reported_videos):
-    """Generate the HTML report content with proper video metadata and thumbnails"""
-    from datetime import datetime
-    
-    # Calculate totals
-    total_videos = len(reported_videos)
-    total_subtitles = sum(len(data['subtitles']) for data in reported_videos.values())
-    total_comments = sum(len(data['comments']) for data in reported_videos.values())
-    
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>HateHunter Report - {project.name}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            background-color: #f8fafc;
-            color: #334155;
-        }}
-        .report-header {{
-            background: linear-gradient(135deg, #3b82f6 0%, #1e40af 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 12px;
-            margin-bottom: 30px;
-            text-align: center;
-        }}
-        .report-header h1 {{
-            margin: 0 0 10px 0;
-            font-size: 2.5em;
-            font-weight: 700;
-        }}
-        .report-summary {{
-            background: white;
-            padding: 25px;
-            border-radius: 8px;
-            margin-bottom: 30px;
-            box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-        }}
-        .summary-stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-top: 20px;
-        }}
-        .stat-box {{
-            background: #f1f5f9;
-            padding: 20px;
-            border-radius: 8px;
-            text-align: center;
-        }}
-        .stat-number {{
-            font-size: 2em;
-            font-weight: bold;
-            color: #3b82f6;
-        }}
-        .stat-label {{
-            color: #64748b;
-            font-size: 0.9em;
-            margin-top: 5px;
-        }}
-        
-        /* Nueva tabla de resumen de videos */
-        .videos-summary {{
-            background: white;
-            margin-bottom: 30px;
-            border-radius: 8px;
-            box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-            overflow: hidden;
-        }}
-        .videos-summary h2 {{
-            background: #1e293b;
-            color: white;
-            padding: 20px;
-            margin: 0;
-            font-size: 1.5em;
-            font-weight: 600;
-        }}
-        .videos-summary-table {{
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        .videos-summary-table th {{
-            background: #f8fafc;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-            color: #374151;
-            border-bottom: 2px solid #e5e7eb;
-        }}
-        .videos-summary-table td {{
-            padding: 12px;
-            border-bottom: 1px solid #f3f4f6;
-            vertical-align: top;
-        }}
-        .videos-summary-table tr:hover {{
-            background-color: #f9fafb;
-        }}
-        .video-thumbnail-cell {{
-            width: 120px;
-            text-align: center;
-        }}
-        .video-thumbnail-img {{
-            width: 100px;
-            height: 56px;
-            object-fit: cover;
-            border-radius: 6px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-        }}
-        .video-info-cell {{
-            max-width: 300px;
-        }}
-        .video-title {{
-            font-weight: 600;
-            margin-bottom: 5px;
-            color: #1e293b;
-        }}
-        .video-meta {{
-            font-size: 0.9em;
-            color: #64748b;
-        }}
-        .flags-count {{
-            text-align: center;
-            font-weight: 600;
-        }}
-        .flags-count.subtitles {{
-            color: #3b82f6;
-        }}
-        .flags-count.comments {{
-            color: #059669;
-        }}
-        .flags-count.total {{
-            color: #dc2626;
-            font-size: 1.1em;
-        }}
-        
-        .video-section {{
-            background: white;
-            margin-bottom: 30px;
-            border-radius: 8px;
-            box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-            overflow: hidden;
-        }}
-        .video-header {{
-            background: #1e293b;
-            color: white;
-            padding: 20px;
-        }}
-        .video-title {{
-            font-size: 1.5em;
-            font-weight: 600;
-            margin-bottom: 10px;
-        }}
-        .video-meta {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }}
-        .meta-item {{
-            display: flex;
-            flex-direction: column;
-        }}
-        .meta-label {{
-            font-size: 0.85em;
-            opacity: 0.8;
-            margin-bottom: 3px;
-        }}
-        .meta-value {{
-            font-weight: 500;
-        }}
-        .meta-value.unknown {{
-            color: #94a3b8;
-            font-style: italic;
-        }}
-        .content-section {{
-            padding: 25px;
-        }}
-        .section-title {{
-            font-size: 1.3em;
-            font-weight: 600;
-            margin-bottom: 15px;
-            color: #1e293b;
-            border-bottom: 2px solid #e2e8f0;
-            padding-bottom: 5px;
-        }}
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 25px;
-            background: white;
-            border-radius: 6px;
-            overflow: hidden;
-        }}
-        th {{
-            background: #f8fafc;
-            padding: 12px;
-            text-align: left;
-            font-weight: 600;
-            color: #374151;
-            border-bottom: 2px solid #e5e7eb;
-        }}
-        td {{
-            padding: 12px;
-            border-bottom: 1px solid #f3f4f6;
-            vertical-align: top;
-        }}
-        tr:hover {{
-            background-color: #f9fafb;
-        }}
-        .timestamp {{
-            background: #dbeafe;
-            color: #1e40af;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-family: monospace;
-            font-size: 0.9em;
-        }}
-        .category-tag {{
-            background: #fef3c7;
-            color: #92400e;
-            padding: 2px 6px;
-            border-radius: 4px;
-            font-size: 0.8em;
-            margin-right: 4px;
-        }}
-        .category-tag.hate {{
-            background: #fecaca;
-            color: #991b1b;
-        }}
-        .category-tag.harassment {{
-            background: #fed7aa;
-            color: #c2410c;
-        }}
-        .category-tag.violence {{
-            background: #fca5a5;
-            color: #dc2626;
-        }}
-        .youtube-link {{
-            color: #3b82f6;
-            text-decoration: none;
-            font-weight: 500;
-            padding: 6px 12px;
-            background: #eff6ff;
-            border-radius: 6px;
-            display: inline-block;
-            transition: all 0.2s;
-        }}
-        .youtube-link:hover {{
-            background: #dbeafe;
-            transform: translateY(-1px);
-        }}
-        .author-info {{
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-        .author-thumbnail {{
-            width: 32px;
-            height: 32px;
-            border-radius: 50%;
-            object-fit: cover;
-        }}
-        .no-content {{
-            text-align: center;
-            color: #64748b;
-            font-style: italic;
-            padding: 20px;
-        }}
-        .report-footer {{
-            text-align: center;
-            margin-top: 40px;
-            padding: 20px;
-            color: #64748b;
-            font-size: 0.9em;
-        }}
-        @media (max-width: 768px) {{
-            body {{ padding: 10px; }}
-            .video-meta {{ grid-template-columns: 1fr; }}
-            .summary-stats {{ grid-template-columns: 1fr; }}
-            table {{ font-size: 0.9em; }}
-            th, td {{ padding: 8px; }}
-            .videos-summary-table th, 
-            .videos-summary-table td {{ padding: 8px; }}
-            .video-thumbnail-img {{
-                width: 80px;
-                height: 45px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="report-header">
-        <h1>🎯 HateHunter Report</h1>
-        <p>Content Moderation Analysis for Project: <strong>{escape_html(project.name)}</strong></p>
-        <p>Generated on {datetime.now().strftime('%Y-%m-%d at %H:%M:%S')}</p>
-    </div>
-
-    <div class="report-summary">
-        <h2>📊 Executive Summary</h2>
-        <p>This report contains flagged content from YouTube videos that have been analyzed for hate speech, harassment, and other harmful content using AI-powered moderation.</p>
-        
-        <div class="summary-stats">
-            <div class="stat-box">
-                <div class="stat-number">{total_videos}</div>
-                <div class="stat-label">Videos with Reported Content</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">{total_subtitles}</div>
-                <div class="stat-label">Reported Subtitle Segments</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">{total_comments}</div>
-                <div class="stat-label">Reported Comments</div>
-            </div>
-            <div class="stat-box">
-                <div class="stat-number">{total_subtitles + total_comments}</div>
-                <div class="stat-label">Total Flagged Items</div>
-            </div>
-        </div>
-    </div>
-
-    <!-- Nueva tabla de resumen de videos con miniaturas -->
-    <div class="videos-summary">
-        <h2>📹 Videos Summary</h2>
-        <table class="videos-summary-table">
-            <thead>
-                <tr>
-                    <th class="video-thumbnail-cell">Thumbnail</th>
-                    <th class="video-info-cell">Video Information</th>
-                    <th>Subtitle Flags</th>
-                    <th>Comment Flags</th>
-                    <th>Total Flags</th>
-                </tr>
-            </thead>
-            <tbody>
-"""
-
-    # Add videos summary table rows
-    for video_id, data in reported_videos.items():
-        video = data['video']
-        subtitles_count = len(data['subtitles'])
-        comments_count = len(data['comments'])
-        total_flags = subtitles_count + comments_count
-        
-        # Prepare metadata with proper fallbacks
-        title = escape_html(video.title) if video.title else f'Video {video_id}'
-        uploader = escape_html(video.uploader) if video.uploader else 'Unknown Channel'
-        upload_date = escape_html(video.upload_date) if video.upload_date else 'Unknown Date'
-        duration = escape_html(video.duration) if video.duration else 'Unknown Duration'
-        view_count = escape_html(str(video.view_count)) if video.view_count else 'Unknown Views'
-        
-        # Thumbnail URL - use video thumbnail if available, fallback to YouTube default
-        thumbnail_url = escape_html(video.thumbnail) if video.thumbnail else f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
-        
-        html += f"""
-                <tr>
-                    <td class="video-thumbnail-cell">
-                        <img src="{thumbnail_url}" 
-                             alt="Video thumbnail" 
-                             class="video-thumbnail-img"
-                             onerror="this.src='https://img.youtube.com/vi/{video_id}/mqdefault.jpg'">
-                    </td>
-                    <td class="video-info-cell">
-                        <div class="video-title">{title}</div>
-                        <div class="video-meta">
-                            <div><strong>Channel:</strong> {uploader}</div>
-                            <div><strong>ID:</strong> {escape_html(video.video_id)}</div>
-                            <div><strong>Date:</strong> {upload_date}</div>
-                            <div><strong>Duration:</strong> {duration}</div>
-                            <div><strong>Views:</strong> {view_count}</div>
-                        </div>
-                    </td>
-                    <td class="flags-count subtitles">{subtitles_count}</td>
-                    <td class="flags-count comments">{comments_count}</td>
-                    <td class="flags-count total">{total_flags}</td>
-                </tr>
-"""
-
-    html += """
-            </tbody>
-        </table>
-    </div>
-"""
-
-    # Add each video section (existing code continues...)
-    for video_id, data in reported_videos.items():
-        video = data['video']
-        subtitles = data['subtitles']
-        comments = data['comments']
-        
-        # Prepare metadata with proper fallbacks but show actual data when available
-        title = escape_html(video.title) if video.title else f'Video {video_id}'
-        uploader = escape_html(video.uploader) if video.uploader else '<span class="unknown">Channel information not available</span>'
-        upload_date = escape_html(video.upload_date) if video.upload_date else '<span class="unknown">Upload date not available</span>'
-        duration = escape_html(video.duration) if video.duration else '<span class="unknown">Duration not available</span>'
-        view_count = escape_html(str(video.view_count)) if video.view_count else '<span class="unknown">View count not available</span>'
-        comment_count = escape_html(str(video.comment_count)) if video.comment_count else '<span class="unknown">Comment count not available</span>'
-        
-        # Video metadata section
-        html += f"""
-    <div class="video-section">
-        <div class="video-header">
-            <div style="display: flex; align-items: flex-start; gap: 20px;">
-                <img src="{escape_html(video.thumbnail) if video.thumbnail else f'https://img.youtube.com/vi/{video_id}/mqdefault.jpg'}" 
-                     alt="Video thumbnail" 
-                     style="width: 160px; height: 90px; object-fit: cover; border-radius: 8px; box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3); flex-shrink: 0;"
-                     onerror="this.src='https://img.youtube.com/vi/{video_id}/mqdefault.jpg'">
-                <div style="flex: 1;">
-                    <div class="video-title" style="color: white;">🎬 {title}</div>
-                    <div class="video-meta" style="color: white;">
-                        <div class="meta-item">
-                            <div class="meta-label">Video ID</div>
-                            <div class="meta-value">{escape_html(video.video_id)}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Channel</div>
-                            <div class="meta-value">{uploader}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Upload Date</div>
-                            <div class="meta-value">{upload_date}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Duration</div>
-                            <div class="meta-value">{duration}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Views</div>
-                            <div class="meta-value">{view_count}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Comments</div>
-                            <div class="meta-value">{comment_count}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">Watch Video</div>
-                            <div class="meta-value">
-                                <a href="{escape_html(video.webpage_url or f'https://www.youtube.com/watch?v={video.video_id}')}" 
-                                   target="_blank" class="youtube-link">▶️ View on YouTube</a>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="content-section">
-"""
-
-        # Reported subtitles section
-        if subtitles:
-            html += f"""
-                    <h3 class="section-title">📄 Reported Subtitle Segments ({len(subtitles)})</h3>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th style="width: 100px;">Timestamp</th>
-                                <th style="width: 50%;">Subtitle Text</th>
-                                <th style="width: 200px;">Categories</th>
-                                <th style="width: 120px;">Watch at Time</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-        """
-            for subtitle in subtitles:
-                timestamp_display = f'<span class="timestamp">{int(subtitle.timestamp)}s</span>' if subtitle.timestamp else 'N/A'
-                categories_html = format_categories(subtitle.categories) if subtitle.categories else 'None'
-                youtube_link = f'<a href="{escape_html(subtitle.youtube_url)}" target="_blank" class="youtube-link">▶️ Watch</a>' if subtitle.youtube_url else 'N/A'
-                
-                # Don't escape HTML in subtitle text - it may contain highlighting spans
-                subtitle_text = subtitle.text if subtitle.text else ""
-                
-                html += f"""
-                            <tr>
-                                <td>{timestamp_display}</td>
-                                <td>{subtitle_text}</td>
-                                <td>{categories_html}</td>
-                                <td>{youtube_link}</td>
-                            </tr>
-        """
-            html += """
-                        </tbody>
-                    </table>
-        """
-
-        # Reported comments section
-        if comments:
-            html += f"""
-                    <h3 class="section-title">💬 Reported Comments ({len(comments)})</h3>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th style="width: 200px;">Author</th>
-                                <th style="width: 50%;">Comment Text</th>
-                                <th style="width: 200px;">Categories</th>
-                                <th style="width: 120px;">View Comment</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-        """
-            for comment in comments:
-                author_html = f'<div class="author-info">'
-                if comment.author_thumbnail:
-                    author_html += f'<img src="{escape_html(comment.author_thumbnail)}" alt="Author" class="author-thumbnail">'
-                author_html += f'<span>{escape_html(comment.comment_author or "Anonymous")}</span></div>'
-                
-                categories_html = format_categories(comment.categories) if comment.categories else 'None'
-                youtube_link = f'<a href="{escape_html(comment.youtube_url)}" target="_blank" class="youtube-link">▶️ View</a>' if comment.youtube_url else 'N/A'
-                
-                # Don't escape HTML in comment text - it may contain highlighting spans
-                comment_text = comment.text if comment.text else ""
-                
-                html += f"""
-                            <tr>
-                                <td>{author_html}</td>
-                                <td>{comment_text}</td>
-                                <td>{categories_html}</td>
-                                <td>{youtube_link}</td>
-                            </tr>
-        """
-            html += """
-                        </tbody>
-                    </table>
-        """
-        
-        # If no reported content (shouldn't happen, but safety check)
-        if not subtitles and not comments:
-            html += '<div class="no-content">No reported content found for this video.</div>'
-        
-        html += """
-        </div>
-    </div>
-"""
-
-    # Add footer
-    html += f"""
-    <div class="report-footer">
-        <p><strong>Report Details:</strong></p>
-        <p>Project: {escape_html(project.name)} | Generated by HateHunter v1.0</p>
-        <p>This report contains content that has been flagged by AI moderation systems and manually marked for review.</p>
-        <p>Generated on {datetime.now().strftime('%Y-%m-%d at %H:%M:%S UTC')}</p>
-    </div>
-</body>
-</html>"""
+def report_job(job):
+    """Job data sent to the client, with the download link once the report is built"""
+    data = {key: job[key] for key in ('id', 'project', 'status', 'progress', 'error', 'cached')}
+    if job['status'] == 'completed':
+        data['download_url'] = f"/api/project/{job['project']}/report/{job['version']}"
+    return data
+
+# Socket ids that asked for each running report job; progress goes only to them
+report_listeners = {}
+report_listeners_lock = threading.Lock()
+
+def watch_report(job, sid):
+    if not sid or job['status'] not in ('queued', 'running'):
+        return
+    with report_listeners_lock:
+        report_listeners.setdefault(job['id'], set()).add(sid)
+    # The job may have finished before the listener was added
+    current = report_builder.get(job['id'])
+    if current is None or current['status'] in ('completed', 'failed'):
+        with report_listeners_lock:
+            report_listeners.pop(job['id'], None)
+
+def report_progress(job):
+    with report_listeners_lock:
+        if job['status'] in ('completed', 'failed'):
+            sids = report_listeners.pop(job['id'], set())
+        else:
+            sids = set(report_listeners.get(job['id'], ()))
+    data = report_job(job)
+    for sid in sids:
+        socketio.emit('report_progress', data, to=sid)
 
-    return html
+report_builder = ReportBuilder(on_progress=report_progress)
 
 @app.route('/api/project/<project_name>/report', methods=['POST'])
 def generate_report(project_name):
-    """Generate HTML report for reported items in a project"""
+    """Start building the HTML report of the reported items in a project.
+
+    Returns the job at once; ``report_progress`` events follow it, sent to the
+    ``socket_id`` given in the body, and carry the download link when it is
+    done. An unchanged project gets its last report back.
+    """
     session = db.get_session()
     try:
         # Find the project
@@ -1131,73 +863,109 @@ def generate_report(project_name):
         if not project:
             return jsonify({'error': 'Project not found'}), 404
 
-        # Get reported items
-        reported_items = session.query(ReportedItem).filter_by(
-            project_id=project.id
-        ).all()
-
-        if not reported_items:
+        if not session.query(ReportedItem.id).filter_by(project_id=project.id).first():
             return jsonify({'error': 'No reported items found for this project. Please mark some subtitles or comments as reported first.'}), 404
 
-        # Group reported items by video
-        reported_videos = {}
-        
-        # Get all reported subtitles and comments with their video info
-        for report in reported_items:
-            if report.item_type == 'subtitle':
-                subtitle = session.query(SubtitleFlag).filter_by(id=report.item_id).first()
-                if subtitle and subtitle.video:
-                    video_id = subtitle.video.video_id
-                    if video_id not in reported_videos:
-                        reported_videos[video_id] = {
-                            'video': subtitle.video,
-                            'subtitles': [],
-                            'comments': []
-                        }
-                    reported_videos[video_id]['subtitles'].append(subtitle)
-            
-            elif report.item_type == 'comment':
-                comment = session.query(CommentFlag).filter_by(id=report.item_id).first()
-                if comment and comment.video:
-                    video_id = comment.video.video_id
-                    if video_id not in reported_videos:
-                        reported_videos[video_id] = {
-                            'video': comment.video,
-                            'subtitles': [],
-                            'comments': []
-                        }
-                    reported_videos[video_id]['comments'].append(comment)
-
-        if not reported_videos:
-            return jsonify({'error': 'No valid reported content found'}), 404
-
-        # Generate HTML report
-        html_content = generate_html_report(project, reported_videos)
-        
-        # Return as downloadable HTML file
-        response = Response(
-            html_content,
-            mimetype='text/html',
-            headers={
-                'Content-Disposition': f'attachment; filename={project_name}_report.html'
-            }
-        )
-        
-        logger.info(f"Generated report for project {project_name} with {len(reported_videos)} videos")
-        return response
-
+        job = report_builder.request(project)
+        watch_report(job, (request.get_json(silent=True) or {}).get('socket_id'))
+        return jsonify(report_job(job)), 200 if job['status'] == 'completed' else 202
     except Exception as e:
         logger.error(f"Error generating report for project {project_name}: {e}")
         return jsonify({'error': str(e)}), 500
     finally:
         session.close()
 
+@app.route('/api/report-jobs/<job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """Status of a report job"""
+    job = report_builder.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Report job not found'}), 404
+    return jsonify(report_job(job))
+
+@app.route('/api/project/<project_name>/report/<version>', methods=['GET'])
+def download_report(project_name, version):
+    """Download a built report"""
+    if not re.fullmatch(r'[0-9-]+', version):
+        return jsonify({'error': 'Report not found'}), 404
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        path = artifact_path(project.id, version)
+    finally:
+        session.close()
+    if not os.path.exists(path):
+        return jsonify({'error': 'Report not found, generate it again'}), 404
+    return send_file(path, mimetype='text/html', as_attachment=True, download_name=f'{project_name}_report.html')
+
+def attachment_header(filename):
+    """Content-Disposition of a download, quoted as RFC 6266 asks (non-ASCII names go in filename*)"""
+    try:
+        filename.encode('ascii')
+        options = {'filename': filename}
+    except UnicodeEncodeError:
+        options = {
+            'filename': unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii'),
+            'filename*': f"UTF-8''{quote(filename, safe='')}"
+        }
+    return dump_options_header('attachment', options)
+
+@app.route('/api/project/<project_name>/export/<table>.<fmt>', methods=['GET'])
+def export_table(project_name, table, fmt):
+    """Stream one table of a project as NDJSON, CSV or Parquet.
+
+    Tables: videos, subtitles, subtitle_flags, comment_flags and reports. Rows are
+    read with a streaming cursor and written out batch by batch.
+    """
+    if table not in EXPORT_TABLES or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown export, tables: {', '.join(EXPORT_TABLES)}; formats: {', '.join(EXPORT_FORMATS)}"}), 404
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify({'error': 'Parquet export needs pyarrow on the server'}), 501
+
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            session.close()
+            return jsonify({'error': 'Project not found'}), 404
+        chunks = export_stream(session, table, project.id, fmt)
+    except Exception as e:
+        session.close()
+        logger.error(f"Error exporting {table} of project {project_name}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    def stream():
+        try:
+            yield from chunks
+        except Exception as e:
+            logger.error(f"Error exporting {table} of project {project_name}: {e}")
+            raise
+        finally:
+            session.close()
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            'Content-Disposition': attachment_header(f'{project_name}_{table}.{fmt}')
+        }
+    )
+
 # WebSocket event handlers
 @socketio.on('data_updated')
 def handle_data_updated(data):
     project_name = data.get('project')
     update_type = data.get('type')
     if project_name:
+        session = db.get_session()
+        try:
+            project = session.query(Project).filter_by(name=project_name).first()
+            if project:
+                invalidate_counts(project.id)
+        finally:
+            session.close()
         ws_handler.notify_data_update(project_name, update_type)
 
 # Routes
@@ -1226,10 +994,74 @@ def send_static(path):
     """Serve static files"""
     return send_from_directory('static', path)
 
+# Content addressed images never change, browsers may keep them for a year without asking
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# /thumbnails/<video_id>.jpg can point to a newer image later on
+THUMBNAIL_MAX_AGE = 24 * 3600
+
+def send_image(image, size, fmt, max_age, immutable=False):
+    """Send a resized variant of a cached image with caching headers and an ETag"""
+    path, mimetype = image_variant(image.content_hash, image.content_type, size, fmt)
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        etag=f"{image.content_hash}-{size}-{fmt}",
+        max_age=max_age,
+        conditional=True
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable or None
+    return response
+
+def accepted_format():
+    return 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+
+@app.route('/images/<content_hash>/<size>.<fmt>')
+def send_cached_image(content_hash, size, fmt):
+    """Serve a resized thumbnail or avatar by the hash of its content"""
+    if not re.fullmatch(r'[0-9a-f]{64}', content_hash) or size not in VARIANT_WIDTHS or fmt not in ('webp', 'jpg'):
+        return jsonify({'error': 'Not found'}), 404
+    session = db.get_session()
+    try:
+        image = session.query(CachedImage).filter_by(content_hash=content_hash).first()
+        if image is None:
+            return jsonify({'error': 'Not found'}), 404
+        return send_image(image, size, fmt, IMMUTABLE_MAX_AGE, immutable=True)
+    finally:
+        session.close()
+
 @app.route('/thumbnails/<path:path>')
 def send_thumbnail(path):
-    """Serve thumbnail images"""
-    return send_from_directory('thumbnails', path)
+    """Serve thumbnail images: files saved by older versions first, then the image cache.
+
+    ``?size=`` picks a resized variant, WebP when the browser accepts it. A
+    thumbnail that is not cached yet is downloaded on the spot.
+    """
+    if os.path.isfile(os.path.join('thumbnails', path)):
+        return send_from_directory('thumbnails', path, max_age=THUMBNAIL_MAX_AGE)
+    
+    video_id = os.path.splitext(os.path.basename(path))[0]
+    size = request.args.get('size', 'medium')
+    if size not in VARIANT_WIDTHS:
+        size = 'medium'
+    session = db.get_session()
+    try:
+        image = cached_image(session, 'video', video_id)
+        if image is None:
+            future = thumbnail_fetcher.submit_video(video_id)
+            try:
+                future.result(timeout=FETCH_TIMEOUT)
+            except Exception:
+                pass
+            session.expire_all()
+            image = cached_image(session, 'video', video_id)
+        if image is None:
+            return redirect(video_thumbnail_url(video_id))
+        response = send_image(image, size, accepted_format(), THUMBNAIL_MAX_AGE)
+        response.vary.add('Accept')
+        return response
+    finally:
+        session.close()
 
 # API Routes
 @app.route('/api/projects', methods=['GET'])
@@ -1237,36 +1069,7 @@ def get_projects():
     """Get all projects"""
     session = db.get_session()
     try:
-        projects = session.query(Project).all()
-        projects_data = []
-        
-        for project in projects:
-            # Count elements
-            subtitle_count = session.query(SubtitleFlag).filter_by(project_id=project.id).count()
-            comment_count = session.query(CommentFlag).filter_by(project_id=project.id).count()
-            video_count = session.query(Video).filter_by(project_id=project.id).count()
-            
-            # Get unique categories
-            categories = set()
-            subtitles = session.query(SubtitleFlag).filter_by(project_id=project.id).all()
-            comments = session.query(CommentFlag).filter_by(project_id=project.id).all()
-            
-            for subtitle in subtitles:
-                if subtitle.categories:
-                    categories.update(cat.strip() for cat in subtitle.categories.split(','))
-            
-            for comment in comments:
-                if comment.categories:
-                    categories.update(cat.strip() for cat in comment.categories.split(','))
-            
-            projects_data.append({
-                'name': project.name,
-                'subtitles_count': subtitle_count,
-                'comments_count': comment_count,
-                'videos_count': video_count,
-                'categories': sorted(list(categories)),
-                'date': project.updated_at.strftime("%Y-%m-%d %H:%M") if project.updated_at else ""
-            })
+        projects_data = project_summaries(session)
         
         return jsonify({
             'projects': projects_data
@@ -1279,48 +1082,34 @@ def get_projects():
 
 @app.route('/api/project/<project_name>/videos', methods=['GET'])
 def get_project_videos(project_name):
-    """Get videos for a project"""
+    """Get videos for a project with pagination, sorting and status filtering"""
     session = db.get_session()
     try:
         project = session.query(Project).filter_by(name=project_name).first()
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        videos = session.query(Video).filter_by(project_id=project.id).all()
-        videos_data = []
+        # Status filter accepts a comma-separated list, e.g. ?status=queued,processing
+        status_filter = request.args.get('status', '').strip()
+        statuses = [value.strip() for value in status_filter.split(',') if value.strip()]
+        
+        listing = video_listing(
+            session,
+            project.id,
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 60, type=int),
+            sort=request.args.get('sort', 'status'),
+            order=request.args.get('order'),
+            statuses=statuses,
+            flagged_only=request.args.get('flagged', '').lower() == 'true',
+            search=request.args.get('search', '').strip()
+        )
         
-        for video in videos:
-            # Calculate counters dynamically
-            subtitle_count = session.query(SubtitleFlag).filter_by(
-                project_id=project.id,
-                video_id=video.id
-            ).count()
-            
-            comment_count = session.query(CommentFlag).filter_by(
-                project_id=project.id,
-                video_id=video.id
-            ).count()
-            
-            videos_data.append({
-                'id': video.video_id,
-                'title': video.title or f'Video {video.video_id}',
-                'uploader': video.uploader or '',
-                'upload_date': video.upload_date or '',
-                'duration': video.duration or '',
-                'view_count': video.view_count or '',
-                'like_count': video.like_count or '',
-                'comment_count': video.comment_count or '',
-                'thumbnail': video.thumbnail or f"https://img.youtube.com/vi/{video.video_id}/mqdefault.jpg",
-                'webpage_url': video.webpage_url or f"https://www.youtube.com/watch?v={video.video_id}",
-                'flagged_subtitles': subtitle_count,
-                'flagged_comments': comment_count,
-                'processing_status': video.processing_status or 'completed',
-                'processing_error': video.processing_error
-            })
+        localize_thumbnails(session, listing['videos'])
         
         return jsonify({
             'project': project_name,
-            'videos': videos_data
+            **listing
         })
     except Exception as e:
         logger.error(f"Error getting project videos: {e}")
@@ -1330,7 +1119,7 @@ def get_project_videos(project_name):
 
 @app.route('/api/project/<project_name>/queue', methods=['POST'])
 def add_to_queue(project_name):
-    """Add commands to the hatehunter.tmp queue file"""
+    """Add hatehunter commands to the database queue"""
     try:
         data = request.get_json()
         commands = data.get('commands', [])
@@ -1340,19 +1129,164 @@ def add_to_queue(project_name):
         
         logger.info(f"Adding {len(commands)} commands to queue for project {project_name}")
         
-        # Add commands to queue file
-        queue_manager.add_commands_to_queue(commands)
+        queued = queue_manager.add_commands_to_queue(commands, priority=int(data.get('priority', 0)))
         
         return jsonify({
             'success': True,
-            'videos_queued': len(commands),
-            'message': f'{len(commands)} video(s) added to processing queue'
+            'videos_queued': queued,
+            'message': f'{queued} video(s) added to processing queue'
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error adding to queue: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/project/<project_name>/queue', methods=['GET'])
+def get_project_queue(project_name):
+    """Queued and running jobs of a project with their queue position and estimated start"""
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        positions = queue_manager.queue_positions(session)
+        now = datetime.utcnow()
+        jobs = []
+        for job, video_id in session.query(VideoQueue, Video.video_id).join(
+            Video, Video.id == VideoQueue.video_id
+        ).filter(
+            VideoQueue.project_id == project.id,
+            VideoQueue.status.in_(('queued', 'processing'))
+        ):
+            placement = positions.get(job.id, {})
+            starts_in = placement.get('starts_in')
+            jobs.append({
+                'job_id': job.id,
+                'video_id': video_id,
+                'status': job.status,
+                'priority': job.priority,
+                'position': placement.get('position'),
+                'starts_in': starts_in,
+                'estimated_start': (now + timedelta(seconds=starts_in)).isoformat() if starts_in is not None else None,
+                'started_at': job.started_at.isoformat() if job.started_at else None
+            })
+        # Running jobs first, then queued ones in the order they will start
+        jobs.sort(key=lambda job: (job['position'] is not None, job['position'] or 0))
+        
+        return jsonify({
+            'project': project_name,
+            'weight': project.queue_weight or 1,
+            'counts': queue_counts(session, project.id),
+            'queued_total': len(positions),
+            'jobs': jobs
+        })
+    except Exception as e:
+        logger.error(f"Error getting queue of {project_name}: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/project/<project_name>/metadata/refresh', methods=['POST'])
+def refresh_project_metadata(project_name):
+    """Refresh stale video metadata (views, likes, comments...) of a project in the background"""
+    session = db.get_session()
+    try:
+        if not session.query(Project).filter_by(name=project_name).first():
+            return jsonify({'error': 'Project not found'}), 404
+    finally:
+        session.close()
+    
+    threading.Thread(target=queue_manager.refresh_project_metadata, args=(project_name,), daemon=True).start()
+    return jsonify({'success': True}), 202
+
+@app.route('/api/project/<project_name>/queue/weight', methods=['POST'])
+def set_queue_weight(project_name):
+    """Set the share of queue workers a project gets relative to the others"""
+    data = request.get_json() or {}
+    try:
+        weight = int(data.get('weight'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'weight must be an integer'}), 400
+    if weight < 1:
+        return jsonify({'error': 'weight must be at least 1'}), 400
+    
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        project.queue_weight = weight
+        session.commit()
+        logger.info(f"Queue weight of {project_name} set to {weight}")
+        return jsonify({'success': True, 'project': project_name, 'weight': weight})
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error setting queue weight: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/project/<project_name>/video/<video_id>/expedite', methods=['POST'])
+def expedite_video(project_name, video_id):
+    """Move the queued job of a video ahead of normally queued work"""
+    data = request.get_json(silent=True) or {}
+    try:
+        priority = int(data.get('priority', EXPEDITE_PRIORITY))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'priority must be an integer'}), 400
+    
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        video = session.query(Video).filter_by(project_id=project.id, video_id=video_id).first()
+        if not video:
+            return jsonify({'error': 'Video not found'}), 404
+        
+        job = expedite(session, video, priority)
+        if not job:
+            return jsonify({'error': 'Video is not waiting in the queue'}), 409
+        
+        logger.info(f"Expedited {video_id} in {project_name} (priority {priority})")
+        queue_manager.wake()
+        return jsonify({'success': True, 'job_id': job.id, 'priority': priority})
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error expediting video: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/project/<project_name>/queue/<any(pause, resume, cancel):action>', methods=['POST'])
+def control_project_queue(project_name, action):
+    """Pause, resume or cancel all queued and running jobs of a project"""
+    try:
+        affected = queue_manager.control_jobs(project_name, action)
+        if affected is None:
+            return jsonify({'error': 'Project not found'}), 404
+        return jsonify({'success': True, 'action': action, 'jobs': affected})
+    except Exception as e:
+        logger.error(f"Error during {action} of {project_name}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/project/<project_name>/video/<video_id>/<any(pause, resume, cancel):action>', methods=['POST'])
+def control_video_job(project_name, video_id, action):
+    """Pause, resume or cancel the analysis of one video"""
+    try:
+        affected = queue_manager.control_jobs(project_name, action, video_id)
+        if affected is None:
+            return jsonify({'error': 'Video not found'}), 404
+        if not affected:
+            return jsonify({'error': f'Nothing to {action} for this video'}), 409
+        return jsonify({'success': True, 'action': action, 'jobs': affected})
+    except Exception as e:
+        logger.error(f"Error during {action} of {video_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/projects', methods=['POST'])
 def create_empty_project():
     """Create a new empty project"""
@@ -1463,8 +1397,10 @@ def delete_project(project_name):
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
+        project_id = project.id
         session.delete(project)  # Cascade will delete all related data
         session.commit()
+        remove_artifacts(project_id)
         
         # Notify WebSocket clients
         ws_handler.socketio.emit('project_deleted', {
@@ -1481,16 +1417,17 @@ def delete_project(project_name):
 
 @app.route('/api/project/<project_name>/subtitles', methods=['GET'])
 def get_project_subtitles(project_name):
-    """Get subtitles for a project with pagination and filtering"""
+    """Get subtitles for a project with cursor pagination and filtering"""
     session = db.get_session()
     try:
         project = session.query(Project).filter_by(name=project_name).first()
         if not project:
             return jsonify({'error': 'Project not found'}), 404
 
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        # Get pagination parameters (cursor = edge id of the current page)
+        per_page = max(min(request.args.get('per_page', 50, type=int), 500), 1)
+        cursor = request.args.get('cursor', type=int)
+        direction = request.args.get('direction', 'next')
 
         # Get filter parameters
         video_filter = request.args.get('video', '').strip()
@@ -1500,11 +1437,8 @@ def get_project_subtitles(project_name):
         reported_only = request.args.get('reported', '').lower() == 'true'
         flagged_only = request.args.get('flagged', '').lower() == 'true'
 
-        # Import Subtitle model
-        from models import Subtitle
-
         # Build query - use Subtitle table which has ALL subtitles
-        query = session.query(Subtitle).join(Video).filter(
+        query = session.query(Subtitle, Video.video_id).join(Video).filter(
             Subtitle.project_id == project.id
         )
 
@@ -1516,7 +1450,10 @@ def get_project_subtitles(project_name):
             query = query.filter(Subtitle.text.like(f'%{text_filter}%'))
 
         if categories_filter:
-            query = query.filter(Subtitle.categories.like(f'%{categories_filter}%'))
+            query = query.filter(has_any_category(
+                Subtitle.category_mask,
+                matching_mask(session, categories_filter)
+            ))
 
         if timestamp_filter:
             try:
@@ -1532,63 +1469,40 @@ def get_project_subtitles(project_name):
             query = query.filter(Subtitle.is_flagged == True)
 
         if reported_only:
-            # Get reported subtitle IDs
-            reported_items = session.query(ReportedItem.item_id).filter_by(
-                project_id=project.id,
-                item_type='subtitle'
-            ).all()
-            reported_ids = [item.item_id for item in reported_items]
-
-            if reported_ids:
-                query = query.filter(Subtitle.id.in_(reported_ids))
-            else:
-                # If no reported items, return empty result
-                return jsonify({
-                    'project': project_name,
-                    'subtitles': [],
-                    'total': 0,
-                    'page': page,
-                    'per_page': per_page,
-                    'total_pages': 0
-                })
+            query = query.filter(Subtitle.id.in_(
+                session.query(ReportedItem.item_id).filter_by(
+                    project_id=project.id,
+                    item_type='subtitle'
+                )
+            ))
 
-        # Get total count before pagination
-        total = query.count()
+        # Total is cached per filter set, deep pages never re-count
+        total = cached_count(
+            (project.id, 'subtitles', video_filter, text_filter, categories_filter,
+             timestamp_filter, reported_only, flagged_only),
+            query
+        )
 
-        # Apply pagination
-        subtitles = query.order_by(Subtitle.id.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        rows, page_info = keyset_page(query, Subtitle.id, per_page, cursor, direction)
 
         # Get reported status for all subtitles in this page
-        subtitle_ids = [s.id for s in subtitles]
-        reported_items = session.query(ReportedItem.item_id).filter(
-            ReportedItem.project_id == project.id,
-            ReportedItem.item_type == 'subtitle',
-            ReportedItem.item_id.in_(subtitle_ids)
-        ).all()
-        reported_set = set(item.item_id for item in reported_items)
-
-        subtitles_data = []
-        for subtitle in subtitles:
-            subtitles_data.append({
-                'id': subtitle.id,
-                'video_id': subtitle.video.video_id,
-                'timestamp': subtitle.timestamp,
-                'text': subtitle.text,
-                'categories': subtitle.categories if subtitle.categories else '',
-                'youtube_url': subtitle.youtube_url,
-                'is_flagged': subtitle.is_flagged,
-                'is_reported': subtitle.id in reported_set
-            })
+        subtitle_ids = [subtitle.id for subtitle, _ in rows]
+        reported_set = reported_ids(session, project.id, 'subtitle', subtitle_ids)
 
-        total_pages = (total + per_page - 1) // per_page
+        subtitles_data = [
+            subtitle_to_dict(subtitle, video_id, subtitle.id in reported_set)
+            for subtitle, video_id in rows
+        ]
 
         return jsonify({
             'project': project_name,
             'subtitles': subtitles_data,
             'total': total,
-            'page': page,
             'per_page': per_page,
-            'total_pages': total_pages
+            'total_pages': (total + per_page - 1) // per_page,
+            'next_cursor': subtitle_ids[-1] if subtitle_ids else None,
+            'prev_cursor': subtitle_ids[0] if subtitle_ids else None,
+            **page_info
         })
     except Exception as e:
         logger.error(f"Error getting project subtitles: {e}")
@@ -1596,47 +1510,99 @@ def get_project_subtitles(project_name):
     finally:
         session.close()
 
+@app.route('/api/project/<project_name>/categories', methods=['GET'])
+def get_project_categories(project_name):
+    """Get per-category counts (facets) for a project"""
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+
+        return jsonify({
+            'project': project_name,
+            'subtitles': category_facets(session, Subtitle, project.id),
+            'subtitle_flags': category_facets(session, SubtitleFlag, project.id),
+            'comments': category_facets(session, CommentFlag, project.id)
+        })
+    except Exception as e:
+        logger.error(f"Error getting project categories: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
 @app.route('/api/project/<project_name>/comments', methods=['GET'])
 def get_project_comments(project_name):
-    """Get comments for a project"""
+    """Get flagged comments for a project with cursor pagination and filtering"""
     session = db.get_session()
     try:
         project = session.query(Project).filter_by(name=project_name).first()
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        # Get reported comments for this project
-        reported_comments = set()
-        reports = session.query(ReportedItem).filter_by(
-            project_id=project.id,
-            item_type='comment'
-        ).all()
+        per_page = max(min(request.args.get('per_page', 100, type=int), 500), 1)
+        cursor = request.args.get('cursor', type=int)
+        direction = request.args.get('direction', 'next')
         
-        for report in reports:
-            reported_comments.add(report.item_id)
+        video_filter = request.args.get('video', '').strip()
+        author_filter = request.args.get('author', '').strip()
+        text_filter = request.args.get('text', '').strip()
+        categories_filter = request.args.get('categories', '').strip()
+        reported_only = request.args.get('reported', '').lower() == 'true'
         
-        comments = session.query(CommentFlag).join(Video).filter(
+        query = session.query(CommentFlag, Video.video_id).join(Video).filter(
             CommentFlag.project_id == project.id
-        ).all()
+        )
         
-        comments_data = []
-        for comment in comments:
-            is_reported = comment.id in reported_comments
-            
-            comments_data.append({
-                'id': comment.id,
-                'video_id': comment.video.video_id,
-                'author': comment.comment_author,
-                'author_thumbnail': comment.author_thumbnail,
-                'text': comment.text,
-                'categories': comment.categories,
-                'youtube_url': comment.youtube_url,
-                'is_reported': is_reported
-            })
+        if video_filter:
+            query = query.filter(Video.video_id.like(f'%{video_filter}%'))
+        
+        if author_filter:
+            query = query.filter(CommentFlag.comment_author.like(f'%{author_filter}%'))
+        
+        if text_filter:
+            query = query.filter(CommentFlag.text.like(f'%{text_filter}%'))
+        
+        if categories_filter:
+            query = query.filter(has_any_category(
+                CommentFlag.category_mask,
+                matching_mask(session, categories_filter)
+            ))
+        
+        if reported_only:
+            query = query.filter(CommentFlag.id.in_(
+                session.query(ReportedItem.item_id).filter_by(
+                    project_id=project.id,
+                    item_type='comment'
+                )
+            ))
+        
+        total = cached_count(
+            (project.id, 'comments', video_filter, author_filter, text_filter,
+             categories_filter, reported_only),
+            query
+        )
+        
+        rows, page_info = keyset_page(query, CommentFlag.id, per_page, cursor, direction)
+        
+        # Reported status only for the comments in this page
+        comment_ids = [comment.id for comment, _ in rows]
+        reported_comments = reported_ids(session, project.id, 'comment', comment_ids)
+        
+        comments_data = [
+            comment_to_dict(comment, video_id, comment.id in reported_comments)
+            for comment, video_id in rows
+        ]
+        localize_avatars(session, comments_data, 'author_thumbnail', 'author', thumbnail_fetcher)
         
         return jsonify({
             'project': project_name,
-            'comments': comments_data
+            'comments': comments_data,
+            'total': total,
+            'per_page': per_page,
+            'next_cursor': comment_ids[-1] if comment_ids else None,
+            'prev_cursor': comment_ids[0] if comment_ids else None,
+            **page_info
         })
     except Exception as e:
         logger.error(f"Error getting project comments: {e}")
@@ -1683,42 +1649,51 @@ def analyze_videos():
         analysis_id = f"{project_name}_{int(time.time())}"
         running_analyses[project_name] = analysis_id
         
+        def log_output(process):
+            for line in process.stdout:
+                line = line.strip()
+                if line:
+                    logger.info(f"Analysis {analysis_id}: {line}")
+        
         def run_analysis():
             try:
                 logger.info(f"Starting subprocess for analysis {analysis_id}")
                 
-                # Run the hatehunter.py process
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1,
-                    cwd=os.getcwd()
-                )
-                
-                # Send progress updates via WebSocket
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        line = output.strip()
-                        if line:
-                            # Parse output for progress information
-                            progress_data = parse_hatehunter_output(line)
-                            
-                            # Emit progress to WebSocket clients
-                            socketio.emit('analysis_progress', {
-                                'project': project_name,
-                                'analysis_id': analysis_id,
-                                **progress_data
-                            }, room=f"project_{project_name}")
+                # Progress comes as JSON lines on a pipe of its own, stdout is only logged
+                events_read, events_write = os.pipe()
+                # The read end is closed by the with block, even when Popen fails
+                with os.fdopen(events_read, 'r', encoding='utf-8') as events:
+                    try:
+                        process = subprocess.Popen(
+                            cmd + ['--events-fd', str(events_write)],
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            universal_newlines=True,
+                            bufsize=1,
+                            cwd=os.getcwd(),
+                            pass_fds=(events_write,)
+                        )
+                    finally:
+                        os.close(events_write)
+                    analysis_processes[project_name] = process
+                    threading.Thread(target=log_output, args=(process,), daemon=True).start()
+                    
+                    # Send progress updates via WebSocket
+                    for line in events:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        forward_progress(project_name, analysis_id, event, analysis_id=analysis_id)
+                progress_throttle.forget(analysis_id)
                 
                 # Wait for process to complete
                 return_code = process.wait()
                 logger.info(f"Analysis process completed with return code: {return_code}")
                 
+                # Channel mode queues its videos from the subprocess
+                queue_manager.wake()
+                
                 if return_code == 0:
                     # Analysis completed successfully
                     socketio.emit('analysis_progress', {
@@ -1758,6 +1733,7 @@ def analyze_videos():
             
             finally:
                 # Clean up
+                analysis_processes.pop(project_name, None)
                 if project_name in running_analyses:
                     del running_analyses[project_name]
                 logger.info(f"Analysis thread completed for {project_name}")
@@ -1798,6 +1774,11 @@ def build_hatehunter_command(data):
         elif channel:
             # Channel mode
             cmd.extend(['--channel', channel])
+            if data.get('incremental'):
+                cmd.append('--incremental')
+            rescan_comments = data.get('rescan_comments', 0)
+            if rescan_comments and int(rescan_comments) > 0:
+                cmd.extend(['--rescan-comments', str(int(rescan_comments))])
         else:
             raise ValueError('Either videos or channel must be specified')
         
@@ -1858,56 +1839,117 @@ def build_hatehunter_command(data):
         logger.error(f"Error building command: {e}")
         raise ValueError(f"Invalid command parameters: {str(e)}")
 
-def parse_hatehunter_output(line):
-    """Parse HateHunter output line for progress information"""
-    # Default progress data
-    progress_data = {
-        'type': 'log',
-        'message': line,
-        'progress': None
-    }
-    
-    # Parse specific patterns for progress updates
-    line_lower = line.lower()
-    
-    # Download progress patterns
-    if 'downloading' in line_lower and 'video' in line_lower:
-        progress_data['type'] = 'step'
-        progress_data['message'] = 'Downloading video metadata'
-    elif 'subtitle' in line_lower and 'download' in line_lower:
-        progress_data['type'] = 'step'
-        progress_data['message'] = 'Downloading subtitles'
-    elif 'comment' in line_lower and ('download' in line_lower or 'process' in line_lower):
-        progress_data['type'] = 'step'
-        progress_data['message'] = 'Processing comments'
-    elif 'moderat' in line_lower or 'analyz' in line_lower:
-        progress_data['type'] = 'step'
-        progress_data['message'] = 'Analyzing content with AI moderation'
-    elif 'convert' in line_lower and 'srt' in line_lower:
-        progress_data['type'] = 'step'
-        progress_data['message'] = 'Converting subtitle files'
-    elif 'processing complete' in line_lower or 'analysis complete' in line_lower:
-        progress_data['type'] = 'complete'
-        progress_data['message'] = 'Analysis completed'
-        progress_data['progress'] = 100
-    elif '❌' in line or 'error' in line_lower:
-        progress_data['type'] = 'error'
-        progress_data['message'] = line
-    elif '✅' in line or 'success' in line_lower:
-        progress_data['type'] = 'progress'
-        progress_data['message'] = line
-    
-    # Extract progress percentage if present
-    if '%' in line:
-        try:
-            import re
-            match = re.search(r'(\d+)%', line)
-            if match:
-                progress_data['progress'] = int(match.group(1))
-        except:
-            pass
-    
-    return progress_data
+def channel_synced(project_name, channel_url, status):
+    """A watched channel finished its sync: start its new jobs and refresh the browsers"""
+    queue_manager.wake()
+    socketio.emit('data_updated', {
+        'project': project_name,
+        'type': 'channel_synced',
+        'channel': channel_url,
+        'status': status
+    }, room=f"project_{project_name}")
+
+channel_monitor = ChannelMonitor(build_hatehunter_command, on_synced=channel_synced)
+
+@app.route('/api/project/<project_name>/watchlist', methods=['GET', 'POST'])
+def project_watchlist(project_name):
+    """List the watched channels of a project, or add one"""
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=project_name).first()
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            channel = (data.get('channel') or '').strip()
+            if not channel:
+                return jsonify({'error': 'channel is required'}), 400
+            try:
+                interval = int(data.get('interval_minutes', 1440))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'interval_minutes must be an integer'}), 400
+            
+            watched = watch_channel(session, project, channel, interval, options=data)
+            session.commit()
+            logger.info(f"Watching {watched.channel_url} for {project_name} every {watched.interval_minutes} min")
+            channel_monitor.wake()
+            return jsonify({'success': True, 'channel': watched_to_dict(watched)}), 201
+        
+        channels = session.query(WatchedChannel).filter_by(project_id=project.id).order_by(WatchedChannel.id).all()
+        return jsonify({
+            'channels': [watched_to_dict(watched) for watched in channels],
+            'monitor': channel_monitor.status()
+        })
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error handling watchlist of {project_name}: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/project/<project_name>/watchlist/<int:watch_id>', methods=['POST', 'DELETE'])
+def update_watched_channel(project_name, watch_id):
+    """Change the interval of a watched channel, enable/disable it, or stop watching it"""
+    session = db.get_session()
+    try:
+        watched = session.query(WatchedChannel).join(Project).filter(
+            Project.name == project_name,
+            WatchedChannel.id == watch_id
+        ).first()
+        if not watched:
+            return jsonify({'error': 'Watched channel not found'}), 404
+        
+        if request.method == 'DELETE':
+            channel_url = watched.channel_url
+            session.delete(watched)
+            session.commit()
+            logger.info(f"Stopped watching {channel_url} for {project_name}")
+            return jsonify({'success': True})
+        
+        data = request.get_json() or {}
+        enabled = bool(data.get('enabled', watched.enabled))
+        if 'interval_minutes' in data:
+            try:
+                interval = int(data['interval_minutes'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'interval_minutes must be an integer'}), 400
+            watch_channel(session, watched.project, watched.channel_url, interval)
+        watched.enabled = enabled
+        session.commit()
+        channel_monitor.wake()
+        return jsonify({'success': True, 'channel': watched_to_dict(watched)})
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error updating watched channel {watch_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/project/<project_name>/watchlist/<int:watch_id>/check', methods=['POST'])
+def check_watched_channel(project_name, watch_id):
+    """Sync a watched channel as soon as the monitor has a free slot"""
+    session = db.get_session()
+    try:
+        watched = session.query(WatchedChannel).join(Project).filter(
+            Project.name == project_name,
+            WatchedChannel.id == watch_id
+        ).first()
+        if not watched:
+            return jsonify({'error': 'Watched channel not found'}), 404
+        if watched.id in channel_monitor.running:
+            return jsonify({'error': 'Channel is being synced right now'}), 409
+        
+        watched.next_check_at = datetime.utcnow()
+        session.commit()
+        channel_monitor.wake()
+        return jsonify({'success': True}), 202
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error scheduling check of watched channel {watch_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
 
 # Debug routes
 @app.route('/debug/db')
@@ -1951,35 +1993,73 @@ def debug_processes():
         'python_path': sys.executable,
         'working_directory': os.getcwd(),
         'hatehunter_exists': os.path.exists('hatehunter.py'),
-        'queue_file_exists': os.path.exists(QUEUE_FILE),
         'current_processing': queue_manager.current_processing,
         'queue_manager_running': queue_manager.is_running
     })
 
 @app.route('/debug/queue')
 def debug_queue():
-    """Debug endpoint to check queue file contents"""
+    """Debug endpoint to check the job queue"""
+    session = db.get_session()
     try:
-        if not os.path.exists(QUEUE_FILE):
-            return jsonify({
-                'queue_file_exists': False,
-                'commands': [],
-                'current_processing': queue_manager.current_processing
-            })
-        
-        with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
-            commands = [line.strip() for line in f.readlines() if line.strip()]
+        jobs = session.query(VideoQueue).filter(
+            VideoQueue.status.in_(('queued', 'processing'))
+        ).order_by(VideoQueue.priority.desc(), VideoQueue.id).limit(100).all()
         
         return jsonify({
-            'queue_file_exists': True,
-            'commands_count': len(commands),
-            'commands': commands,
+            'counts': queue_counts(session),
+            'jobs': [{
+                'id': job.id,
+                'project': job.project.name,
+                'video_id': job.video.video_id,
+                'status': job.status,
+                'priority': job.priority,
+                'retry_count': job.retry_count,
+                'lease_owner': job.lease_owner,
+                'lease_expires_at': job.lease_expires_at.isoformat() if job.lease_expires_at else None,
+                'created_at': job.created_at.isoformat() if job.created_at else None
+            } for job in jobs],
             'current_processing': queue_manager.current_processing,
             'queue_manager_running': queue_manager.is_running
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        session.close()
+
+@app.route('/api/admin/workers', methods=['GET', 'POST'])
+def admin_workers():
+    """Show or resize the queue worker pool"""
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        try:
+            queue_manager.resize(
+                max_workers=data.get('max_workers'),
+                per_project_limit=data.get('per_project_limit')
+            )
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_workers and per_project_limit must be integers'}), 400
+    
+    return jsonify(queue_manager.worker_status())
+
+@app.route('/api/admin/monitor', methods=['GET', 'POST'])
+def admin_monitor():
+    """Show the channel monitor or change how many syncs may run at once"""
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        try:
+            channel_monitor.resize(data.get('max_syncs'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_syncs must be an integer'}), 400
+    
+    return jsonify(channel_monitor.status())
+
+@app.route('/api/queue/wake', methods=['POST'])
+def wake_queue():
+    """Start queued jobs now (called by hatehunter.py after queueing a channel)"""
+    queue_manager.wake()
+    return jsonify({'success': True}), 202
 
 # WebSocket Events
 @socketio.on('connect')
@@ -2021,11 +2101,14 @@ def handle_clear_reports(data):
 
 @socketio.on('request_refresh')
 def handle_refresh(data):
-    """Handle refresh request"""
+    """Handle refresh request: project summary, or the changes since a known version"""
     session_id = request.sid
     logger.info(f"Refresh requested by {session_id}: {data}")
     if 'project' in data:
-        ws_handler.send_project_data(session_id, data['project'])
+        if data.get('since') is not None:
+            ws_handler.send_project_delta(session_id, data['project'], data['since'])
+        else:
+            ws_handler.send_project_summary(session_id, data['project'])
     else:
         ws_handler.send_initial_data(session_id)
 
@@ -2044,42 +2127,52 @@ def cleanup():
     """Cleanup resources"""
     logger.info("Shutting down server...")
     
-    # Stop queue manager
+    # Stop queue manager and the channel monitor
     queue_manager.stop()
+    channel_monitor.stop()
+    report_builder.shutdown()
     
     # Cancel any running analyses
     for project_name, analysis_id in running_analyses.items():
         logger.info(f"Cancelling analysis for project: {project_name}")
+        process = analysis_processes.get(project_name)
+        if process and process.poll() is None:
+            process.terminate()
     
     running_analyses.clear()
+    analysis_processes.clear()
     
-    # Clean up queue file if exists
-    try:
-        if os.path.exists(QUEUE_FILE):
-            os.remove(QUEUE_FILE)
-            logger.info("Cleaned up queue file")
-    except Exception as e:
-        logger.error(f"Error cleaning up queue file: {e}")
+    # The queue lives in the database and is picked up again on the next start
     
     db.close()
 
 # Main execution
 if __name__ == '__main__':
     try:
-        logger.info("Starting HateHunter server on port 1338...")
-        print("🚀 Server starting on http://localhost:1338")
-        print("📊 Debug endpoint available at: http://localhost:1338/debug/db")
-        print("🔄 Queue debug endpoint: http://localhost:1338/debug/queue")
-        print("🎯 HateHunter analysis endpoint: http://localhost:1338/api/hatehunter/analyze")
-        print("📝 Queue endpoint: http://localhost:1338/api/project/{project}/queue")
-        
-        # Start the queue processor
+        logger.info(f"Starting HateHunter server on port {SERVER_PORT}...")
+        print(f"🚀 Server starting on http://localhost:{SERVER_PORT}")
+        print(f"📊 Debug endpoint available at: http://localhost:{SERVER_PORT}/debug/db")
+        print(f"🔄 Queue debug endpoint: http://localhost:{SERVER_PORT}/debug/queue")
+        print(f"🎯 HateHunter analysis endpoint: http://localhost:{SERVER_PORT}/api/hatehunter/analyze")
+        print(f"📝 Queue endpoint: http://localhost:{SERVER_PORT}/api/project/{{project}}/queue")
+        
+        # Drop change log entries nobody can still be catching up on
+        prune_session = db.get_session()
+        try:
+            prune_changes(prune_session)
+            prune_checkpoints(prune_session)
+            prune_cache(prune_session)
+        finally:
+            prune_session.close()
+        
+        # Start the queue processor and the scheduled channel syncs
         queue_manager.start_queue_processor()
+        channel_monitor.start()
         
         socketio.run(
             app, 
             host='0.0.0.0', 
-            port=1338,
+            port=SERVER_PORT,
             debug=False,
             use_reloader=False
         )
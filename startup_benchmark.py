@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Startup time budget of the hatehunter.py CLI.
+
+Times ``hatehunter.py --help`` against a bare interpreter and checks that
+importing the CLI loads none of the modules deferred to their stages and does
+not create the database. Exits with 1 when a check fails, so it can gate CI:
+
+    python startup_benchmark.py [--runs 10] [--budget 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds hatehunter.py --help may take on top of a bare interpreter (median)
+STARTUP_BUDGET = float(os.environ.get("HATEHUNTER_STARTUP_BUDGET", 1.0))
+
+# Loaded by the stage that needs them, never at import
+DEFERRED_MODULES = ("openai", "requests", "socketio", "jinja2", "pyarrow", "PIL", "thumbnails")
+
+def time_command(command, runs, env):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def loaded_deferred_modules(env):
+    """Deferred modules present in sys.modules right after importing hatehunter"""
+    code = (
+        "import sys, json; sys.path.insert(0, sys.argv[1]); import hatehunter; "
+        "print(json.dumps([name for name in sys.argv[2:] if name in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code, HERE, *DEFERRED_MODULES],
+                            env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the startup time of hatehunter.py")
+    parser.add_argument("--runs", type=int, default=10, help="Runs of each command (default: 10)")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET,
+                        help=f"Allowed seconds over a bare interpreter (default: {STARTUP_BUDGET})")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "hatehunter.db")
+        env = {**os.environ, "HATEHUNTER_DB": db_path}
+
+        bare = time_command([sys.executable, "-c", "pass"], args.runs, env)
+        cli = time_command([sys.executable, os.path.join(HERE, "hatehunter.py"), "--help"], args.runs, env)
+        loaded = loaded_deferred_modules(env)
+        db_created = os.path.exists(db_path)
+
+    overhead = cli - bare
+    print(f"⏱️  hatehunter.py --help: {cli:.3f}s (interpreter {bare:.3f}s, overhead {overhead:.3f}s, budget {args.budget:.3f}s)")
+    failed = False
+    if overhead > args.budget:
+        print(f"❌ Startup is {overhead - args.budget:.3f}s over budget")
+        failed = True
+    if loaded:
+        print(f"❌ Loaded at import: {', '.join(loaded)}")
+        failed = True
+    if db_created:
+        print("❌ The database was created by --help")
+        failed = True
+    if not failed:
+        print("✅ Startup within budget")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
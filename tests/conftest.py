@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The database module reads this when it is first imported; never touch the real one
+os.environ.setdefault('HATEHUNTER_DB', os.path.join(tempfile.mkdtemp(prefix='hatehunter-tests-'), 'hatehunter.db'))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+
+@pytest.fixture
+def session(tmp_path):
+    """Session on a fresh database of its own, outside the shared ``db``"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import categories
+from categories import MAX_CATEGORIES, category_mask, category_names, has_any_category, matching_mask
+from database import db
+from models import Category, Project, Video, Subtitle
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    # The cache belongs to the process, every test starts from a fresh database
+    categories._bits_by_name.clear()
+    categories._names_by_bit.clear()
+    yield
+
+def _subtitle(session, text_, names):
+    project = session.query(Project).first()
+    if project is None:
+        project = Project(name='p')
+        session.add(project)
+        session.flush()
+        session.add(Video(project_id=project.id, video_id='abc'))
+        session.flush()
+    subtitle = Subtitle(project_id=project.id, video_id=session.query(Video).first().id, text=text_,
+                        categories=', '.join(names), category_mask=category_mask(session, names))
+    session.add(subtitle)
+    session.commit()
+    return subtitle
+
+def test_bit_is_id_minus_one(session):
+    assert category_mask(session, 'hate, violence') == 0b11
+    ids = dict(session.query(Category.name, Category.id))
+    assert ids == {'hate': 1, 'violence': 2}
+    assert category_mask(session, ['violence']) == 1 << (ids['violence'] - 1)
+    assert category_names(session, 0b10) == ['violence']
+
+def test_unknown_names_are_added(session):
+    category_mask(session, 'hate')
+    mask = category_mask(session, ['hate', 'harassment/threatening'])
+    assert session.query(Category.name).order_by(Category.id).all() == [('hate',), ('harassment/threatening',)]
+    assert category_names(session, mask) == ['harassment/threatening', 'hate']
+
+def test_categories_past_the_cap_are_ignored(session):
+    names = [f'cat{i}' for i in range(MAX_CATEGORIES + 1)]
+    mask = category_mask(session, names)
+    assert mask == (1 << MAX_CATEGORIES) - 1
+    # The 64th category is stored but never gets a bit
+    assert session.query(Category).count() == MAX_CATEGORIES + 1
+    assert category_mask(session, [names[-1]]) == 0
+
+def test_matching_mask_matches_substrings(session):
+    category_mask(session, 'hate, hate/threatening, violence, self-harm')
+    assert category_names(session, matching_mask(session, 'hate')) == ['hate', 'hate/threatening']
+    assert category_names(session, matching_mask(session, 'HARM, violence')) == ['self-harm', 'violence']
+    assert matching_mask(session, 'spam') == 0
+
+def test_has_any_category_filters_rows(session):
+    _subtitle(session, 'a', ['hate'])
+    _subtitle(session, 'b', ['violence', 'hate/threatening'])
+    _subtitle(session, 'c', [])
+
+    def texts(pattern):
+        query = session.query(Subtitle.text).filter(has_any_category(Subtitle.category_mask, matching_mask(session, pattern)))
+        return sorted(t for t, in query)
+
+    assert texts('hate') == ['a', 'b']
+    assert texts('violence') == ['b']
+    assert texts('spam') == []
+
+def test_backfill_of_existing_rows(session):
+    _subtitle(session, 'a', [])
+    session.execute(text("UPDATE subtitles SET categories = 'hate, violence' WHERE text = 'a'"))
+    session.execute(text("INSERT INTO subtitles (project_id, video_id, text, categories, category_mask) "
+                         "SELECT project_id, video_id, 'b', 'violence', 0 FROM subtitles"))
+    session.commit()
+    # A database from before the mask: drop the column and let the migration add it back
+    session.execute(text('DROP INDEX ix_subtitles_project_mask'))
+    session.execute(text('ALTER TABLE subtitles DROP COLUMN category_mask'))
+    session.commit()
+
+    engine = session.get_bind()
+    db._migrate_schema(engine, sessionmaker(bind=engine))
+
+    masks = dict(session.execute(text('SELECT text, category_mask FROM subtitles')).all())
+    assert category_names(session, masks['a']) == ['hate', 'violence']
+    assert category_names(session, masks['b']) == ['violence']
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from models import Project, Video, Subtitle, CommentFlag, DataChange
+from changes import DELTA_LIMIT, current_version, prune_changes
+from queries import project_delta
+
+def _project_with_video(session, video_id='abc'):
+    project = Project(name='p')
+    session.add(project)
+    session.flush()
+    video = Video(project_id=project.id, video_id=video_id)
+    session.add(video)
+    session.commit()
+    return project, video
+
+def _subtitles(session, project, video, count):
+    session.add_all(Subtitle(project_id=project.id, video_id=video.id, text=f'line {i}') for i in range(count))
+    session.commit()
+
+def test_subtitles_are_logged_once_per_video_and_flush(session):
+    project, video = _project_with_video(session)
+    since = current_version(session, project.id)
+    _subtitles(session, project, video, 200)
+    session.add(CommentFlag(project_id=project.id, video_id=video.id, text='hola'))
+    session.commit()
+
+    entries = session.query(DataChange.item_type, DataChange.item_id).filter(DataChange.id > since).all()
+    assert sorted(entries) == [('video_comments', video.id), ('video_subtitles', video.id)]
+
+def test_delta_reloads_every_row_of_a_changed_video(session):
+    project, video = _project_with_video(session)
+    _subtitles(session, project, video, 3)
+    since = current_version(session, project.id)
+
+    # Editing one subtitle sends the whole video again, deleting one drops it from the rows
+    subtitles = session.query(Subtitle).order_by(Subtitle.id).all()
+    subtitles[0].text = 'changed'
+    session.delete(subtitles[1])
+    session.commit()
+
+    delta = project_delta(session, project, since)
+    assert not delta['resync']
+    assert delta['reloaded'] == {'subtitle': ['abc']}
+    assert [row['text'] for row in delta['subtitles']] == ['changed', 'line 2']
+    assert delta['comments'] == []
+    assert delta['version'] == current_version(session, project.id)
+
+def test_delta_is_empty_when_up_to_date(session):
+    project, video = _project_with_video(session)
+    _subtitles(session, project, video, 3)
+
+    delta = project_delta(session, project, current_version(session, project.id))
+    assert not delta['resync']
+    assert delta['subtitles'] == [] and delta['reloaded'] == {}
+
+def test_delta_asks_for_resync_when_too_many_rows_changed(session):
+    project, video = _project_with_video(session)
+    since = current_version(session, project.id)
+    _subtitles(session, project, video, DELTA_LIMIT + 1)
+
+    delta = project_delta(session, project, since)
+    assert delta['resync']
+    assert delta['subtitles'] == [] and delta['reloaded'] == {}
+
+def test_delta_asks_for_resync_behind_the_pruned_log(session):
+    project, video = _project_with_video(session)
+    since = current_version(session, project.id)
+    _subtitles(session, project, video, 1)
+    _subtitles(session, project, video, 1)
+    session.query(DataChange).update({'created_at': datetime.utcnow() - timedelta(days=8)})
+    session.commit()
+    prune_changes(session)
+    _subtitles(session, project, video, 1)
+
+    assert project_delta(session, project, since)['resync']
+
+def test_prune_keeps_the_last_seven_days(session):
+    project, video = _project_with_video(session)
+    for age in (10, 8, 6, 1):
+        session.add(DataChange(project_id=project.id, item_type='video', item_id=video.id,
+                               created_at=datetime.utcnow() - timedelta(days=age)))
+    session.commit()
+    kept_before = session.query(DataChange).filter(DataChange.created_at >= datetime.utcnow() - timedelta(days=7)).count()
+
+    assert prune_changes(session) == 2
+    assert session.query(DataChange).count() == kept_before
+    assert session.query(DataChange).filter(DataChange.created_at < datetime.utcnow() - timedelta(days=7)).count() == 0
+
+def test_prune_keeps_the_newest_entry(session):
+    project, video = _project_with_video(session)
+    session.query(DataChange).update({'created_at': datetime.utcnow() - timedelta(days=30)})
+    session.commit()
+    version = current_version(session, project.id)
+
+    prune_changes(session)
+    _subtitles(session, project, video, 1)
+    assert current_version(session, project.id) > version
@@ -0,0 +1,130 @@
+import argparse
+
+import pytest
+
+import hatehunter
+from channel_sync import SYNC_PAGE_SIZE, get_sync_state, select_sync_entries
+from database import db
+from models import Project, Video, VideoQueue
+
+CHANNEL = 'https://www.youtube.com/@channel'
+
+def _entries(first, count):
+    return [{'id': f'v{i}', 'title': f'Video {i}', 'duration': 600} for i in range(first, first + count)]
+
+def _project(name, videos=()):
+    """Create a project with ``(video_id, title, status)`` videos"""
+    session = db.get_session()
+    try:
+        project = Project(name=name)
+        session.add(project)
+        session.flush()
+        for video_id, title, status in videos:
+            session.add(Video(project_id=project.id, video_id=video_id, title=title, processing_status=status))
+        session.commit()
+    finally:
+        session.close()
+
+def _statuses(name):
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name=name).one()
+        return dict(session.query(Video.video_id, Video.processing_status).filter_by(project_id=project.id))
+    finally:
+        session.close()
+
+@pytest.fixture
+def listing(monkeypatch):
+    """Fake channel of 120 uploads, newest (v0) first; records the pages read"""
+    uploads = _entries(0, 120)
+    pages = []
+
+    def fetch_channel_entries(channel_url, start=None, end=None):
+        pages.append((start, end))
+        if start is None:
+            return list(uploads)
+        return uploads[start - 1:end]
+
+    monkeypatch.setattr(hatehunter, 'fetch_channel_entries', fetch_channel_entries)
+    monkeypatch.setattr(hatehunter, 'try_notify_server', lambda *args: None)
+    return uploads, pages
+
+def _args(project, **kwargs):
+    defaults = dict(project=project, incremental=True, min_duration=0, rescan_comments=0, language='en',
+                    keywords=None, threshold=30, rate_limit=5, openai_api_key=None, comments=False,
+                    skip_convert=False, skip_analyze=False, update_ytdlp=False, keep_json=False,
+                    no_moderation=False)
+    defaults.update(kwargs)
+    return argparse.Namespace(**defaults)
+
+def test_reading_stops_at_the_page_with_the_last_sync(listing):
+    uploads, pages = listing
+    known = {entry['id']: (entry['title'], 'completed') for entry in uploads[60:]}
+
+    entries = hatehunter.fetch_new_channel_entries(CHANNEL, 'v60', known)
+    assert pages == [(1, SYNC_PAGE_SIZE), (SYNC_PAGE_SIZE + 1, 2 * SYNC_PAGE_SIZE)]
+    assert len(entries) == 2 * SYNC_PAGE_SIZE
+
+def test_changed_titles_are_queued_again():
+    entries = _entries(0, 4)
+    entries[1]['title'] = 'Renamed'
+    entries[2]['title'] = 'Renamed too'
+    known = {
+        'v1': ('Video 1', 'completed'),
+        'v2': ('Video 2', 'processing'),  # Already running, left alone
+        'v3': ('Video 3', 'completed')
+    }
+    new, changed = select_sync_entries(entries, known)
+    assert [entry['id'] for entry in new] == ['v0']
+    assert [entry['id'] for entry in changed] == ['v1']
+
+def test_incremental_sync_queues_only_new_and_changed_uploads(listing):
+    uploads, _ = listing
+    _project('incremental', [(entry['id'], entry['title'], 'completed') for entry in uploads[2:]])
+    uploads[5]['title'] = 'Renamed'
+
+    hatehunter.add_channel_videos_to_queue(CHANNEL, _args('incremental'))
+    queued = {video_id for video_id, status in _statuses('incremental').items() if status == 'queued'}
+    assert queued == {'v0', 'v1', 'v5'}
+
+def test_first_sync_of_an_empty_channel(listing):
+    uploads, _ = listing
+    uploads.clear()
+
+    hatehunter.add_channel_videos_to_queue(CHANNEL, _args('empty'))
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name='empty').one()
+        state = get_sync_state(session, project, CHANNEL)
+        assert state.last_video_id is None and state.videos_seen == 0 and state.videos_queued == 0
+        assert session.query(VideoQueue).filter_by(project_id=project.id).count() == 0
+    finally:
+        session.close()
+
+def test_placeholders_leave_running_videos_alone():
+    _project('placeholders', [('done', 'Done', 'completed'), ('running', 'Running', 'processing')])
+    hatehunter.create_queued_video_placeholders(
+        [{'id': 'done'}, {'id': 'running'}, {'id': 'new', 'title': 'New'}], 'placeholders', CHANNEL
+    )
+    assert _statuses('placeholders') == {'done': 'queued', 'running': 'processing', 'new': 'queued'}
+
+def test_duration_filter_looks_up_what_the_listing_lacks(monkeypatch):
+    looked_up = []
+
+    def lookup_durations(session, video_ids):
+        looked_up.extend(video_ids)
+        return {'no-key': 1200, 'none': 900, 'short-lookup': 60}
+
+    monkeypatch.setattr(hatehunter, 'lookup_durations', lookup_durations)
+    entries = [
+        {'id': 'listed', 'title': 'Listed', 'duration': 700},
+        {'id': 'short', 'title': 'Short', 'duration': 60},
+        {'id': 'no-key', 'title': 'No duration'},
+        {'id': 'none', 'title': 'None', 'duration': None},
+        {'id': 'short-lookup', 'title': 'Short after lookup', 'duration': None},
+        {'id': 'unreadable', 'title': 'Unreadable', 'duration': None}
+    ]
+
+    videos = hatehunter.get_video_list(CHANNEL, min_duration_minutes=10, entries=entries)
+    assert looked_up == ['no-key', 'none', 'short-lookup', 'unreadable']
+    assert [(video['id'], video['duration']) for video in videos] == [('listed', 700), ('no-key', 1200), ('none', 900)]
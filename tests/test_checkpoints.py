@@ -0,0 +1,78 @@
+import hashlib
+
+import pytest
+
+import checkpoints
+import hatehunter
+from checkpoints import CHECKPOINT_BATCH, CHECKPOINT_SECONDS, Checkpoint
+from database import db
+from models import AnalysisCheckpoint
+
+def _saved(project_name):
+    session = db.get_session()
+    try:
+        return dict(session.query(AnalysisCheckpoint.item_key, AnalysisCheckpoint.result).filter_by(
+            project_name=project_name
+        ).all())
+    finally:
+        session.close()
+
+@pytest.fixture
+def moderated(monkeypatch):
+    """Fake moderation API flagging lines that contain 'bad', records the texts it was asked about"""
+    calls = []
+
+    def moderate_text(text):
+        calls.append(text)
+        flagged = 'bad' in text
+        return {"results": [{"flagged": flagged, "categories": {"hate": flagged}, "category_scores": {"hate": 0.9}}]}
+
+    monkeypatch.setattr(hatehunter, 'moderate_text', moderate_text)
+    return calls
+
+def test_flushes_every_batch(monkeypatch):
+    monkeypatch.setattr(checkpoints.time, 'monotonic', lambda: 1000.0)
+    checkpoint = Checkpoint('batch', 'vid', 'subtitle')
+    for i in range(CHECKPOINT_BATCH - 1):
+        checkpoint.add(f'key{i}', {'flagged': False})
+    assert _saved('batch') == {}
+
+    checkpoint.add('last', {'flagged': False})
+    assert len(_saved('batch')) == CHECKPOINT_BATCH
+
+def test_flushes_after_a_while(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpoints.time, 'monotonic', lambda: now[0])
+    checkpoint = Checkpoint('timed', 'vid', 'subtitle')
+    checkpoint.add('first', {'flagged': False})
+    assert _saved('timed') == {}
+
+    now[0] += CHECKPOINT_SECONDS
+    checkpoint.add('second', {'flagged': True})
+    assert _saved('timed') == {'first': {'flagged': False}, 'second': {'flagged': True}}
+
+def test_resumes_from_checkpoint(tmp_path, moderated):
+    lines = ['1.0', 'hello', '2.0', 'bad words', '3.0', 'bye']
+    path = tmp_path / 'vid1.s30'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    # An earlier attempt got through the first two lines before it died
+    checkpoint = Checkpoint('resume', 'vid1', 'subtitle')
+    checkpoint.add(hashlib.md5(b'hello').hexdigest(), {'flagged': False, 'categories': [], 'scores': None})
+    checkpoint.add(hashlib.md5(b'bad words').hexdigest(), {'flagged': True, 'categories': ['hate'], 'scores': {'hate': 0.9}})
+    checkpoint.flush()
+
+    all_subtitles, flagged = hatehunter.analyze_file(str(path), None, project_name='resume')
+    assert moderated == ['bye']
+    assert [item['Texto'] for item in all_subtitles] == ['hello', 'bad words', 'bye']
+    assert [item['Texto'] for item in flagged] == ['bad words']
+    assert len(_saved('resume')) == 3
+
+def test_saving_results_clears_checkpoints(tmp_path, moderated):
+    path = tmp_path / 'vid2.s30'
+    path.write_text('1.0\nbad words\n', encoding='utf-8')
+    all_subtitles, flagged = hatehunter.analyze_file(str(path), None, project_name='saved')
+    assert len(_saved('saved')) == 1
+
+    hatehunter.save_analysis_results('saved', None, ['vid2'], all_subtitles, flagged, [], {})
+    assert _saved('saved') == {}
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from urllib.parse import quote
+
+import pytest
+from werkzeug.http import parse_options_header
+
+import server
+from database import db
+from models import Project, Video, Subtitle
+
+PROJECT = 'Proyecto "ñ"; test'
+
+@pytest.fixture(scope='module')
+def client():
+    session = db.get_session()
+    try:
+        project = Project(name=PROJECT)
+        session.add(project)
+        session.flush()
+        video = Video(project_id=project.id, video_id='abc', title='Título, con "comillas"')
+        session.add(video)
+        session.flush()
+        session.add_all([
+            Subtitle(project_id=project.id, video_id=video.id, timestamp=1.5, text='hola\nmundo',
+                     is_flagged=True, categories='hate', category_scores={'hate': 0.75}),
+            Subtitle(project_id=project.id, video_id=video.id, timestamp=3.0, text='adiós', is_flagged=False)
+        ])
+        session.commit()
+    finally:
+        session.close()
+    return server.app.test_client()
+
+def _export(client, table, fmt):
+    response = client.get(f'/api/project/{quote(PROJECT)}/export/{table}.{fmt}')
+    assert response.status_code == 200
+    disposition, options = parse_options_header(response.headers['Content-Disposition'])
+    assert disposition == 'attachment'
+    assert options['filename'] == f'{PROJECT}_{table}.{fmt}'
+    return response.get_data()
+
+def _check_subtitles(rows):
+    assert [(row['video_id'], row['timestamp'], row['text'], row['is_flagged']) for row in rows] == [
+        ('abc', 1.5, 'hola\nmundo', True),
+        ('abc', 3.0, 'adiós', False)
+    ]
+    assert json.loads(rows[0]['category_scores']) == {'hate': 0.75}
+
+def test_ndjson_round_trip(client):
+    rows = [json.loads(line) for line in _export(client, 'subtitles', 'ndjson').decode('utf-8').splitlines()]
+    for row in rows:
+        row['category_scores'] = json.dumps(row['category_scores'])
+    _check_subtitles(rows)
+
+def test_csv_round_trip(client):
+    rows = list(csv.DictReader(io.StringIO(_export(client, 'subtitles', 'csv').decode('utf-8'), newline='')))
+    for row in rows:
+        row['timestamp'] = float(row['timestamp'])
+        row['is_flagged'] = row['is_flagged'] == 'True'
+    _check_subtitles(rows)
+
+    videos = list(csv.DictReader(io.StringIO(_export(client, 'videos', 'csv').decode('utf-8'), newline='')))
+    assert [video['title'] for video in videos] == ['Título, con "comillas"']
+
+def test_parquet_round_trip(client):
+    pq = pytest.importorskip('pyarrow.parquet')
+    _check_subtitles(pq.read_table(io.BytesIO(_export(client, 'subtitles', 'parquet'))).to_pylist())
+
+def test_ascii_names_stay_plain():
+    assert server.attachment_header('demo_videos.csv') == 'attachment; filename=demo_videos.csv'
+    assert server.attachment_header('my demo_videos.csv') == 'attachment; filename="my demo_videos.csv"'
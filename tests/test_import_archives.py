@@ -0,0 +1,155 @@
+import argparse
+import json
+from concurrent.futures import Future
+
+import pytest
+
+import hatehunter
+from database import db
+from models import Project, Video, Subtitle, CommentFlag
+
+SRT = """1
+00:00:01,000 --> 00:00:03,000
+hello there
+
+2
+00:00:04,000 --> 00:00:06,000
+some bad words
+"""
+
+class SerialExecutor:
+    """ProcessPoolExecutor stand-in that parses in the test process and records what was submitted"""
+    submitted = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, job):
+        self.submitted.append(job[0])
+        future = Future()
+        future.set_result(fn(job))
+        return future
+
+class FakeModeration:
+    """Flags texts containing 'bad' as hate, records every text it is asked about"""
+    texts = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def moderate_texts(self, texts):
+        self.texts.extend(texts)
+        return [{"results": [{"flagged": 'bad' in text, "categories": {"hate": 'bad' in text},
+                              "category_scores": {"hate": 0.9}}]} for text in texts]
+
+    def print_stats(self):
+        pass
+
+@pytest.fixture
+def offline(monkeypatch):
+    SerialExecutor.submitted = []
+    FakeModeration.texts = []
+    monkeypatch.setattr(hatehunter, 'ProcessPoolExecutor', SerialExecutor)
+    monkeypatch.setattr(hatehunter, 'ModerationAPIManager', FakeModeration)
+    monkeypatch.setattr(hatehunter, 'get_moderation_client', lambda args: None)
+    monkeypatch.setattr(hatehunter, 'notify_data_updated', lambda project_name: None)
+
+def _args(project, directory, **kwargs):
+    defaults = dict(project=project, import_dirs=[str(directory)], language='en', threshold=30, comments=True,
+                    no_moderation=False, keywords=None, rate_limit=5, skip_analyze=False, openai_api_key=None)
+    defaults.update(kwargs)
+    return argparse.Namespace(**defaults)
+
+@pytest.fixture
+def archive(tmp_path):
+    """A small archive: subtitles in two languages, a dump with comments, a comments file and a broken dump"""
+    (tmp_path / 'vid1.es.srt').write_text(SRT.replace('hello there', 'hola'), encoding='utf-8')
+    (tmp_path / 'vid1.en.srt').write_text(SRT, encoding='utf-8')
+    (tmp_path / 'vid1.info.json').write_text(json.dumps({
+        'id': 'vid1', 'title': 'First', 'duration': 600, 'formats': [{'url': 'x'}], 'subtitles': {'en': []},
+        'comments': [
+            {'id': 'c1', 'text': 'nice video', 'author': 'a'},
+            {'id': 'c2', 'text': 'bad comment', 'author': 'b'},
+            {'id': 'c3', 'text': '', 'author': 'c'}
+        ]
+    }), encoding='utf-8')
+    channel = tmp_path / 'channel'
+    channel.mkdir()
+    (channel / 'vid2.comments.json').write_text(json.dumps([{'id': 'c4', 'text': 'another bad one'}]), encoding='utf-8')
+    (channel / 'vid3.info.json').write_text('{"id": "vid3", "title": ', encoding='utf-8')
+    (channel / 'vid3.en.srt').write_text(SRT, encoding='utf-8')
+    return tmp_path
+
+def test_find_and_parse_archive(archive):
+    files = hatehunter.find_archive_files([str(archive)])
+    assert sorted(files) == ['vid1', 'vid2', 'vid3']
+    assert hatehunter.pick_subtitle_file(files['vid1']['srt'], 'en').endswith('vid1.en.srt')
+
+    parsed = hatehunter.parse_archive(('vid1', files['vid1']['srt'][0], files['vid1']['info'], None, 30))
+    assert parsed['error'] is None
+    assert [text for _, text in parsed['groups']] == ['hello there some bad words']
+    assert parsed['info']['title'] == 'First' and parsed['info']['subtitles'] is True
+    assert 'formats' not in parsed['info'] and 'comments' not in parsed['info']
+    assert [comment['id'] for comment in parsed['comments']] == ['c1', 'c2']
+
+    parsed = hatehunter.parse_archive(('vid2', None, None, files['vid2']['comments'], 30))
+    assert [comment['text'] for comment in parsed['comments']] == ['another bad one']
+
+def test_malformed_dump_is_reported_not_fatal(archive):
+    files = hatehunter.find_archive_files([str(archive)])
+    parsed = hatehunter.parse_archive(('vid3', files['vid3']['srt'][0], files['vid3']['info'], None, 30))
+    assert parsed['error']
+
+def test_import_skips_what_the_project_has(archive, offline):
+    session = db.get_session()
+    try:
+        project = Project(name='archive')
+        session.add(project)
+        session.flush()
+        video = Video(project_id=project.id, video_id='vid1', title='First')
+        session.add(video)
+        session.flush()
+        session.add(Subtitle(project_id=project.id, video_id=video.id, text='already here'))
+        session.add(CommentFlag(project_id=project.id, video_id=video.id, comment_id='c2', text='bad comment'))
+        session.commit()
+    finally:
+        session.close()
+
+    hatehunter.import_archives(_args('archive', archive))
+
+    # vid1 keeps its subtitles and c2 is not moderated again; vid3 could not be read
+    assert sorted(SerialExecutor.submitted) == ['vid1', 'vid2', 'vid3']
+    assert sorted(FakeModeration.texts) == ['another bad one', 'nice video']
+    session = db.get_session()
+    try:
+        project = session.query(Project).filter_by(name='archive').one()
+        subtitles = session.query(Subtitle.text).filter_by(project_id=project.id).all()
+        assert subtitles == [('already here',)]
+        comments = sorted(comment_id for comment_id, in session.query(CommentFlag.comment_id).filter_by(project_id=project.id))
+        assert comments == ['c2', 'c4']
+        videos = {video_id for video_id, in session.query(Video.video_id).filter_by(project_id=project.id)}
+        assert videos == {'vid1', 'vid2'}
+    finally:
+        session.close()
+
+def test_parsing_runs_one_chunk_ahead(tmp_path, offline, monkeypatch):
+    for i in range(250):
+        (tmp_path / f'v{i:03}.info.json').write_text(json.dumps({'id': f'v{i:03}', 'title': str(i)}), encoding='utf-8')
+    chunks = []
+
+    def import_chunk(parsed_videos, args, known_comment_ids):
+        chunks.append((len(parsed_videos), len(SerialExecutor.submitted)))
+        return 0, 0, 0
+
+    monkeypatch.setattr(hatehunter, 'import_chunk', import_chunk)
+    hatehunter.import_archives(_args('chunks', tmp_path, comments=False, no_moderation=True))
+
+    assert hatehunter.IMPORT_CHUNK_SIZE == 100
+    # While a chunk is saved the next one has already been handed to the pool
+    assert chunks == [(100, 200), (100, 250), (50, 250)]
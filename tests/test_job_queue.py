@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from models import Project, Video, VideoQueue
+from job_queue import (
+    AGING_SECONDS, EXPEDITE_PRIORITY, RETRY_BACKOFF, claim_next, enqueue, expedite, queue_heads,
+    queue_positions, retry_or_fail
+)
+
+def _queue(session, project_name, video_id, priority=0, waited=0):
+    project = session.query(Project).filter_by(name=project_name).first()
+    if project is None:
+        project = Project(name=project_name)
+        session.add(project)
+        session.flush()
+    video = Video(project_id=project.id, video_id=video_id)
+    session.add(video)
+    session.flush()
+    job, _ = enqueue(session, project, video, ['--video', video_id], priority=priority)
+    session.flush()
+    if waited:
+        # Pretend the job was queued ``waited`` seconds ago
+        job.created_at -= timedelta(seconds=waited)
+        job.start_by -= timedelta(seconds=waited)
+    session.commit()
+    return job
+
+def _claimed_videos(session):
+    claimed = []
+    while (job := claim_next(session, 'tests')) is not None:
+        claimed.append(job.video.video_id)
+    return claimed
+
+def test_claim_order_follows_priority_and_aging(session):
+    _queue(session, 'p', 'low', priority=-2)
+    _queue(session, 'p', 'normal')
+    _queue(session, 'p', 'aged', priority=-2, waited=2 * AGING_SECONDS + 60)
+    _queue(session, 'p', 'urgent', priority=5)
+
+    # The aged job reached normal priority; equal priorities go by job id
+    assert _claimed_videos(session) == ['urgent', 'normal', 'aged', 'low']
+
+def test_aging_never_passes_normal_priority(session):
+    _queue(session, 'p', 'normal')
+    _queue(session, 'p', 'very-old', priority=-1, waited=50 * AGING_SECONDS)
+    _queue(session, 'p', 'high', priority=1)
+
+    heads = {head.id: head.priority for head in queue_heads(session)}
+    assert sorted(heads.values()) == [1]
+    assert _claimed_videos(session) == ['high', 'normal', 'very-old']
+
+def test_expedite_moves_a_low_priority_job_first(session):
+    _queue(session, 'p', 'normal')
+    low = _queue(session, 'p', 'low', priority=-3)
+    expedite(session, low.video)
+
+    assert low.priority == EXPEDITE_PRIORITY
+    assert _claimed_videos(session) == ['low', 'normal']
+
+def test_queue_heads_seek_indexes_instead_of_sorting_the_queue(session):
+    for i in range(20):
+        _queue(session, f"p{i % 3}", f"v{i}", priority=(i % 3) - 1)
+
+    statements = []
+    engine = session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        queue_heads(session)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    for statement, parameters in statements:
+        plan = ' | '.join(row[-1] for row in session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ))
+        assert 'SCAN video_queue' not in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+def test_failed_runs_back_off_until_the_job_fails(session):
+    job = _queue(session, 'p', 'flaky')
+    job.max_retries = 3
+    session.commit()
+
+    waits = []
+    for _ in range(job.max_retries):
+        assert claim_next(session, 'tests').id == job.id
+        before = datetime.utcnow()
+        assert retry_or_fail(session, job.id, 'tests', 'boom') == 'queued'
+        waits.append(job.retry_after - before)
+
+        # Not claimable while it backs off
+        assert claim_next(session, 'tests') is None
+        job.retry_after = datetime.utcnow() - timedelta(seconds=1)
+        session.commit()
+
+    for attempt, wait in enumerate(waits, 1):
+        expected = RETRY_BACKOFF * 2 ** (attempt - 1)
+        assert expected <= wait < expected + timedelta(seconds=5)
+
+    claim_next(session, 'tests')
+    assert retry_or_fail(session, job.id, 'tests', 'boom') == 'failed'
+    assert job.retry_count == job.max_retries + 1
+    assert job.completed_at is not None
+    assert claim_next(session, 'tests') is None
+
+def test_positions_place_backing_off_jobs_after_their_retry_time(session):
+    retried = _queue(session, 'p', 'retried', priority=1)
+    retried.retry_after = datetime.utcnow() + timedelta(seconds=250)
+    first = _queue(session, 'p', 'first')
+    second = _queue(session, 'q', 'second')
+    third = _queue(session, 'p', 'third')
+    session.commit()
+
+    positions = queue_positions(session, max_workers=1, job_seconds=100)
+    order = sorted(positions, key=lambda job_id: positions[job_id]['position'])
+    # The retried job outranks the rest but only starts once its backoff is over
+    assert order == [first.id, second.id, third.id, retried.id]
+    assert positions[retried.id]['starts_in'] == 300
+    assert _claimed_videos(session) == ['first', 'second', 'third']
+
+    positions = queue_positions(session, max_workers=1)
+    assert positions == {retried.id: {'position': 1, 'starts_in': None}}
@@ -0,0 +1,71 @@
+import pytest
+
+from models import Project, Video, Subtitle
+from queries import keyset_page
+
+PER_PAGE = 10
+
+@pytest.fixture
+def subtitles(session):
+    """25 subtitles, ids 1-25; every one shares its timestamp and text with others"""
+    project = Project(name='p')
+    session.add(project)
+    session.flush()
+    video = Video(project_id=project.id, video_id='abc')
+    session.add(video)
+    session.flush()
+    session.add_all(Subtitle(project_id=project.id, video_id=video.id, timestamp=float(i // 5), text='same')
+                    for i in range(25))
+    session.commit()
+    return session.query(Subtitle)
+
+def _ids(rows):
+    return [row.id for row in rows]
+
+def test_walks_forward_and_back(subtitles):
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE)
+    assert _ids(rows) == list(range(25, 15, -1))
+    assert info == {'has_next': True, 'has_prev': False}
+
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=rows[-1].id)
+    assert _ids(rows) == list(range(15, 5, -1))
+    assert info == {'has_next': True, 'has_prev': True}
+
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=rows[0].id, direction='prev')
+    assert _ids(rows) == list(range(25, 15, -1))
+    assert info == {'has_next': True, 'has_prev': False}
+
+def test_last_page(subtitles):
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=6)
+    assert _ids(rows) == [5, 4, 3, 2, 1]
+    assert info == {'has_next': False, 'has_prev': True}
+
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=rows[0].id, direction='prev')
+    assert _ids(rows) == list(range(15, 5, -1))
+    assert info == {'has_next': True, 'has_prev': True}
+
+def test_cursor_at_the_edges(subtitles):
+    # Past the newest row: a full first page; before the oldest: nothing left
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=26)
+    assert _ids(rows) == list(range(25, 15, -1))
+    assert info['has_next']
+
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=1)
+    assert rows == [] and not info['has_next']
+
+    rows, info = keyset_page(subtitles, Subtitle.id, PER_PAGE, cursor=25, direction='prev')
+    assert rows == [] and not info['has_prev']
+
+def test_ties_on_other_columns_do_not_skip_or_repeat_rows(subtitles):
+    seen = []
+    cursor, has_next = None, True
+    while has_next:
+        rows, info = keyset_page(subtitles.filter(Subtitle.text == 'same'), Subtitle.id, 7, cursor)
+        seen += _ids(rows)
+        cursor, has_next = rows[-1].id, info['has_next']
+    assert seen == list(range(25, 0, -1))
+
+def test_empty_result(subtitles):
+    rows, info = keyset_page(subtitles.filter(Subtitle.text == 'other'), Subtitle.id, PER_PAGE)
+    assert rows == []
+    assert info == {'has_next': False, 'has_prev': False}
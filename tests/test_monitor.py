@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import monitor
+from models import Project, WatchedChannel
+from monitor import JITTER, FIRST_CHECK_SPREAD, MIN_INTERVAL_MINUTES, claim_due, first_check, next_check, watch_channel
+
+CHANNEL = 'https://www.youtube.com/@channel'
+
+@pytest.fixture
+def project(session):
+    project = Project(name='p')
+    session.add(project)
+    session.commit()
+    return project
+
+def _due_channel(session, project, url=CHANNEL, **kwargs):
+    watched = watch_channel(session, project, url, interval_minutes=60)
+    watched.next_check_at = datetime.utcnow() - timedelta(minutes=1)
+    for key, value in kwargs.items():
+        setattr(watched, key, value)
+    session.commit()
+    return watched
+
+def test_only_one_claimer_wins(session, project, monkeypatch):
+    watched = _due_channel(session, project)
+    other = sessionmaker(bind=session.get_bind())()
+    real_next_check = monitor.next_check
+    rival = {}
+
+    def next_check_with_a_rival(interval, now=None):
+        # The other server claims the channel between our read and our update
+        if 'claimed' not in rival:
+            rival['claimed'] = None
+            rival['claimed'] = claim_due(other, 10)
+        return real_next_check(interval, now)
+
+    monkeypatch.setattr(monitor, 'next_check', next_check_with_a_rival)
+    try:
+        assert claim_due(session, 10) == []
+        assert rival['claimed'] == [watched.id]
+    finally:
+        other.close()
+
+    session.expire_all()
+    assert session.get(WatchedChannel, watched.id).last_status == 'running'
+
+def test_claim_reschedules_and_is_not_due_again(session, project):
+    watched = _due_channel(session, project)
+    now = datetime.utcnow()
+    assert claim_due(session, 10, now) == [watched.id]
+    session.expire_all()
+    assert watched.last_checked_at == now
+    assert watched.next_check_at > now
+    assert claim_due(session, 10) == []
+
+def test_disabled_channels_are_never_claimed(session, project):
+    _due_channel(session, project, enabled=False)
+    enabled = _due_channel(session, project, url=CHANNEL + '2')
+    assert claim_due(session, 10) == [enabled.id]
+
+def test_jitter_stays_within_bounds(monkeypatch):
+    now = datetime(2024, 1, 1)
+    calls = []
+
+    for pick in (min, max):
+        monkeypatch.setattr(monitor.random, 'uniform', lambda a, b: calls.append((a, b)) or pick(a, b))
+        assert next_check(60, now) - now == timedelta(minutes=60 * (1 + (JITTER if pick is max else -JITTER)))
+
+    monkeypatch.setattr(monitor.random, 'uniform', lambda a, b: calls.append((a, b)) or b)
+    assert first_check(60 * 24, now) - now == FIRST_CHECK_SPREAD
+    assert first_check(MIN_INTERVAL_MINUTES / 3, now) - now == timedelta(minutes=MIN_INTERVAL_MINUTES / 3)
+    assert calls[:2] == [(1 - JITTER, 1 + JITTER)] * 2
+
+def test_interval_is_at_least_the_minimum(session, project):
+    watched = watch_channel(session, project, CHANNEL, interval_minutes=1)
+    session.commit()
+    assert watched.interval_minutes == MIN_INTERVAL_MINUTES
+    assert watched.next_check_at <= datetime.utcnow() + timedelta(minutes=MIN_INTERVAL_MINUTES)
+
+    watch_channel(session, project, CHANNEL, interval_minutes=120)
+    watch_channel(session, project, CHANNEL + '/', interval_minutes=5)
+    session.commit()
+    assert session.query(WatchedChannel).count() == 1
+    assert watched.interval_minutes == MIN_INTERVAL_MINUTES
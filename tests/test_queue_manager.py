@@ -0,0 +1,46 @@
+import threading
+
+import server
+
+class FakePool:
+    def __init__(self):
+        self.released = []
+        self.discarded = []
+        self.worker = FakeWorker()
+
+    def acquire(self):
+        return self.worker
+
+    def release(self, worker):
+        self.released.append(worker)
+
+    def discard(self, worker):
+        self.discarded.append(worker)
+
+class FakeWorker:
+    pid = 1234
+    ran = False
+
+    def run(self, *args, **kwargs):
+        self.ran = True
+        return {'status': 'completed'}
+
+def test_job_stopped_before_it_starts_keeps_its_worker(monkeypatch):
+    manager = server.HateHunterQueueManager()
+    manager.worker_pool = pool = FakePool()
+    stops = []
+    done = threading.Event()
+    monkeypatch.setattr(manager, 'renew_lease_while_running', lambda job_id, lease_done: None)
+    monkeypatch.setattr(manager, 'record_stop', lambda *args: stops.append(args))
+    monkeypatch.setattr(manager, 'fail_job', lambda *args, **kwargs: stops.append(('failed',) + args))
+    monkeypatch.setattr(manager, 'wake', done.set)
+
+    manager.running_jobs[7] = {'video_id': 'abc', 'project': 'p', 'project_id': 1}
+    manager.stop_requests[7] = 'paused'
+    manager.execute_job(7, ['--video', 'abc'], 'p', 'abc')
+    assert done.wait(5)
+
+    assert not pool.worker.ran
+    assert pool.released == [pool.worker] and pool.discarded == []
+    assert stops == [(7, 'p', 'abc', 'paused')]
+    assert manager.running_jobs == {} and manager.job_workers == {} and manager.stop_requests == {}
@@ -0,0 +1,28 @@
+import server
+
+def _job(job_id, status):
+    return {'id': job_id, 'project': 'p', 'project_id': 1, 'version': 'v1',
+            'status': status, 'progress': 50, 'error': None, 'cached': False}
+
+def test_report_progress_only_reaches_the_requesting_socket(monkeypatch):
+    sent = []
+    monkeypatch.setattr(server.socketio, 'emit', lambda event, data, **kwargs: sent.append((event, kwargs)))
+    jobs = {'job-1': _job('job-1', 'running')}
+    monkeypatch.setattr(server.report_builder, 'get', lambda job_id: jobs.get(job_id))
+
+    server.watch_report(jobs['job-1'], 'sid-a')
+    server.report_progress(_job('job-1', 'running'))
+    server.report_progress(_job('job-2', 'running'))  # Nobody asked for this one
+    assert sent == [('report_progress', {'to': 'sid-a'})]
+
+    jobs['job-1'] = _job('job-1', 'completed')
+    server.report_progress(jobs['job-1'])
+    assert sent[-1] == ('report_progress', {'to': 'sid-a'})
+    assert 'job-1' not in server.report_listeners
+
+def test_report_progress_without_a_socket_is_not_broadcast(monkeypatch):
+    sent = []
+    monkeypatch.setattr(server.socketio, 'emit', lambda event, data, **kwargs: sent.append(event))
+    server.watch_report(_job('job-3', 'queued'), None)
+    server.report_progress(_job('job-3', 'running'))
+    assert sent == []
@@ -0,0 +1,59 @@
+import importlib
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+def test_cache_dir_does_not_follow_the_current_directory(tmp_path, monkeypatch):
+    from database import db
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop('thumbnails', None)
+    thumbnails = importlib.import_module('thumbnails')
+
+    expected = os.path.join(os.path.dirname(db.db_path), 'thumbnails')
+    assert thumbnails.THUMBNAILS_DIR == expected
+    assert not thumbnails.CACHE_DIR.startswith(str(tmp_path))
+
+FETCH_DURING_TRANSACTION = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from database import db
+from models import CachedImage, Project
+import thumbnails
+
+class Response:
+    status_code = 200
+    headers = {'Content-Type': 'image/png'}
+    content = b'not really a png'
+
+thumbnails.CACHE_DIR = sys.argv[2]
+fetcher = thumbnails.ThumbnailFetcher(workers=1)
+fetcher._get = lambda url, headers: Response()
+
+session = db.get_session()
+session.add(Project(name='uncommitted'))
+session.flush()
+future = fetcher.submit_video('abc', 'https://example.com/abc.png')
+# Let the fetch run while the transaction above is still open
+time.sleep(0.3)
+session.rollback()
+session.close()
+assert future.result(timeout=60)
+fetcher.wait()
+fetcher.shutdown()
+
+check = db.get_session()
+assert check.query(Project).filter_by(name='uncommitted').first() is None, 'the fetch committed the open transaction'
+assert check.query(CachedImage).filter_by(url='https://example.com/abc.png').one().content_hash
+"""
+
+def test_fetch_leaves_an_open_transaction_alone(tmp_path):
+    # A fresh interpreter: the fetcher threads must be OS threads, and other
+    # tests import the server, which monkey patches threading with eventlet
+    env = {**os.environ, 'HATEHUNTER_DB': str(tmp_path / 'hatehunter.db')}
+    result = subprocess.run(
+        [sys.executable, '-c', FETCH_DURING_TRANSACTION, ROOT, str(tmp_path / 'cache')],
+        env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
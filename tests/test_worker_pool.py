@@ -0,0 +1,61 @@
+import json
+import os
+import stat
+
+import worker_pool
+from worker_pool import AnalysisWorker
+
+FAKE_YTDLP = """#!/bin/sh
+echo "yt-dlp output that is not JSON"
+exit 0
+"""
+
+def _fake_ytdlp(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    script = bin_dir / 'yt-dlp'
+    script.write_text(FAKE_YTDLP)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+def test_subprocess_stdout_does_not_reach_the_control_channel(tmp_path, monkeypatch):
+    _fake_ytdlp(tmp_path, monkeypatch)
+    monkeypatch.setenv('HATEHUNTER_DB', str(tmp_path / 'hatehunter.db'))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.chdir(tmp_path)
+
+    worker = AnalysisWorker()
+    try:
+        job = {'job_id': 'job-1', 'args': ['--video', 'dQw4w9WgXcQ', '--project', 'tests', '--comments',
+                                           '--workdir', str(tmp_path / 'job')]}
+        worker.process.stdin.write(json.dumps(job) + '\n')
+        worker.process.stdin.flush()
+        # Read the control pipe directly: every line must be a JSON message
+        for line in worker.process.stdout:
+            message = json.loads(line)
+            if message['type'] == 'result':
+                break
+            assert message['type'] == 'progress'
+        assert message['job_id'] == 'job-1'
+        assert worker.alive()
+    finally:
+        worker.stop()
+
+def test_non_json_lines_are_logged_not_fatal(tmp_path, monkeypatch):
+    fake_worker = tmp_path / 'fake_worker.py'
+    fake_worker.write_text(
+        "import sys, json\n"
+        "for line in sys.stdin:\n"
+        "    job = json.loads(line)\n"
+        "    print('stray output')\n"
+        "    print(json.dumps({'type': 'result', 'job_id': job['job_id'], 'status': 'completed', 'error': None}), flush=True)\n"
+    )
+    monkeypatch.setattr(worker_pool, 'HATEHUNTER_SCRIPT', str(fake_worker))
+
+    worker = AnalysisWorker()
+    try:
+        result = worker.run('job-2', [])
+        assert result['status'] == 'completed'
+        assert worker.jobs_done == 1
+    finally:
+        worker.stop()
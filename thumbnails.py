@@ -0,0 +1,335 @@
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import requests
+from sqlalchemy import func
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow the original images are served as they are
+    Image = None
+from database import db
+from models import CachedImage
+
+logger = logging.getLogger(__name__)
+
+# Next to the database, so the server, the CLI and workers in their own
+# --workdir all share one cache whatever the current directory is
+THUMBNAILS_DIR = os.path.join(os.path.dirname(db.db_path), "thumbnails")
+CACHE_DIR = os.path.join(THUMBNAILS_DIR, "cache")
+VARIANTS_DIR = os.path.join(CACHE_DIR, "variants")
+
+# Least recently used images are dropped once the cache grows past this
+MAX_CACHE_BYTES = int(os.environ.get("HATEHUNTER_THUMBNAIL_CACHE_MB", 500)) * 1024 * 1024
+
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 10
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 1  # Seconds, doubled after each failed attempt
+
+# Cached images are checked against the origin (If-None-Match) after this
+REVALIDATE_AFTER = timedelta(days=7)
+
+# A URL that failed this many times in a row is not tried again until it is revalidated
+MAX_FAILURES = 5
+
+EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+
+# Resized copies served to the pages, by width in pixels; generated once per image
+VARIANT_WIDTHS = {'avatar': 48, 'small': 120, 'medium': 320, 'large': 480}
+VARIANT_FORMATS = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+VARIANT_QUALITY = 80
+
+def video_thumbnail_url(video_id):
+    return f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
+
+def url_key(url):
+    """Cache key of images that do not belong to a video (avatars)"""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+def blob_path(content_hash, content_type=None):
+    extension = EXTENSIONS.get(content_type, 'img')
+    return os.path.join(CACHE_DIR, content_hash[:2], f"{content_hash}.{extension}")
+
+def _write_blob(content, content_type):
+    content_hash = hashlib.sha256(content).hexdigest()
+    path = blob_path(content_hash, content_type)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so readers never see half an image
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return content_hash
+
+def cached_image(session, kind, key):
+    """Newest downloaded image of a video (kind 'video') or avatar, or None"""
+    return session.query(CachedImage).filter(
+        CachedImage.kind == kind,
+        CachedImage.key == key,
+        CachedImage.content_hash != None
+    ).order_by(CachedImage.fetched_at.desc()).first()
+
+def cached_path(session, kind, key):
+    """Local file of a cached image, or None if it was never downloaded"""
+    image = cached_image(session, kind, key)
+    if image is None:
+        return None
+    path = blob_path(image.content_hash, image.content_type)
+    return path if os.path.exists(path) else None
+
+def image_url(content_hash, size='medium', fmt='webp'):
+    """Content addressed URL of a cached image, it never changes so browsers keep it for good"""
+    return f"/images/{content_hash}/{size}.{fmt}"
+
+def video_thumbnail_path(video_id, size='medium'):
+    """Local URL of a video thumbnail that is not cached yet, downloaded on the first request"""
+    return f"/thumbnails/{video_id}.jpg?size={size}"
+
+def variant_path(content_hash, size, fmt):
+    return os.path.join(VARIANTS_DIR, content_hash[:2], f"{content_hash}-{size}.{fmt}")
+
+def image_variant(content_hash, content_type, size, fmt):
+    """(path, mimetype) of an image resized to ``size`` and encoded as ``fmt``.
+
+    The variant is written next to the cache the first time it is asked for.
+    Falls back to the original file when Pillow is missing or cannot read it.
+    """
+    original = blob_path(content_hash, content_type)
+    if Image is None or size not in VARIANT_WIDTHS or fmt not in VARIANT_FORMATS:
+        return original, content_type
+    path = variant_path(content_hash, size, fmt)
+    if os.path.exists(path):
+        return path, VARIANT_FORMATS[fmt]
+    try:
+        with Image.open(original) as image:
+            image = image.convert('RGB')
+            width = VARIANT_WIDTHS[size]
+            # Only ever shrink, keeping the aspect ratio
+            image.thumbnail((width, width * 4))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            if fmt == 'webp':
+                image.save(tmp_path, 'WEBP', quality=VARIANT_QUALITY, method=4)
+            else:
+                image.save(tmp_path, 'JPEG', quality=VARIANT_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not resize image {content_hash}: {e}")
+        return original, content_type
+    return path, VARIANT_FORMATS[fmt]
+
+def remove_variants(content_hash):
+    for size in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            try:
+                os.remove(variant_path(content_hash, size, fmt))
+            except OSError:
+                pass
+
+def cached_hashes(session, kind, keys):
+    """key -> content hash of the newest downloaded image, for the keys that have one"""
+    keys = list(set(keys))
+    hashes = {}
+    for start in range(0, len(keys), 500):
+        hashes.update(session.query(CachedImage.key, CachedImage.content_hash).filter(
+            CachedImage.kind == kind,
+            CachedImage.key.in_(keys[start:start + 500]),
+            CachedImage.content_hash != None
+        ).order_by(CachedImage.fetched_at))
+    return hashes
+
+def localize_thumbnails(session, videos, size='medium'):
+    """Point the ``thumbnail`` of video dicts to the local cache instead of YouTube"""
+    hashes = cached_hashes(session, 'video', [video['id'] for video in videos])
+    for video in videos:
+        content_hash = hashes.get(video['id'])
+        video['thumbnail'] = image_url(content_hash, size) if content_hash else video_thumbnail_path(video['id'], size)
+    return videos
+
+def localize_avatars(session, items, field, kind, fetcher=None, target='avatar', size='avatar'):
+    """Set ``items[target]`` to the cached copy of the avatar URL in ``items[field]``.
+
+    The remote URL stays in ``field``. Avatars that are not cached yet get the
+    remote URL and are handed to ``fetcher``.
+    """
+    keys = {item[field]: url_key(item[field]) for item in items if item.get(field)}
+    hashes = cached_hashes(session, kind, keys.values())
+    for item in items:
+        url = item.get(field)
+        content_hash = hashes.get(keys[url]) if url else None
+        item[target] = image_url(content_hash, size) if content_hash else url
+        if url and not content_hash and fetcher is not None:
+            fetcher.submit_avatar(url, kind=kind)
+    return items
+
+def prune_cache(session, max_bytes=MAX_CACHE_BYTES):
+    """Drop least recently used images until the cache fits in ``max_bytes``"""
+    total = session.query(func.coalesce(func.sum(CachedImage.size), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+
+    removed = []
+    for image_id, content_hash, content_type, size in session.query(
+        CachedImage.id, CachedImage.content_hash, CachedImage.content_type, CachedImage.size
+    ).filter(CachedImage.content_hash != None).order_by(CachedImage.last_used_at).all():
+        if total <= max_bytes:
+            break
+        session.query(CachedImage).filter_by(id=image_id).delete(synchronize_session=False)
+        removed.append((content_hash, content_type))
+        total -= size or 0
+    session.commit()
+
+    for content_hash, content_type in set(removed):
+        # Identical images are stored once, keep the file while another URL points to it
+        if not session.query(CachedImage.id).filter_by(content_hash=content_hash).first():
+            try:
+                os.remove(blob_path(content_hash, content_type))
+            except OSError:
+                pass
+            remove_variants(content_hash)
+    logger.info(f"Pruned {len(removed)} images from the thumbnail cache")
+    return len(removed)
+
+def _green_threads():
+    eventlet = sys.modules.get('eventlet')
+    return eventlet is not None and eventlet.patcher.is_monkey_patched('thread')
+
+class ThumbnailFetcher:
+    """Downloads thumbnails and avatars into the local cache on a background pool.
+
+    ``submit`` returns immediately. Failed downloads are retried with a backoff,
+    cached images are revalidated with ETag / Last-Modified after
+    ``REVALIDATE_AFTER``, and the cache is kept under ``MAX_CACHE_BYTES``.
+    Outside the server the pool threads use their own database connections,
+    never the shared one.
+    """
+
+    def __init__(self, workers=FETCH_WORKERS, max_bytes=MAX_CACHE_BYTES):
+        self.http = requests.Session()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+        self.max_bytes = max_bytes
+        self.written = 0  # Bytes stored since the last prune
+        self.sessions = None  # Private session factory, created on the first fetch
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def submit(self, kind, key, url):
+        if url and url.startswith(('http://', 'https://')):
+            future = self.pool.submit(self._fetch_safely, kind, key, url)
+            with self.lock:
+                self.pending.add(future)
+            future.add_done_callback(self._done)
+            return future
+        return None
+
+    def _done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def wait(self, timeout=None):
+        """Block until the downloads submitted so far are finished"""
+        with self.lock:
+            pending = list(self.pending)
+        wait(pending, timeout=timeout)
+
+    def submit_video(self, video_id, url=None):
+        return self.submit('video', video_id, url or video_thumbnail_url(video_id))
+
+    def submit_avatar(self, url, kind='avatar'):
+        return self.submit(kind, url_key(url), url) if url else None
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+    def _fetch_safely(self, kind, key, url):
+        try:
+            return self.fetch(kind, key, url)
+        except Exception as e:
+            logger.warning(f"Could not cache image {url}: {e}")
+            return None
+
+    def _session(self):
+        with self.lock:
+            if self.sessions is None:
+                # In the server the pool threads are eventlet green threads: SQLite's busy
+                # wait on a second connection would block every other one, so they keep
+                # the shared session like the request handlers do
+                self.sessions = db.get_session if _green_threads() else db.private_sessionmaker()
+        return self.sessions()
+
+    def fetch(self, kind, key, url):
+        """Download (or revalidate) one image; returns its local path or None"""
+        session = self._session()
+        try:
+            image = session.query(CachedImage).filter_by(url=url).first()
+            if image is None:
+                image = CachedImage(url=url)
+                session.add(image)
+            image.kind, image.key = kind, key
+            now = datetime.utcnow()
+            image.last_used_at = now
+
+            fresh = image.fetched_at and now - image.fetched_at < REVALIDATE_AFTER
+            path = blob_path(image.content_hash, image.content_type) if image.content_hash else None
+            if fresh and (path and os.path.exists(path) or (image.failures or 0) >= MAX_FAILURES):
+                session.commit()
+                return path
+
+            headers = {}
+            if path and os.path.exists(path):
+                if image.etag:
+                    headers['If-None-Match'] = image.etag
+                if image.last_modified:
+                    headers['If-Modified-Since'] = image.last_modified
+            else:
+                path = None
+
+            response = self._get(url, headers)
+            image.fetched_at = datetime.utcnow()
+            if response is None or response.status_code not in (200, 304):
+                image.failures = (image.failures or 0) + 1
+                session.commit()
+                return path
+
+            image.failures = 0
+            if response.status_code == 200:
+                content_type = response.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip()
+                image.content_hash = _write_blob(response.content, content_type)
+                image.content_type = content_type
+                image.size = len(response.content)
+                image.etag = response.headers.get('ETag')
+                image.last_modified = response.headers.get('Last-Modified')
+                path = blob_path(image.content_hash, content_type)
+                self.written += image.size
+            session.commit()
+
+            if self.written > self.max_bytes // 10:
+                self.written = 0
+                prune_cache(session, self.max_bytes)
+            return path
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _get(self, url, headers):
+        """GET with retries on network errors, 429 and 5xx; None if every attempt failed"""
+        response = None
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.http.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+                if response.status_code < 500 and response.status_code != 429:
+                    return response
+            except requests.RequestException as e:
+                logger.debug(f"Attempt {attempt + 1} to fetch {url} failed: {e}")
+                response = None
+            if attempt + 1 < MAX_ATTEMPTS:
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+        return response
@@ -0,0 +1,196 @@
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import VideoMetadata
+
+# Concurrent yt-dlp lookups for videos whose metadata is missing or stale
+LOOKUP_WORKERS = 8
+LOOKUP_TIMEOUT = 30
+
+# Counters change all the time, the rest of the metadata hardly ever
+STATS_FIELDS = ('view_count', 'like_count', 'comment_count')
+STATS_MAX_AGE = timedelta(hours=6)
+STATIC_MAX_AGE = timedelta(days=30)
+
+METADATA_COLUMNS = (
+    'title', 'uploader', 'uploader_avatar', 'upload_date', 'duration', 'view_count', 'like_count',
+    'comment_count', 'thumbnail', 'webpage_url', 'quality', 'has_captions', 'is_live'
+)
+STATIC_FIELDS = tuple(field for field in METADATA_COLUMNS if field not in STATS_FIELDS)
+
+def _chunks(items, size=500):
+    # Stay under SQLite's limit of bound parameters
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def format_duration(seconds):
+    if not seconds:
+        return ''
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def format_count(count):
+    if count is None:
+        return ''
+    if count >= 1000000:
+        return f"{count/1000000:.1f}M"
+    if count >= 1000:
+        return f"{count/1000:.1f}K"
+    return str(count)
+
+def info_values(info):
+    """Column values of the metadata store from a yt-dlp info dict"""
+    video_id = info.get('id')
+    upload_date = info.get('upload_date')
+    if upload_date and len(upload_date) == 8:
+        upload_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+    return {
+        'title': info.get('title'),
+        'uploader': info.get('uploader') or info.get('channel'),
+        'uploader_avatar': info.get('uploader_avatar_url') or info.get('channel_avatar_url'),
+        'upload_date': upload_date,
+        'duration': int(info['duration']) if info.get('duration') else None,
+        'view_count': info.get('view_count'),
+        'like_count': info.get('like_count'),
+        'comment_count': info.get('comment_count'),
+        'thumbnail': info.get('thumbnail'),
+        'webpage_url': info.get('webpage_url') or (video_id and f"https://www.youtube.com/watch?v={video_id}"),
+        'quality': info.get('format_note') or info.get('resolution'),
+        'has_captions': bool(info.get('subtitles') or info.get('automatic_captions')),
+        'is_live': bool(info.get('is_live'))
+    }
+
+def _upsert(session, video_id, values):
+    # Never overwrite a known value with a missing one
+    update = {key: value for key, value in values.items() if value is not None}
+    statement = sqlite_insert(VideoMetadata).values(video_id=video_id, **values)
+    if update:
+        statement = statement.on_conflict_do_update(index_elements=['video_id'], set_=update)
+    else:
+        statement = statement.on_conflict_do_nothing()
+    session.execute(statement)
+
+def store_info(session, video_id, info):
+    """Save a full yt-dlp info dict of a video; the caller commits"""
+    _upsert(session, video_id, {**info_values(info), 'fetched_at': datetime.utcnow()})
+
+def store_metadata(session, items):
+    """Save partial metadata from ``{video_id: {'title', 'duration'}}`` (e.g. a channel listing); the caller commits"""
+    for video_id, info in items.items():
+        _upsert(session, video_id, {
+            'title': info.get('title'),
+            'duration': int(info['duration']) if info.get('duration') else None
+        })
+
+def fetch_info(video_id, timeout=LOOKUP_TIMEOUT):
+    """Full yt-dlp metadata of one video, or None when it cannot be read"""
+    try:
+        result = subprocess.run(
+            ["yt-dlp", "-J", "--no-playlist", f"https://www.youtube.com/watch?v={video_id}"],
+            capture_output=True, text=True, timeout=timeout
+        )
+        if result.returncode == 0:
+            return json.loads(result.stdout)
+    except (subprocess.TimeoutExpired, ValueError):
+        pass
+    return None
+
+def fetch_many(session, video_ids, workers=LOOKUP_WORKERS):
+    """Look up ``video_ids`` with yt-dlp concurrently and store them. Returns the ids found."""
+    video_ids = list(video_ids)
+    if not video_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(video_ids))) as pool:
+        infos = dict(zip(video_ids, pool.map(fetch_info, video_ids)))
+    found = [video_id for video_id, info in infos.items() if info]
+    for video_id in found:
+        store_info(session, video_id, infos[video_id])
+    session.commit()
+    return found
+
+def is_stale(row, fields=STATIC_FIELDS, now=None):
+    """True when one of ``fields`` of a cached row is missing or older than its max age"""
+    if row is None or row.fetched_at is None:
+        return True
+    age = (now or datetime.utcnow()) - row.fetched_at
+    if age > STATS_MAX_AGE and any(field in STATS_FIELDS for field in fields):
+        return True
+    return age > STATIC_MAX_AGE
+
+def metadata_dict(row):
+    """Display values of a cached row, formatted the way video cards show them"""
+    video_id = row.video_id
+    return {
+        'id': video_id,
+        'title': row.title or f'Video {video_id}',
+        'uploader': row.uploader or '',
+        'uploader_avatar': row.uploader_avatar or '',
+        'upload_date': row.upload_date or '',
+        'duration': format_duration(row.duration),
+        'view_count': format_count(row.view_count),
+        'like_count': format_count(row.like_count),
+        'comment_count': format_count(row.comment_count),
+        'thumbnail': row.thumbnail or f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg",
+        'webpage_url': row.webpage_url or f"https://www.youtube.com/watch?v={video_id}",
+        'quality': row.quality or '',
+        'has_captions': bool(row.has_captions),
+        'is_live': bool(row.is_live)
+    }
+
+def get_metadata(session, video_ids, fields=STATIC_FIELDS, fetch=True):
+    """Metadata of ``video_ids`` as display dicts, keyed by video id.
+
+    Rows whose requested ``fields`` are missing or stale are fetched again in one
+    concurrent batch (unless ``fetch`` is False, then the cached values are
+    used). Videos that cannot be read at all are left out.
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+    rows = {}
+    for chunk in _chunks(video_ids):
+        rows.update((row.video_id, row) for row in session.query(VideoMetadata).filter(
+            VideoMetadata.video_id.in_(chunk)
+        ))
+
+    if fetch:
+        now = datetime.utcnow()
+        stale = [video_id for video_id in video_ids if is_stale(rows.get(video_id), fields, now)]
+        if fetch_many(session, stale):
+            session.expire_all()
+            for chunk in _chunks(stale):
+                rows.update((row.video_id, row) for row in session.query(VideoMetadata).filter(
+                    VideoMetadata.video_id.in_(chunk)
+                ))
+
+    return {video_id: metadata_dict(row) for video_id, row in rows.items()}
+
+def refresh_metadata(session, video_ids):
+    """Batch refresh of every stale field, counters included"""
+    return get_metadata(session, video_ids, fields=METADATA_COLUMNS)
+
+def cached_durations(session, video_ids):
+    """video_id -> duration in seconds of the videos already in the metadata store"""
+    durations = {}
+    for chunk in _chunks(video_ids):
+        durations.update(session.query(VideoMetadata.video_id, VideoMetadata.duration).filter(
+            VideoMetadata.video_id.in_(chunk),
+            VideoMetadata.duration != None
+        ).all())
+    return durations
+
+def lookup_durations(session, video_ids, workers=LOOKUP_WORKERS):
+    """Durations of ``video_ids``: from the store, the rest fetched concurrently and stored.
+
+    Videos whose metadata could not be read are missing from the result.
+    """
+    durations = cached_durations(session, video_ids)
+    missing = [video_id for video_id in video_ids if video_id not in durations]
+    if missing:
+        fetch_many(session, missing, workers)
+        durations.update(cached_durations(session, missing))
+    return durations
@@ -2,9 +2,10 @@ import json
 import logging
 from datetime import datetime
 from flask_socketio import emit, join_room, leave_room
-from sqlalchemy.orm import joinedload
 from database import db
-from models import Project, Video, Subtitle, SubtitleFlag, CommentFlag, ReportedItem, ActiveUser, VideoQueue
+from models import Project, ReportedItem, ActiveUser
+from queries import project_summaries, project_summary, project_delta, invalidate_counts
+from changes import log_bulk_change
 
 logger = logging.getLogger(__name__)
 
@@ -83,8 +84,8 @@ class WebSocketHandler:
                 user.last_activity = datetime.utcnow()
                 session.commit()
             
-            # Send project data
-            self.send_project_data(session_id, project_name)
+            # Send project summary (rows come from the HTTP APIs)
+            self.send_project_summary(session_id, project_name)
             
         except Exception as e:
             logger.error(f"Error joining project {project_name} for {session_id}: {e}")
@@ -158,6 +159,7 @@ class WebSocketHandler:
                     logger.info(f"GLOBAL report not found to remove: {item_type} {item_id}")
             
             session.commit()
+            invalidate_counts(project.id)
             
             # Broadcast update to all in project room
             self.socketio.emit('report_updated', {
@@ -193,8 +195,11 @@ class WebSocketHandler:
                 project_id=project.id,
                 item_type=item_type
             ).delete()
+            # Bulk delete skips the flush hook, log it explicitly
+            log_bulk_change(session, project.id, f'{item_type}_report')
             
             session.commit()
+            invalidate_counts(project.id)
             logger.info(f"Cleared {deleted_count} reports for {project_name} - {item_type}")
             
             # Broadcast update
@@ -213,39 +218,8 @@ class WebSocketHandler:
         """Send initial dashboard data to a client"""
         session = db.get_session()
         try:
-            # Obtener proyectos con consultas separadas para mejor rendimiento
-            projects = session.query(Project).all()
-            
-            projects_data = []
-            for project in projects:
-                # Contar elementos por separado
-                subtitles_count = session.query(SubtitleFlag).filter_by(project_id=project.id).count()
-                comments_count = session.query(CommentFlag).filter_by(project_id=project.id).count()
-                videos_count = session.query(Video).filter_by(project_id=project.id).count()
-                
-                # Obtener categorías únicas
-                categories = set()
-                
-                # Categorías de subtítulos
-                subtitle_flags = session.query(SubtitleFlag.categories).filter_by(project_id=project.id).all()
-                for (cat_str,) in subtitle_flags:
-                    if cat_str:
-                        categories.update(cat.strip() for cat in cat_str.split(',') if cat.strip())
-                
-                # Categorías de comentarios
-                comment_flags = session.query(CommentFlag.categories).filter_by(project_id=project.id).all()
-                for (cat_str,) in comment_flags:
-                    if cat_str:
-                        categories.update(cat.strip() for cat in cat_str.split(',') if cat.strip())
-                
-                projects_data.append({
-                    'name': project.name,
-                    'subtitles_count': subtitles_count,
-                    'comments_count': comments_count,
-                    'videos_count': videos_count,
-                    'categories': sorted(list(categories)),
-                    'date': project.updated_at.strftime("%Y-%m-%d %H:%M") if project.updated_at else ""
-                })
+            # Proyectos con contadores y categorías en consultas agregadas
+            projects_data = project_summaries(session)
             
             logger.info(f"Sending initial data to {session_id}: {len(projects_data)} projects")
             
@@ -262,8 +236,12 @@ class WebSocketHandler:
         finally:
             session.close()
     
-    def send_project_data(self, session_id, project_name):
-        """Send project-specific data to a client"""
+    def send_project_summary(self, session_id, project_name):
+        """Send the counters and data version of a project to a client.
+
+        Rows are fetched by the pages through the paginated HTTP APIs, the version
+        lets the client ask for ``project_delta`` updates afterwards.
+        """
         session = db.get_session()
         try:
             project = session.query(Project).filter_by(name=project_name).first()
@@ -271,133 +249,34 @@ class WebSocketHandler:
             if not project:
                 logger.warning(f"Project {project_name} not found")
                 return
-
-            # Get reported items for this project (GLOBAL, no filtrar por session_id)
-            reported_subtitles = set()
-            reported_comments = set()
-            
-            # CAMBIO: Quitar el filtro reported_by=session_id para hacer reportes globales
-            reports = session.query(ReportedItem).filter_by(
-                project_id=project.id
-                # Removido: reported_by=session_id
-            ).all()
-            
-            # DEBUG: Logging detallado de reportes
-            logger.info(f"🔍 DEBUG: Found {len(reports)} GLOBAL reports in project {project_name}")
-            for report in reports:
-                logger.info(f"🔍 DEBUG: Report - Type: {report.item_type}, ID: {report.item_id}, By: {report.reported_by}")
-            
-            for report in reports:
-                if report.item_type == 'subtitle':
-                    reported_subtitles.add(report.item_id)
-                else:
-                    reported_comments.add(report.item_id)
-
-            logger.info(f"🔍 DEBUG: GLOBAL reported subtitle IDs: {reported_subtitles}")
-            logger.info(f"🔍 DEBUG: GLOBAL reported comment IDs: {reported_comments}")
-
-            # Prepare videos data with calculated counters
-            videos = session.query(Video).filter_by(project_id=project.id).all()
-            videos_data = []
-            for video in videos:
-                # Calcular contadores dinámicamente
-                subtitle_count = session.query(SubtitleFlag).filter_by(
-                    project_id=project.id,
-                    video_id=video.id
-                ).count()
-                
-                comment_count = session.query(CommentFlag).filter_by(
-                    project_id=project.id,
-                    video_id=video.id
-                ).count()
-                
-                videos_data.append({
-                    'id': video.video_id,
-                    'title': video.title or f'Video {video.video_id}',
-                    'uploader': video.uploader or '',
-                    'upload_date': video.upload_date or '',
-                    'duration': video.duration or '',
-                    'view_count': video.view_count or '',
-                    'like_count': video.like_count or '',
-                    'comment_count': video.comment_count or '',
-                    'thumbnail': video.thumbnail or f"https://img.youtube.com/vi/{video.video_id}/mqdefault.jpg",
-                    'webpage_url': video.webpage_url or f"https://www.youtube.com/watch?v={video.video_id}",
-                    'flagged_subtitles': subtitle_count,  # Calculado dinámicamente
-                    'flagged_comments': comment_count,    # Calculado dinámicamente
-                    'processing_status': video.processing_status or 'completed',  # ← NUEVO CAMPO
-                    'processing_error': video.processing_error
-                })
-
-            # Prepare subtitles data - NOW FROM Subtitle table (all subtitles)
-            subtitles = session.query(Subtitle).join(Video).filter(
-                Subtitle.project_id == project.id
-            ).all()
-
-            subtitles_data = []
-            reported_subtitles_count = 0
-            for subtitle in subtitles:
-                is_reported = subtitle.id in reported_subtitles
-                if is_reported:
-                    reported_subtitles_count += 1
-                    logger.info(f"🔍 DEBUG: Subtitle ID {subtitle.id} is marked as reported")
-
-                subtitles_data.append({
-                    'id': subtitle.id,
-                    'video_id': subtitle.video.video_id,
-                    'timestamp': subtitle.timestamp,
-                    'text': subtitle.text or "",
-                    'categories': subtitle.categories or "",  # Empty if not flagged
-                    'youtube_url': subtitle.youtube_url or "",
-                    'is_reported': is_reported,
-                    'is_flagged': subtitle.is_flagged  # NEW: Indicates if it contains hate speech
-                })
-
-            logger.info(f"🔍 DEBUG: Sending {len(subtitles_data)} total subtitles, {reported_subtitles_count} marked as reported")
-
-            # Prepare comments data
-            comments = session.query(CommentFlag).join(Video).filter(
-                CommentFlag.project_id == project.id
-            ).all()
-            
-            comments_data = []
-            reported_comments_count = 0
-            for flag in comments:
-                is_reported = flag.id in reported_comments
-                if is_reported:
-                    reported_comments_count += 1
-                    logger.info(f"🔍 DEBUG: Comment ID {flag.id} is marked as reported")
-                
-                comments_data.append({
-                    'id': flag.id,
-                    'video_id': flag.video.video_id,
-                    'author': flag.comment_author or "",
-                    'author_thumbnail': flag.author_thumbnail or "",
-                    'text': flag.text or "",
-                    'categories': flag.categories or "",
-                    'youtube_url': flag.youtube_url or "",
-                    'is_reported': is_reported  # Campo agregado
-                })
             
-            logger.info(f"🔍 DEBUG: Sending {len(comments_data)} comments, {reported_comments_count} marked as reported")
+            summary = project_summary(session, project)
+            logger.info(f"Sending project summary to {session_id}: {project_name} v{summary['version']} - {summary['videos_count']} videos, {summary['subtitles_count']} subtitles, {summary['comments_count']} comments")
             
-            logger.info(f"Sending project data to {session_id}: {project_name} - {len(videos_data)} videos, {len(subtitles_data)} subtitles, {len(comments_data)} comments, {len(reported_subtitles)} reported subs, {len(reported_comments)} reported comments")
+            emit('project_summary', summary, to=session_id)
             
-            emit('project_data', {
-                'project': project_name,
-                'videos': videos_data,
-                'subtitles': subtitles_data,
-                'comments': comments_data
-            }, to=session_id)
+        except Exception as e:
+            logger.error(f"Error sending project summary to {session_id}: {e}")
+        finally:
+            session.close()
+    
+    def send_project_delta(self, session_id, project_name, since):
+        """Send the rows of a project that changed after version ``since``"""
+        session = db.get_session()
+        try:
+            project = session.query(Project).filter_by(name=project_name).first()
+            
+            if not project:
+                logger.warning(f"Project {project_name} not found")
+                return
+            
+            delta = project_delta(session, project, int(since))
+            logger.info(f"Sending project delta to {session_id}: {project_name} v{since} -> v{delta['version']}{' (resync)' if delta['resync'] else ''}")
+            
+            emit('project_delta', delta, to=session_id)
             
         except Exception as e:
-            logger.error(f"Error sending project data to {session_id}: {e}")
-            # Enviar datos vacíos en caso de error
-            emit('project_data', {
-                'project': project_name,
-                'videos': [],
-                'subtitles': [],
-                'comments': []
-            }, to=session_id)
+            logger.error(f"Error sending project delta to {session_id}: {e}")
         finally:
             session.close()
     
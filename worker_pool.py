@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+HATEHUNTER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hatehunter.py')
+
+# Workers are restarted after this many jobs to keep memory in check
+MAX_JOBS_PER_WORKER = 200
+
+class WorkerDied(Exception):
+    """The worker process exited before answering a job"""
+
+class AnalysisWorker:
+    """A long-lived ``hatehunter.py --worker`` process.
+
+    Jobs go in as JSON lines on stdin; progress events and then one result line
+    come back as JSON lines on stdout. Everything the worker prints goes to
+    stderr and is logged.
+    """
+
+    def __init__(self):
+        self.jobs_done = 0
+        self.label = None  # Video being processed, for the log prefix
+        self.process = subprocess.Popen(
+            [sys.executable, HATEHUNTER_SCRIPT, '--worker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1,
+            cwd=os.getcwd()
+        )
+        threading.Thread(target=self._log_output, daemon=True).start()
+        logger.info(f"Started analysis worker {self.process.pid}")
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def _log_output(self):
+        for line in self.process.stderr:
+            line = line.strip()
+            if line:
+                logger.info(f"Worker-{self.pid} [{self.label or 'idle'}]: {line}")
+
+    def run(self, job_id, args, label=None, on_event=None):
+        """Run one job and return its result dict (``status``, ``error``).
+
+        Progress events received meanwhile are passed to ``on_event``.
+        """
+        self.label = label
+        try:
+            self.process.stdin.write(json.dumps({'job_id': job_id, 'args': list(args)}) + '\n')
+            self.process.stdin.flush()
+            for line in self.process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    # Stray output that did not go through stderr, it is not a control message
+                    if line.strip():
+                        logger.info(f"Worker-{self.pid} [{self.label or 'idle'}]: {line.strip()}")
+                    continue
+                if message.get('type') == 'result':
+                    self.jobs_done += 1
+                    return message
+                if on_event:
+                    on_event(message)
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerDied(f"Worker {self.pid} is gone: {e}")
+        finally:
+            self.label = None
+
+        raise WorkerDied(f"Worker {self.pid} exited with code {self.process.wait()}")
+
+    def terminate(self, timeout=5):
+        """Abort the running job: SIGTERM now, SIGKILL if the worker is still there after ``timeout``"""
+        if not self.alive():
+            return
+        self.process.terminate()
+        
+        def reap():
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        threading.Thread(target=reap, daemon=True).start()
+
+    def stop(self, timeout=5):
+        """Close the job channel and wait for the worker to exit"""
+        if not self.alive():
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+class WorkerPool:
+    """Idle workers waiting for jobs; new ones are started on demand"""
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take an idle worker, or start a new one"""
+        with self.lock:
+            while self.idle:
+                worker = self.idle.pop()
+                if worker.alive():
+                    return worker
+        return AnalysisWorker()
+
+    def release(self, worker):
+        """Return a worker after a job; dead, worn out or surplus workers are stopped"""
+        if not worker.alive():
+            return
+        with self.lock:
+            if worker.jobs_done < MAX_JOBS_PER_WORKER and len(self.idle) < self.max_idle:
+                self.idle.append(worker)
+                return
+        worker.stop()
+
+    def discard(self, worker):
+        """Kill a worker that is in an unknown state (e.g. a job was interrupted)"""
+        if worker.alive():
+            worker.process.kill()
+
+    def stop_all(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.stop()